@@ -0,0 +1,76 @@
+"""
+Microbenchmark - EAR
+Custo por frame do EAR: caminho escalar do DrowsinessDetector, versão escalar
+antiga (np.sqrt), versão vetorizada por frame e versão em lote
+
+Uso: python -m benchmarks.ear_microbench [--frames 64] [--repeat 2000]
+"""
+import argparse
+import json
+import random
+import timeit
+import numpy as np
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+from src.infrastructure.ml.drowsiness_detector import DrowsinessDetector
+from src.infrastructure.ml.ear import EYE_INDICES, GATHERED_EYE_INDICES, landmarks_to_array, mean_ear, ear_batch
+
+NUM_LANDMARKS = 478
+EYE_POINTS = EYE_INDICES.ravel().tolist()
+
+def synthetic_face(rng: random.Random):
+    return [NormalizedLandmark(x=rng.random(), y=rng.random(), z=0.0) for _ in range(NUM_LANDMARKS)]
+
+def numpy_scalar_ear(eye, landmarks) -> float:
+    """Implementação anterior: np.sqrt em escalares"""
+    p1, p2, p3, p4, p5, p6 = [landmarks[i] for i in eye]
+    distance = lambda a, b: np.sqrt((a.x - b.x)**2 + (a.y - b.y)**2)
+    return (distance(p2, p6) + distance(p3, p5)) / (2.0 * distance(p1, p4))
+
+def per_frame_us(fn, number: int, frames: int = 1) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number / frames * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=64, help="frames/câmeras no lote")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    faces = [synthetic_face(rng) for _ in range(args.frames)]
+    face = faces[0]
+    arrays = np.stack([landmarks_to_array(f, EYE_POINTS) for f in faces])
+
+    # Só os métodos escalares são usados; não carrega o modelo
+    detector = DrowsinessDetector.__new__(DrowsinessDetector)
+    left_eye, right_eye = EYE_INDICES.tolist()
+
+    def scalar():
+        return (detector.calculate_ear(right_eye, face) + detector.calculate_ear(left_eye, face)) / 2.0
+
+    def numpy_scalar():
+        return (numpy_scalar_ear(right_eye, face) + numpy_scalar_ear(left_eye, face)) / 2.0
+
+    def vectorized():
+        return mean_ear(landmarks_to_array(face, EYE_POINTS), GATHERED_EYE_INDICES)
+
+    def batched():
+        return ear_batch([landmarks_to_array(f, EYE_POINTS) for f in faces], GATHERED_EYE_INDICES)
+
+    def batched_arrays():
+        return mean_ear(arrays, GATHERED_EYE_INDICES)
+
+    assert abs(scalar() - vectorized()) < 1e-4
+    batch_number = max(1, args.repeat // args.frames)
+
+    results = {
+        "scalar_hypot_us": per_frame_us(scalar, args.repeat),
+        "scalar_numpy_us": per_frame_us(numpy_scalar, args.repeat),
+        "vectorized_us": per_frame_us(vectorized, args.repeat),
+        "batched_from_landmarks_us": per_frame_us(batched, batch_number, args.frames),
+        "batched_from_arrays_us": per_frame_us(batched_arrays, batch_number, args.frames),
+        "batch_frames": args.frames
+    }
+    print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in results.items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
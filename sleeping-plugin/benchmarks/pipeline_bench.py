@@ -0,0 +1,285 @@
+"""
+Benchmark - Pipeline
+StreamProcessor -> CameraEventHandler._process_frame -> publisher local,
+com N câmeras simuladas a partir de um vídeo (gravado ou sintético).
+Não precisa de câmera nem de RabbitMQ.
+
+Uso:
+    python -m benchmarks.pipeline_bench --cameras 1,4,16,64 --duration 10
+    python -m benchmarks.pipeline_bench --video gravacao.mp4 --model face_landmarker.task
+    python -m benchmarks.pipeline_bench --output resultado.json
+    python -m benchmarks.pipeline_bench --cameras 4 | jq .scenarios
+
+O relatório JSON é o único conteúdo do stdout; logs vão para o stderr.
+fps_per_camera deve ficar perto de --target-fps enquanto houver CPU: antes do
+agendamento por prazo do StreamProcessor ele ficava em ~2/3 do alvo (a espera
+pelo próximo grab não entrava no período), e relatórios dessa época subestimam
+a taxa de análise.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from typing import Dict, List
+import cv2
+import numpy as np
+from src.application.handlers.camera_handler import CameraEventHandler
+from src.infrastructure.ml.detector_pool import DetectorPool, DetectorPoolConfig
+from src.infrastructure.video.capture import CaptureConfig, OpenCVCapture
+from src.infrastructure.video.frame_scheduler import SchedulerConfig
+
+class StageTimer:
+    """Amostras de latência por estágio (list.append é atômico sob o GIL)"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict:
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            result[stage] = {
+                "count": len(ordered),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+                "p90_ms": round(percentile(ordered, 90) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0
+            }
+        return result
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+class LoopingCapture(OpenCVCapture):
+    """Arquivo de vídeo tocado em loop no ritmo do FPS de origem, como uma câmera ao vivo"""
+
+    def __init__(self, url: str, config: CaptureConfig, timer: StageTimer):
+        super().__init__(url, config)
+        self.timer = timer
+        self.interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        self._next = time.monotonic()
+
+    def grab(self) -> bool:
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + self.interval, time.monotonic() - self.interval)
+
+        start = time.monotonic()
+        if not self.cap.grab():
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            if not self.cap.grab():
+                return False
+        self.timer.record("grab", time.monotonic() - start)
+        return True
+
+    def retrieve(self):
+        start = time.monotonic()
+        result = super().retrieve()
+        self.timer.record("decode", time.monotonic() - start)
+        return result
+
+class FakeDetector:
+    """Custo de inferência fixo e EAR oscilante (gera alertas periódicos)"""
+
+    def __init__(self, inference_ms: float, ear_threshold: float = 0.2):
+        self.inference_ms = inference_ms
+        self.ear_threshold = ear_threshold
+
+    def detect(self, frame, camera_id=None):
+        time.sleep(self.inference_ms / 1000)
+        return 0.25 + 0.1 * math.sin(time.monotonic())
+
+    def detect_batch(self, frames, camera_ids):
+        return [self.detect(f, c) for f, c in zip(frames, camera_ids)]
+
+    def is_drowsy(self, ear_value):
+        return ear_value < self.ear_threshold
+
+    def release_camera(self, camera_id):
+        pass
+
+    def roi_stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+class TimedDetector:
+    def __init__(self, backend, timer: StageTimer):
+        self.backend = backend
+        self.timer = timer
+        self.ear_threshold = backend.ear_threshold
+
+    def detect(self, frame, camera_id=None):
+        start = time.monotonic()
+        try:
+            return self.backend.detect(frame, camera_id)
+        finally:
+            self.timer.record("inference", time.monotonic() - start)
+
+    def is_drowsy(self, ear_value):
+        return self.backend.is_drowsy(ear_value)
+
+    def release_camera(self, camera_id):
+        self.backend.release_camera(camera_id)
+
+class LocalPublisher:
+    """Publisher em memória: mede a serialização JSON que iria para o broker"""
+
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+        self.published = 0
+
+    def publish(self, routing_key: str, event: dict):
+        start = time.monotonic()
+        json.dumps(event)
+        self.published += 1
+        self.timer.record("publish", time.monotonic() - start)
+
+def synthetic_video(path: str, seconds: int = 10, fps: int = 30, size=(640, 480)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    width, height = size
+    for i in range(seconds * fps):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        x = int((math.sin(i / fps) + 1) / 2 * (width - 160))
+        cv2.rectangle(frame, (x, 120), (x + 160, 360), (180, 160, 150), -1)
+        writer.write(frame)
+    writer.release()
+
+def process_usage():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rss_kb = usage.ru_maxrss
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+    except OSError:
+        pass
+    return usage.ru_utime + usage.ru_stime, rss_kb
+
+def run_scenario(cameras: int, duration: float, video: str, make_detector, target_fps: float) -> dict:
+    timer = StageTimer()
+    detector = make_detector()
+    publisher = LocalPublisher(timer)
+    handler = CameraEventHandler(
+        TimedDetector(detector, timer), publisher, min_closed_ms=500,
+        scheduler_config=SchedulerConfig(target_fps=target_fps, idle_fps=target_fps, boost_fps=target_fps),
+        capture_factory=partial(LoopingCapture, timer=timer)
+    )
+
+    process_frame = handler._process_frame
+
+    def timed_process_frame(camera_id, frame, captured_at=None):
+        start = time.monotonic()
+        try:
+            return process_frame(camera_id, frame, captured_at)
+        finally:
+            now = time.monotonic()
+            timer.record("process_frame", now - start)
+            if captured_at is not None:
+                timer.record("frame_age", now - captured_at)
+
+    handler._process_frame = timed_process_frame
+
+    cpu_start, _ = process_usage()
+    started = time.monotonic()
+    for i in range(cameras):
+        handler.handle_camera_added({"data": {"camera_id": f"bench-{i:03d}", "rtsp_url": video}})
+
+    time.sleep(duration)
+    elapsed = time.monotonic() - started
+    cpu_end, rss_kb = process_usage()
+    threads = threading.active_count()
+
+    stats = [p.stats() for p in handler.processors.values()]
+    for i in range(cameras):
+        handler.handle_camera_removed({"data": {"camera_id": f"bench-{i:03d}"}})
+    detector.close()
+
+    processed = sum(s["processed"] for s in stats)
+    return {
+        "cameras": cameras,
+        "duration_s": round(elapsed, 2),
+        "frames_processed": processed,
+        "fps_total": round(processed / elapsed, 2),
+        "fps_per_camera": round(processed / elapsed / cameras, 2),
+        "frames_dropped": sum(s["dropped"] for s in stats),
+        "events_published": publisher.published,
+        "cpu_percent": round((cpu_end - cpu_start) / elapsed * 100, 1),
+        "rss_mb": round(rss_kb / 1024, 1),
+        "threads": threads,
+        "stages": timer.summary()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline VigilEye")
+    parser.add_argument("--cameras", default="1,4,16,64", help="lista de quantidades de câmeras")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos por cenário")
+    parser.add_argument("--video", help="vídeo gravado (padrão: sintético)")
+    parser.add_argument("--model", help="face_landmarker.task (padrão: detector falso)")
+    parser.add_argument("--pool-size", type=int, default=0)
+    parser.add_argument("--fake-inference-ms", type=float, default=8.0)
+    parser.add_argument("--target-fps", type=float, default=15.0)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    # Logs do handler e do pool no stderr: o stdout é só do relatório (| jq)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    video = args.video
+    if not video:
+        video = os.path.join(tempfile.gettempdir(), "vigileye_bench.avi")
+        if not os.path.exists(video):
+            synthetic_video(video)
+
+    if args.model:
+        from src.infrastructure.ml.drowsiness_detector import DrowsinessDetector
+        factory = partial(DrowsinessDetector, args.model, 0.2, 20)
+        make_detector = lambda: DetectorPool(factory, DetectorPoolConfig(size=args.pool_size))
+    else:
+        make_detector = lambda: FakeDetector(args.fake_inference_ms)
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            "video": video,
+            "detector": "mediapipe" if args.model else f"fake({args.fake_inference_ms}ms)",
+            "target_fps": args.target_fps,
+            "duration_s": args.duration
+        },
+        "scenarios": [
+            run_scenario(int(n), args.duration, video, make_detector, args.target_fps)
+            for n in args.cameras.split(",")
+        ]
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
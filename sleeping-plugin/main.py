@@ -3,12 +3,32 @@ VigilEye Plugin - Main Entry Point
 Plugin de detecção de sonolência para VMS Hub
 """
 import os
+import socket
 import logging
+from dataclasses import dataclass
+from functools import partial
 from dotenv import load_dotenv
 from src.infrastructure.messaging.consumer import EventConsumer, RabbitMQConfig
+from src.infrastructure.messaging.async_consumer import AsyncEventConsumer
 from src.infrastructure.messaging.publisher import EventPublisher, PublisherConfig
+from src.domain.entities.alert_state import AlertPolicy
 from src.infrastructure.ml.drowsiness_detector import DrowsinessDetector
+from src.infrastructure.ml.detector_pool import DetectorPool, DetectorPoolConfig
+from src.infrastructure.ml.process_engine import ProcessInferenceEngine, ProcessEngineConfig
+from src.infrastructure.ml.batch_stage import BatchInferenceStage, BatchStageConfig
+from src.infrastructure.ml.roi_tracker import ROIConfig
+from src.infrastructure.video.frame_scheduler import SchedulerConfig
+from src.infrastructure.video.capture import CaptureConfig, configure_capture
+from src.domain.services.camera_sync import SyncConfig
+from src.domain.services.fatigue import FatigueConfig
+from src.domain.services.calibration import CalibrationConfig
+from src.infrastructure.storage.baseline_store import BaselineStore
 from src.application.handlers.camera_handler import CameraEventHandler
+from src.application.services.telemetry import TelemetryAggregator, TelemetryConfig
+from src.application.services.live_feed import FeedConfig, LiveFeedHub
+from src.application.services.alert_history import AlertHistory, AlertHistoryConfig, SqliteAlertStore
+from src.application.services.admission import AdmissionConfig, AdmissionController
+from src.application.services.cluster import CATALOG, HEARTBEAT, LEAVE, ClusterConfig, ClusterMembership
 from src.presentation.api import start_api
 
 logging.basicConfig(
@@ -17,6 +37,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@dataclass
+class InferenceConfig:
+    mode: str
+    model_path: str
+    ear_threshold: float
+    consec_frames: int
+    min_closed_ms: float
+    alert: AlertPolicy
+    fatigue: FatigueConfig
+    calibration: CalibrationConfig
+    pool: DetectorPoolConfig
+    process: ProcessEngineConfig
+    batch: BatchStageConfig
+    roi: ROIConfig
+
 def load_config():
     """Carrega configurações do ambiente"""
     load_dotenv()
@@ -31,7 +66,10 @@ def load_config():
         password=os.getenv("RABBITMQ_PASS"),
         exchange=os.getenv("RABBITMQ_EXCHANGE"),
         queue=os.getenv("RABBITMQ_QUEUE"),
-        routing_keys=routing_keys
+        routing_keys=routing_keys,
+        prefetch_count=int(os.getenv("CONSUMER_PREFETCH", "64")),
+        max_concurrency=int(os.getenv("CONSUMER_CONCURRENCY", "32")),
+        requeue_delay_s=float(os.getenv("CONSUMER_REQUEUE_DELAY_S", "1"))
     )
     
     publisher_config = PublisherConfig(
@@ -39,39 +77,245 @@ def load_config():
         port=int(os.getenv("RABBITMQ_PORT")),
         username=os.getenv("RABBITMQ_USER"),
         password=os.getenv("RABBITMQ_PASS"),
-        exchange=os.getenv("RABBITMQ_EXCHANGE")
+        exchange=os.getenv("RABBITMQ_EXCHANGE"),
+        queue_size=int(os.getenv("PUBLISH_QUEUE_SIZE", "1000")),
+        batch_size=int(os.getenv("PUBLISH_BATCH_SIZE", "50")),
+        confirms=os.getenv("PUBLISH_CONFIRMS", "true").lower() == "true",
+        confirm_timeout=float(os.getenv("PUBLISH_CONFIRM_TIMEOUT_S", "10")),
+        heartbeat=int(os.getenv("RABBITMQ_HEARTBEAT", "30")),
+        reconnect_max=float(os.getenv("RECONNECT_MAX_S", "30")),
+        spool_dir=os.getenv("SPOOL_DIR", "spool"),
+        spool_fsync=os.getenv("SPOOL_FSYNC", "true").lower() == "true",
+        serializer=os.getenv("EVENT_FORMAT", "json")
     )
     
-    model_path = os.getenv("MODEL_PATH", "face_landmarker.task")
-    ear_threshold = float(os.getenv("EAR_THRESHOLD", "0.2"))
     consec_frames = int(os.getenv("CONSEC_FRAMES", "20"))
+    min_closed_ms = float(os.getenv("MIN_CLOSED_MS", str(consec_frames * 33)))
     
-    return rabbitmq_config, publisher_config, model_path, ear_threshold, consec_frames
+    inference_config = InferenceConfig(
+        mode=os.getenv("INFERENCE_MODE", "thread"),
+        model_path=os.getenv("MODEL_PATH", "face_landmarker.task"),
+        ear_threshold=float(os.getenv("EAR_THRESHOLD", "0.2")),
+        consec_frames=consec_frames,
+        min_closed_ms=min_closed_ms,
+        alert=AlertPolicy(
+            min_closed_ms=min_closed_ms,
+            cooldown_ms=float(os.getenv("ALERT_COOLDOWN_MS", "5000")),
+            update_interval_ms=float(os.getenv("ALERT_UPDATE_INTERVAL_MS", "0"))
+        ),
+        fatigue=FatigueConfig(
+            perclos_window_s=float(os.getenv("PERCLOS_WINDOW_S", "60")),
+            perclos_threshold=float(os.getenv("PERCLOS_THRESHOLD", "0.15")),
+            blink_min_ms=float(os.getenv("BLINK_MIN_MS", "50")),
+            blink_max_ms=float(os.getenv("BLINK_MAX_MS", "400")),
+            yawn_mar_threshold=float(os.getenv("YAWN_MAR_THRESHOLD", "0.6")),
+            yawn_min_ms=float(os.getenv("YAWN_MIN_MS", "1500")),
+            yawn_window_s=float(os.getenv("YAWN_WINDOW_S", "300")),
+            yawn_limit=int(os.getenv("YAWN_LIMIT", "3")),
+            max_gap_ms=float(os.getenv("PERCLOS_MAX_GAP_MS", "1000"))
+        ),
+        calibration=CalibrationConfig(
+            enabled=os.getenv("CALIBRATION_ENABLED", "false").lower() == "true",
+            duration_s=float(os.getenv("CALIBRATION_SECONDS", "30")),
+            min_samples=int(os.getenv("CALIBRATION_MIN_SAMPLES", "100")),
+            ratio=float(os.getenv("CALIBRATION_RATIO", "0.75")),
+            store_path=os.getenv("CALIBRATION_STORE", "baselines.json")
+        ),
+        pool=DetectorPoolConfig(
+            size=int(os.getenv("DETECTOR_POOL_SIZE", "0")),
+            mode=os.getenv("DETECTOR_POOL_MODE", "checkout")
+        ),
+        process=ProcessEngineConfig(
+            workers=int(os.getenv("PROCESS_WORKERS", "0")),
+            ring_slots=int(os.getenv("SHM_RING_SLOTS", "2"))
+        ),
+        batch=BatchStageConfig(
+            max_batch=int(os.getenv("INFERENCE_BATCH_SIZE", "1")),
+            window_ms=float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5")),
+            workers=int(os.getenv("INFERENCE_BATCH_WORKERS", "0"))
+        ),
+        roi=ROIConfig(
+            enabled=os.getenv("ROI_TRACKING", "true").lower() == "true",
+            margin=float(os.getenv("ROI_MARGIN", "0.35")),
+            max_side=int(os.getenv("ROI_MAX_SIDE", "320"))
+        )
+    )
+    
+    scheduler_config = SchedulerConfig(
+        target_fps=float(os.getenv("TARGET_FPS", "15")),
+        idle_fps=float(os.getenv("IDLE_FPS", "2")),
+        boost_fps=float(os.getenv("BOOST_FPS", "30")),
+        idle_after_s=float(os.getenv("IDLE_AFTER_S", "5")),
+        boost_margin=float(os.getenv("BOOST_MARGIN", "0.25"))
+    )
+    
+    capture_config = CaptureConfig(
+        backend=os.getenv("CAPTURE_BACKEND", "opencv"),
+        rtsp_transport=os.getenv("RTSP_TRANSPORT", "tcp"),
+        low_latency=os.getenv("CAPTURE_LOW_LATENCY", "true").lower() == "true",
+        buffer_size=int(os.getenv("CAPTURE_BUFFER_SIZE", "1")),
+        hw_accel=os.getenv("CAPTURE_HW_ACCEL", ""),
+        width=int(os.getenv("CAPTURE_WIDTH", "0")),
+        height=int(os.getenv("CAPTURE_HEIGHT", "0")),
+        rgb_output=os.getenv("CAPTURE_RGB", "false").lower() == "true",
+        substream_from=os.getenv("SUBSTREAM_FROM", ""),
+        substream_to=os.getenv("SUBSTREAM_TO", "")
+    )
+    
+    sync_config = SyncConfig(
+        burst=int(os.getenv("SYNC_BURST", "8")),
+        interval_ms=float(os.getenv("SYNC_INTERVAL_MS", "250"))
+    )
+    
+    telemetry_config = TelemetryConfig(
+        enabled=os.getenv("TELEMETRY_ENABLED", "false").lower() == "true",
+        window_ms=float(os.getenv("TELEMETRY_WINDOW_MS", "1000")),
+        publish_interval_s=float(os.getenv("TELEMETRY_INTERVAL_S", "10")),
+        ring_size=int(os.getenv("TELEMETRY_RING_SIZE", "10000")),
+        max_gap_ms=float(os.getenv("PERCLOS_MAX_GAP_MS", "1000"))
+    )
+    
+    feed_config = FeedConfig(
+        ring_size=int(os.getenv("FEED_RING_SIZE", "4096")),
+        ear_interval_ms=float(os.getenv("FEED_EAR_INTERVAL_MS", "200")),
+        keepalive_s=float(os.getenv("FEED_KEEPALIVE_S", "15")),
+        max_subscribers=int(os.getenv("FEED_MAX_SUBSCRIBERS", "100"))
+    )
+    
+    history_config = AlertHistoryConfig(
+        per_camera=int(os.getenv("ALERT_HISTORY_PER_CAMERA", "1000")),
+        db_path=os.getenv("ALERT_HISTORY_DB", "")
+    )
+    
+    cluster_config = ClusterConfig(
+        enabled=os.getenv("CLUSTER_ENABLED", "false").lower() == "true",
+        node_id=os.getenv("CLUSTER_NODE_ID") or socket.gethostname(),
+        heartbeat_s=float(os.getenv("CLUSTER_HEARTBEAT_S", "2")),
+        dead_after_s=float(os.getenv("CLUSTER_DEAD_AFTER_S", "6")),
+        vnodes=int(os.getenv("CLUSTER_VNODES", "64")),
+        queue_expires_s=float(os.getenv("CLUSTER_QUEUE_EXPIRES_S", "300"))
+    )
+    
+    admission_config = AdmissionConfig(
+        enabled=os.getenv("ADMISSION_ENABLED", "false").lower() == "true",
+        target_utilization=float(os.getenv("ADMISSION_TARGET_UTILIZATION", "0.85")),
+        max_cameras=int(os.getenv("ADMISSION_MAX_CAMERAS", "0")),
+        degraded_fps=float(os.getenv("ADMISSION_DEGRADED_FPS", "5")),
+        overflow=os.getenv("ADMISSION_OVERFLOW", "reject"),
+        cpu_limit=float(os.getenv("ADMISSION_CPU_LIMIT", "0.9")),
+        initial_frame_ms=float(os.getenv("ADMISSION_INITIAL_FRAME_MS", "50"))
+    )
+    
+    if cluster_config.enabled:
+        # Cada nó precisa ver todos os eventos de câmera: fila própria por nó.
+        # x-expires apaga a fila de um nó que não volta (hostname efêmero, nó
+        # desligado) em vez de acumular eventos para sempre no broker
+        if not os.getenv("CLUSTER_NODE_ID"):
+            logger.warning(
+                f"CLUSTER_NODE_ID não definido: usando o hostname {cluster_config.node_id}; "
+                "em containers ele muda a cada deploy e cria uma fila nova por nó"
+            )
+        rabbitmq_config.queue = f"{rabbitmq_config.queue}.{cluster_config.node_id}"
+        if cluster_config.queue_expires_s > 0:
+            rabbitmq_config.queue_arguments = {"x-expires": int(cluster_config.queue_expires_s * 1000)}
+        rabbitmq_config.routing_keys = rabbitmq_config.routing_keys + [
+            key for key in (HEARTBEAT, LEAVE, CATALOG) if key not in rabbitmq_config.routing_keys
+        ]
+    
+    return (rabbitmq_config, publisher_config, inference_config, scheduler_config,
+            capture_config, sync_config, telemetry_config, feed_config, history_config, cluster_config,
+            admission_config)
+
+def build_detector(config: InferenceConfig, input_rgb: bool = False):
+    """Cria o backend de inferência: threads (pool) ou processos, opcionalmente em lotes"""
+    detector_factory = partial(
+        DrowsinessDetector, config.model_path, config.ear_threshold, config.consec_frames,
+        roi_config=config.roi, roi_trackers={}, input_rgb=input_rgb
+    )
+    
+    if config.mode == "process":
+        backend = ProcessInferenceEngine(detector_factory, config.process, config.ear_threshold)
+    elif config.mode == "thread":
+        backend = DetectorPool(detector_factory, config.pool)
+    else:
+        raise ValueError(f"INFERENCE_MODE inválido: {config.mode}")
+    
+    if config.batch.max_batch > 1:
+        return BatchInferenceStage(backend, config.batch)
+    return backend
 
 def main():
     logger.info("=" * 60)
     logger.info("VigilEye Plugin - Driver Drowsiness Detection")
     logger.info("=" * 60)
     
-    rabbitmq_config, publisher_config, model_path, ear_threshold, consec_frames = load_config()
+    (rabbitmq_config, publisher_config, inference_config, scheduler_config,
+     capture_config, sync_config, telemetry_config, feed_config, history_config, cluster_config,
+     admission_config) = load_config()
     
-    detector = DrowsinessDetector(model_path, ear_threshold, consec_frames)
-    logger.info(f"Detector inicializado: EAR={ear_threshold}, Frames={consec_frames}")
+    configure_capture(capture_config)
+    detector = build_detector(inference_config, capture_config.delivers_rgb)
+    yawn_settings = sorted(name for name in os.environ if name.startswith("YAWN_"))
+    if yawn_settings and not hasattr(detector, "measure"):
+        logger.warning(
+            f"{', '.join(yawn_settings)} ignorado(s): o modo de inferência atual não mede a boca (MAR); "
+            "bocejos exigem INFERENCE_MODE=thread e INFERENCE_BATCH_SIZE=1"
+        )
+    logger.info(
+        f"Detector inicializado: modo={inference_config.mode}, "
+        f"EAR={inference_config.ear_threshold}, Fechamento={inference_config.min_closed_ms}ms"
+    )
     
     publisher = EventPublisher(publisher_config)
     publisher.connect()
     
-    handler = CameraEventHandler(detector, publisher, consec_frames)
+    telemetry = TelemetryAggregator(publisher, telemetry_config) if telemetry_config.enabled else None
+    
+    alert_store = SqliteAlertStore(history_config.db_path) if history_config.db_path else None
+    history = AlertHistory(history_config, alert_store)
+    
+    cluster = ClusterMembership(cluster_config, publisher) if cluster_config.enabled else None
+    
+    # Desligado, o controlador só contabiliza a carga (exposta em /load) e aceita tudo
+    admission = AdmissionController(
+        admission_config, getattr(detector, "size", os.cpu_count() or 1), scheduler_config.target_fps
+    )
+    
+    calibration_config = inference_config.calibration
+    baseline_store = BaselineStore(calibration_config.store_path) if calibration_config.enabled else None
+    
+    handler = CameraEventHandler(
+        detector, publisher, inference_config.min_closed_ms,
+        scheduler_config, capture_config,
+        sync_config=sync_config, alert_policy=inference_config.alert,
+        telemetry=telemetry, fatigue_config=inference_config.fatigue,
+        calibration_config=calibration_config, baseline_store=baseline_store,
+        feed=LiveFeedHub(feed_config), history=history, cluster=cluster,
+        admission=admission
+    )
     
     api_port = int(os.getenv("API_PORT", "8000"))
     start_api(handler, api_port)
     logger.info(f"API iniciada: http://0.0.0.0:{api_port}")
     
-    consumer = EventConsumer(rabbitmq_config)
+    consumer_mode = os.getenv("CONSUMER_MODE", "async")
+    if consumer_mode == "async":
+        consumer = AsyncEventConsumer(rabbitmq_config)
+    elif consumer_mode == "blocking":
+        consumer = EventConsumer(rabbitmq_config)
+    else:
+        raise ValueError(f"CONSUMER_MODE inválido: {consumer_mode}")
     consumer.register_handler("camera.added", handler.handle_camera_added)
     consumer.register_handler("camera.removed", handler.handle_camera_removed)
+    consumer.register_handler("camera.sync", handler.handle_camera_sync)
+    if cluster:
+        consumer.register_handler(HEARTBEAT, cluster.handle_heartbeat)
+        consumer.register_handler(LEAVE, cluster.handle_leave)
+        consumer.register_handler(CATALOG, handler.handle_cluster_catalog)
     
     consumer.connect()
+    if cluster:
+        cluster.start(handler.rebalance)
     
     logger.info("Plugin pronto. Aguardando eventos...")
     
@@ -80,7 +324,13 @@ def main():
     except KeyboardInterrupt:
         logger.info("Encerrando plugin...")
         consumer.stop()
+        if cluster:
+            cluster.close()
+        if telemetry:
+            telemetry.close()
+        history.close()
         publisher.close()
+        detector.close()
         logger.info("Plugin encerrado")
 
 if __name__ == "__main__":
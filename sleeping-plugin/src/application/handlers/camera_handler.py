@@ -3,20 +3,79 @@ Event Handlers
 Processa eventos recebidos do VMS Hub
 """
 import logging
-from typing import Dict
-from ..domain.entities.detection_session import DetectionSession
-from ..domain.events.domain_events import DrowsinessDetectedEvent, AlertTriggeredEvent
-from ..infrastructure.video.stream_processor import StreamProcessor
-from ..infrastructure.ml.drowsiness_detector import DrowsinessDetector
-from ..infrastructure.messaging.publisher import EventPublisher
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from ...domain.entities.detection_session import DetectionSession
+from ...domain.entities.alert_state import AlertAction, AlertPolicy
+from ...domain.events.domain_events import DrowsinessDetectedEvent, AlertTriggeredEvent, CameraRejectedEvent
+from ...domain.services.fatigue import FatigueConfig
+from ...domain.services.calibration import CalibrationConfig, EarCalibrator
+from ...domain.services.camera_sync import SyncConfig, diff_cameras, stagger_delays
+from ...infrastructure.video.stream_processor import StreamProcessor
+from ...infrastructure.video.frame_scheduler import AdaptiveFrameScheduler, SchedulerConfig
+from ...infrastructure.video.capture import CaptureConfig, open_capture, resolve_stream_url
+from ...infrastructure.messaging.publisher import EventPublisher
+from ...infrastructure.storage.baseline_store import BaselineStore
+from ...infrastructure.monitoring.metrics import ALERTS, FACES, FRAMES, REGISTRY, STAGE_SECONDS
+from ..services.telemetry import TelemetryAggregator
+from ..services.session_stats import SessionStats
+from ..services.live_feed import LiveFeedHub
+from ..services.alert_history import AlertHistory
+from ..services.cluster import ClusterMembership
+from ..services.admission import AdmissionController, AdmissionDecision, AdmissionRejected
 
 logger = logging.getLogger(__name__)
 
 class CameraEventHandler:
-    def __init__(self, detector: DrowsinessDetector, publisher: EventPublisher, consec_frames: int):
+    def __init__(self, detector, publisher: EventPublisher, min_closed_ms: float,
+                 scheduler_config: Optional[SchedulerConfig] = None,
+                 capture_config: Optional[CaptureConfig] = None,
+                 capture_factory: Callable = open_capture,
+                 sync_config: Optional[SyncConfig] = None,
+                 alert_policy: Optional[AlertPolicy] = None,
+                 telemetry: Optional[TelemetryAggregator] = None,
+                 fatigue_config: Optional[FatigueConfig] = None,
+                 calibration_config: Optional[CalibrationConfig] = None,
+                 baseline_store: Optional[BaselineStore] = None,
+                 feed: Optional[LiveFeedHub] = None,
+                 history: Optional[AlertHistory] = None,
+                 cluster: Optional[ClusterMembership] = None,
+                 admission: Optional[AdmissionController] = None):
         self.detector = detector
         self.publisher = publisher
-        self.consec_frames = consec_frames
+        self.min_closed_ms = min_closed_ms
+        self.alert_policy = replace(alert_policy or AlertPolicy(), min_closed_ms=min_closed_ms)
+        self.scheduler_config = scheduler_config or SchedulerConfig()
+        self.capture_config = capture_config or CaptureConfig()
+        self.capture_factory = capture_factory
+        self.sync_config = sync_config or SyncConfig()
+        self.telemetry = telemetry
+        self.fatigue_config = fatigue_config or FatigueConfig()
+        self.calibration = calibration_config or CalibrationConfig()
+        self.baselines = baseline_store
+        self.feed = feed
+        self.history = history
+        # Modo cluster: todas as câmeras anunciadas pelo hub, inclusive as de outros nós
+        self.cluster = cluster
+        self.catalog: Dict[str, dict] = {}
+        self.admission = admission
+        if cluster and admission and admission.config.overflow == "nack":
+            # Cada nó consome da própria fila: o nack voltaria sempre para ele mesmo
+            raise ValueError("ADMISSION_OVERFLOW=nack não funciona com CLUSTER_ENABLED")
+        # Pool, processos e batch medem o custo de inferência por dentro, sem a
+        # espera por instância, fila ou janela; no detector simples mede o handler
+        self._backend_timed = hasattr(detector, "cost_observer")
+        if admission and self._backend_timed:
+            detector.cost_observer = admission.observe
+        # Backends que medem a boca (MAR) expõem measure(); os demais só o EAR
+        self._measure = getattr(detector, "measure", None)
+        # Reentrante: added/removed/sync/rebalance chegam de threads diferentes
+        # (consumer assíncrono, heartbeat do cluster) e se chamam entre si
+        self._sync_lock = threading.RLock()
+        self.stats = SessionStats()
         self.sessions: Dict[str, DetectionSession] = {}
         self.processors: Dict[str, StreamProcessor] = {}
     
@@ -30,23 +89,132 @@ class CameraEventHandler:
             logger.error("Evento inválido: faltam camera_id ou rtsp_url")
             return
         
-        logger.info(f"Adicionando câmera: {camera_id}")
+        with self._sync_lock:
+            if self.cluster:
+                self.catalog[camera_id] = data
+                if not self.cluster.owns(camera_id):
+                    logger.info(f"Câmera {camera_id} pertence ao nó {self.cluster.owner(camera_id)}")
+                    if camera_id in self.processors:
+                        self._stop_camera(camera_id)
+                    return
+            
+            current = self.sessions.get(camera_id)
+            if current and current.rtsp_url == rtsp_url and camera_id in self.processors:
+                # Re-sync do hub após restart: a câmera já está rodando
+                logger.info(f"Câmera já ativa: {camera_id}")
+                if data.get('recalibrate') and self.calibration.enabled:
+                    self._apply_baseline(current, recalibrate=True)
+                return
+            if camera_id in self.processors:
+                self._stop_camera(camera_id)
+            
+            if not self._start_camera(data) and self.admission and self.admission.config.overflow == "nack":
+                raise AdmissionRejected(f"Sem capacidade para a câmera {camera_id}")
+    
+    def _start_camera(self, data: dict, delay: float = 0.0) -> bool:
+        """Inicia a câmera; False se o controle de admissão a recusou ou pôs na fila"""
+        with self._sync_lock:
+            camera_id = data['camera_id']
+            rtsp_url = data['rtsp_url']
+            
+            fps_cap = 0.0
+            if self.admission:
+                admission = self.admission.admit(camera_id, data.get('priority', 'normal'))
+                if admission.decision == AdmissionDecision.QUEUE:
+                    self.admission.enqueue(data)
+                    return False
+                if not admission.admitted:
+                    # Com nack o evento volta à fila para outro nó: camera.rejected só no reject
+                    if self.admission.config.overflow != "nack":
+                        self._publish_rejected(camera_id, admission.reason)
+                    return False
+                for other in admission.degrade:
+                    self._cap_fps(other, self.admission.config.degraded_fps)
+                fps_cap = admission.fps_cap
+            
+            logger.info(f"Adicionando câmera: {camera_id}" + (f" (limitada a {fps_cap} FPS)" if fps_cap else ""))
+            
+            session = DetectionSession(
+                camera_id=camera_id,
+                rtsp_url=rtsp_url,
+                started_at=datetime.now(),
+                stats=self.stats
+            )
+            self.stats.add(total=1, active=1)
+            if self.calibration.enabled:
+                self._apply_baseline(session, recalibrate=bool(data.get('recalibrate')))
+            self.sessions[camera_id] = session
+            
+            processor = StreamProcessor(
+                camera_id=camera_id,
+                rtsp_url=resolve_stream_url(rtsp_url, self.capture_config, data.get('substream_url')),
+                frame_callback=self._process_frame,
+                scheduler=AdaptiveFrameScheduler(self.scheduler_config, self._ear_threshold(session)),
+                capture_config=self.capture_config,
+                capture_factory=self.capture_factory,
+                drop_callback=lambda dropped: self.stats.add(dropped_frames=dropped)
+            )
+            processor.scheduler.fps_cap = fps_cap
+            self.processors[camera_id] = processor
+            processor.start(delay)
+            return True
+    
+    def _cap_fps(self, camera_id: str, fps: float):
+        processor = self.processors.get(camera_id)
+        if processor:
+            processor.scheduler.fps_cap = fps
+            logger.info(f"FPS de {camera_id}: {'limitado a ' + str(fps) if fps else 'normal'}")
+    
+    def _publish_rejected(self, camera_id: str, reason: str):
+        event = CameraRejectedEvent(camera_id=camera_id, reason=reason, load=self.admission.stats())
+        self.publisher.publish("camera.rejected", event.to_dict())
+    
+    def _admit_pending(self):
+        """Capacidade liberada: inicia as câmeras da fila de admissão, em ordem de chegada"""
+        if not self.admission:
+            return
+        while True:
+            data = self.admission.next_pending()
+            if data is None or not self._start_camera(data):
+                return
+    
+    def _apply_baseline(self, session: DetectionSession, recalibrate: bool = False):
+        """Usa a baseline salva da câmera ou inicia uma calibração"""
+        camera_id = session.camera_id
+        if recalibrate and self.baselines:
+            self.baselines.delete(camera_id)
+        baseline = self.baselines.get(camera_id) if self.baselines else None
         
-        from datetime import datetime
-        session = DetectionSession(
-            camera_id=camera_id,
-            rtsp_url=rtsp_url,
-            started_at=datetime.now()
-        )
-        self.sessions[camera_id] = session
+        if baseline and not recalibrate:
+            session.set_threshold(baseline['threshold'])
+            logger.info(f"Baseline de {camera_id}: limiar EAR {session.ear_threshold}")
+        else:
+            session.start_calibration(EarCalibrator())
+            logger.info(f"Calibrando EAR de {camera_id} por {self.calibration.duration_s}s")
+        self._sync_scheduler_threshold(session)
+    
+    def _ear_threshold(self, session: DetectionSession) -> float:
+        return session.ear_threshold if session.ear_threshold is not None else self.detector.ear_threshold
+    
+    def _sync_scheduler_threshold(self, session: DetectionSession):
+        """O boost do scheduler acompanha o limiar da sessão (calibrado ou global)"""
+        processor = self.processors.get(session.camera_id)
+        if processor:
+            processor.scheduler.ear_threshold = self._ear_threshold(session)
+    
+    def _calibrate(self, session: DetectionSession, ear_value: float, timestamp: float):
+        if not session.calibrator.add(timestamp, ear_value, self.calibration):
+            return
         
-        processor = StreamProcessor(
-            camera_id=camera_id,
-            rtsp_url=rtsp_url,
-            frame_callback=self._process_frame
+        baseline = session.calibrator.baseline(self.calibration)
+        session.set_threshold(baseline['threshold'])
+        self._sync_scheduler_threshold(session)
+        if self.baselines:
+            self.baselines.save(session.camera_id, baseline)
+        logger.info(
+            f"Calibração de {session.camera_id} concluída: mediana EAR {baseline['ear_p50']}, "
+            f"limiar {baseline['threshold']} ({baseline['samples']} amostras)"
         )
-        self.processors[camera_id] = processor
-        processor.start()
     
     def handle_camera_removed(self, message: dict):
         """Handler: camera.removed"""
@@ -57,48 +225,211 @@ class CameraEventHandler:
             logger.error("Evento inválido: falta camera_id")
             return
         
-        logger.info(f"Removendo câmera: {camera_id}")
+        with self._sync_lock:
+            if self.cluster:
+                self.catalog.pop(camera_id, None)
+                if camera_id not in self.sessions:
+                    if self.admission:
+                        self.admission.release(camera_id)
+                    return
+            
+            self._stop_camera(camera_id)
+            self._admit_pending()
+    
+    def _stop_camera(self, camera_id: str):
+        with self._sync_lock:
+            logger.info(f"Removendo câmera: {camera_id}")
+            
+            if camera_id in self.processors:
+                self.processors[camera_id].stop()
+                del self.processors[camera_id]
+            
+            session = self.sessions.pop(camera_id, None)
+            if session:
+                session.stop()
+                if session.stats is self.stats:
+                    self.stats.add(
+                        total=-1,
+                        fatigued=-int(session.fatigue.fatigued),
+                        calibrating=-int(session.calibrator is not None)
+                    )
+            
+            self.detector.release_camera(camera_id)
+            if self.admission:
+                for restored in self.admission.release(camera_id):
+                    self._cap_fps(restored, 0.0)
+            if self.telemetry:
+                self.telemetry.release_camera(camera_id)
+            if self.feed:
+                self.feed.release_camera(camera_id)
+            if self.history:
+                self.history.release_camera(camera_id)
+            REGISTRY.remove("camera", camera_id)
+    
+    def handle_camera_sync(self, message: dict):
+        """
+        Handler: camera.sync
+        Snapshot completo das câmeras desejadas; aplica só a diferença e escalona
+        as novas conexões RTSP em lotes para não disparar todas de uma vez
+        """
+        cameras = message.get('data', {}).get('cameras')
+        if cameras is None:
+            logger.error("Evento inválido: falta cameras")
+            return
         
-        if camera_id in self.processors:
-            self.processors[camera_id].stop()
-            del self.processors[camera_id]
+        with self._sync_lock:
+            if self.cluster:
+                self.catalog = {c['camera_id']: c for c in cameras if isinstance(c, dict) and c.get('camera_id')}
+                cameras = self._owned_cameras()
+            self._apply_desired(cameras)
+    
+    def handle_cluster_catalog(self, message: dict):
+        """
+        Handler: cluster.catalog
+        Catálogo enviado pelo líder quando um nó entra; só quem ainda não
+        recebeu nenhum evento do hub o adota
+        """
+        cameras = message.get('data', {}).get('cameras') or []
+        with self._sync_lock:
+            if self.catalog:
+                return
+            self.catalog = {c['camera_id']: c for c in cameras if isinstance(c, dict) and c.get('camera_id')}
+        logger.info(f"Catálogo do cluster recebido: {len(self.catalog)} câmeras")
+        self.rebalance()
+    
+    def rebalance(self):
+        """Membros do cluster mudaram: aplica o subconjunto de câmeras deste nó"""
+        if not self.cluster:
+            return
+        # Roda na thread de heartbeat: o lock torna a redistribuição atômica
+        # com camera.added/removed/sync, que não podem intercalar no meio dela
+        with self._sync_lock:
+            self._apply_desired(self._owned_cameras())
+            cameras = list(self.catalog.values()) if self.cluster.is_leader() else []
+        if cameras:
+            self.cluster.publish_catalog(cameras)
+    
+    def _owned_cameras(self) -> list:
+        with self._sync_lock:
+            return [camera for camera_id, camera in self.catalog.items() if self.cluster.owns(camera_id)]
+    
+    def _apply_desired(self, cameras: list):
+        with self._sync_lock:
+            running = {camera_id: session.rtsp_url for camera_id, session in list(self.sessions.items())}
+            plan = diff_cameras(running, cameras)
+            if self.admission:
+                self.admission.retain_pending({c.get('camera_id') for c in cameras if isinstance(c, dict)})
+            
+            # Sinaliza todas as paradas antes de aguardar as threads de cada uma
+            leaving = plan.to_stop + [camera['camera_id'] for camera in plan.to_restart]
+            for camera_id in leaving:
+                processor = self.processors.get(camera_id)
+                if processor:
+                    processor.request_stop()
+            for camera_id in leaving:
+                self._stop_camera(camera_id)
+            
+            joining = plan.to_restart + plan.to_start
+            delays = stagger_delays(len(joining), self.sync_config.burst, self.sync_config.interval_ms / 1000)
+            for camera, delay in zip(joining, delays):
+                self._start_camera(camera, delay)
+            self._admit_pending()
         
-        if camera_id in self.sessions:
-            self.sessions[camera_id].stop()
-            del self.sessions[camera_id]
+        logger.info(
+            f"Sync: +{len(plan.to_start)} -{len(plan.to_stop)} ~{len(plan.to_restart)} "
+            f"={plan.unchanged} (inválidas: {plan.invalid})"
+        )
     
-    def _process_frame(self, camera_id: str, frame):
-        """Processa frame e detecta sonolência"""
+    def _process_frame(self, camera_id: str, frame, captured_at: Optional[float] = None) -> Optional[float]:
+        """Processa frame e detecta sonolência; retorna o EAR (None sem rosto)"""
         session = self.sessions.get(camera_id)
         if not session or not session.is_active:
-            return
+            return None
+        
+        started = time.perf_counter()
+        if self._measure:
+            measured = self._measure(frame, camera_id)
+            ear_value, mar_value = measured if measured else (None, None)
+        else:
+            ear_value, mar_value = self.detector.detect(frame, camera_id), None
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels("detect", camera_id).observe(elapsed)
+        if self.admission and not self._backend_timed:
+            self.admission.observe(elapsed)
+        FRAMES.labels(camera_id).inc()
         
-        ear_value = self.detector.detect(frame)
+        timestamp = captured_at if captured_at is not None else time.monotonic()
         if ear_value is None:
-            return
+            if self.telemetry:
+                self.telemetry.record(camera_id, None, False, timestamp)
+            if self.feed:
+                self.feed.publish_ear(camera_id, None, False, timestamp)
+            return None
         
         session.update_ear(ear_value)
+        FACES.labels(camera_id).inc()
         
-        if self.detector.is_drowsy(ear_value):
-            session.increment_frame_counter()
-            
-            if session.frame_counter >= self.consec_frames:
-                self._trigger_alert(session)
+        if session.calibrator:
+            self._calibrate(session, ear_value, timestamp)
+        closed = session.is_closed(ear_value, self.detector.ear_threshold)
+        if self.telemetry:
+            self.telemetry.record(camera_id, ear_value, closed, timestamp)
+        if self.feed:
+            self.feed.publish_ear(camera_id, ear_value, closed, timestamp)
+        
+        if closed:
+            closed_ms = session.mark_closed(timestamp)
         else:
-            session.reset_frame_counter()
-    
-    def _trigger_alert(self, session: DetectionSession):
-        """Dispara alerta de sonolência"""
-        session.trigger_alert()
+            session.mark_open()
+            closed_ms = 0.0
+        
+        # Um alert.triggered por episódio; fechamentos seguintes só geram updates opcionais
+        action = session.alert.update(closed, closed_ms, timestamp, self.alert_policy)
+        if action == AlertAction.ALERT:
+            self._trigger_alert(session)
+        elif action == AlertAction.UPDATE:
+            self._publish_drowsiness(session)
         
-        duration_ms = session.frame_counter * 33
+        was_fatigued = session.fatigue.fatigued
+        reason = session.fatigue.update(timestamp, closed, mar_value, self.fatigue_config)
+        if session.fatigue.fatigued != was_fatigued and session.stats is self.stats:
+            self.stats.add(fatigued=1 if session.fatigue.fatigued else -1)
+        if reason:
+            self._trigger_fatigue_alert(session, reason, timestamp)
         
+        return ear_value
+    
+    def _publish_drowsiness(self, session: DetectionSession):
         drowsiness_event = DrowsinessDetectedEvent(
             camera_id=session.camera_id,
             ear_value=round(session.last_ear, 3),
             severity="high",
-            duration_ms=duration_ms
+            duration_ms=round(session.closed_ms)
         )
+        self._publish(session.camera_id, "drowsiness.detected", drowsiness_event.to_dict())
+    
+    def _publish(self, camera_id: str, routing_key: str, event: dict):
+        started = time.perf_counter()
+        self.publisher.publish(routing_key, event)
+        STAGE_SECONDS.labels("enqueue", camera_id).observe(time.perf_counter() - started)
+        if self.feed:
+            self.feed.publish(routing_key, event, camera_id)
+    
+    def _record_alert(self, session: DetectionSession, alert_event: AlertTriggeredEvent):
+        if self.history:
+            self.history.record({
+                "camera_id": session.camera_id,
+                "timestamp": time.time(),
+                "alert_type": alert_event.alert_type,
+                "priority": alert_event.priority,
+                "message": alert_event.message,
+                "ear": round(session.last_ear, 4)
+            })
+    
+    def _trigger_alert(self, session: DetectionSession):
+        """Dispara alerta de sonolência"""
+        session.trigger_alert()
+        self._publish_drowsiness(session)
         
         alert_event = AlertTriggeredEvent(
             camera_id=session.camera_id,
@@ -107,7 +438,29 @@ class CameraEventHandler:
             message=f"Sonolência detectada - EAR: {session.last_ear:.3f}"
         )
         
-        self.publisher.publish("drowsiness.detected", drowsiness_event.to_dict())
-        self.publisher.publish("alert.triggered", alert_event.to_dict())
+        self._publish(session.camera_id, "alert.triggered", alert_event.to_dict())
+        self._record_alert(session, alert_event)
+        ALERTS.labels(session.camera_id, "drowsiness").inc()
         
         logger.warning(f"ALERTA: {session.camera_id} - EAR: {session.last_ear:.3f}")
+    
+    def _trigger_fatigue_alert(self, session: DetectionSession, reason: str, now: float):
+        """Alerta de fadiga pelas janelas deslizantes (PERCLOS ou bocejos)"""
+        session.trigger_fatigue_alert()
+        snapshot = session.fatigue.snapshot(now, self.fatigue_config)
+        
+        alert_event = AlertTriggeredEvent(
+            camera_id=session.camera_id,
+            alert_type="fatigue",
+            priority="high",
+            message=(
+                f"Fadiga detectada ({reason}) - PERCLOS: {snapshot['perclos']:.2f}, "
+                f"piscadas/min: {snapshot['blinks_per_min']:.1f}, bocejos: {snapshot['yawns']}"
+            )
+        )
+        
+        self._publish(session.camera_id, "alert.triggered", alert_event.to_dict())
+        self._record_alert(session, alert_event)
+        ALERTS.labels(session.camera_id, "fatigue").inc()
+        
+        logger.warning(f"FADIGA: {session.camera_id} - {reason}")
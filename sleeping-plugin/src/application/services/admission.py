@@ -0,0 +1,217 @@
+"""
+Admission Controller
+Decide se o nó aceita uma nova câmera a partir do custo medido por frame e da
+capacidade de inferência, reduzindo o FPS de câmeras de baixa prioridade
+antes de recusar
+"""
+import os
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AdmissionConfig:
+    enabled: bool = False
+    target_utilization: float = 0.85
+    max_cameras: int = 0
+    degraded_fps: float = 5.0
+    overflow: str = "reject"
+    cpu_limit: float = 0.9
+    initial_frame_ms: float = 50.0
+
+class AdmissionDecision(str, Enum):
+    ACCEPT = "accept"
+    DEGRADE = "degrade"
+    QUEUE = "queue"
+    REJECT = "reject"
+
+OVERFLOW_MODES = ("reject", "queue", "nack")
+
+@dataclass
+class AdmissionResult:
+    decision: AdmissionDecision
+    fps_cap: float = 0.0
+    degrade: List[str] = field(default_factory=list)
+    reason: str = ""
+
+    @property
+    def admitted(self) -> bool:
+        return self.decision in (AdmissionDecision.ACCEPT, AdmissionDecision.DEGRADE)
+
+class AdmissionRejected(Exception):
+    """ADMISSION_OVERFLOW=nack: o consumer devolve o evento à fila para outro nó"""
+
+def _cpu_load() -> float:
+    """Load average de 1 min por núcleo (0 onde não existe)"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+class AdmissionController:
+    """
+    Demanda = soma do FPS planejado de cada câmera; capacidade = workers de
+    inferência / custo médio de um frame (EWMA do tempo de inferência medido
+    pelo backend, ou pelo handler no detector simples). Uma câmera entra se a demanda projetada cabe em
+    target_utilization da capacidade; se não couber, câmeras de prioridade
+    "low" passam a degraded_fps (a nova também, se for "low"). Sem espaço
+    mesmo assim, a câmera vai para a fila ou é recusada conforme overflow.
+    Todos os agregados são mantidos incrementalmente: stats() é O(1).
+    """
+
+    def __init__(self, config: AdmissionConfig, workers: int, target_fps: float,
+                 cpu_load: Callable[[], float] = _cpu_load):
+        if config.overflow not in OVERFLOW_MODES:
+            raise ValueError(f"ADMISSION_OVERFLOW inválido: {config.overflow}")
+        self.config = config
+        self.workers = max(1, workers)
+        self.target_fps = target_fps
+        self.cpu_load = cpu_load
+        self.frame_cost_s = config.initial_frame_ms / 1000
+        self._planned: Dict[str, float] = {}
+        self._priority: Dict[str, str] = {}
+        self._demand = 0.0
+        self._degraded = 0
+        self._refused = 0
+        self.pending: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Custo de um frame; chamado por frame sem lock (uma escrita de float)"""
+        self.frame_cost_s += 0.05 * (seconds - self.frame_cost_s)
+
+    @property
+    def capacity_fps(self) -> float:
+        return self.workers / max(self.frame_cost_s, 1e-4)
+
+    def _budget(self) -> float:
+        return self.capacity_fps * self.config.target_utilization
+
+    def admit(self, camera_id: str, priority: str = "normal") -> AdmissionResult:
+        """
+        fps_cap: FPS máximo da nova câmera (0 = sem limite); degrade: câmeras
+        em execução que passam a degraded_fps. Com o controle desligado só
+        contabiliza a demanda e aceita.
+        """
+        with self._lock:
+            self._release(camera_id)
+            if not self.config.enabled:
+                return self._accept(camera_id, priority, self.target_fps)
+
+            if self.config.max_cameras and len(self._planned) >= self.config.max_cameras:
+                return self._overflow(camera_id, "limite de câmeras atingido")
+            if self.cpu_load() > self.config.cpu_limit:
+                return self._overflow(camera_id, "CPU saturada")
+
+            budget = self._budget()
+            if self._demand + self.target_fps <= budget:
+                return self._accept(camera_id, priority, self.target_fps)
+
+            need = min(self.config.degraded_fps, self.target_fps) if priority == "low" else self.target_fps
+            saving = self.target_fps - self.config.degraded_fps
+            degrade: List[str] = []
+            demand = self._demand
+            for other, fps in self._planned.items():
+                if demand + need <= budget:
+                    break
+                if self._priority[other] == "low" and fps > self.config.degraded_fps:
+                    degrade.append(other)
+                    demand -= saving
+            if demand + need > budget:
+                return self._overflow(camera_id, "sem capacidade de inferência")
+
+            for other in degrade:
+                self._set_fps(other, self.config.degraded_fps)
+            result = self._accept(camera_id, priority, need)
+            result.decision = AdmissionDecision.DEGRADE
+            result.degrade = degrade
+            return result
+
+    def _accept(self, camera_id: str, priority: str, fps: float) -> AdmissionResult:
+        self.pending.pop(camera_id, None)
+        self._plan(camera_id, priority, fps)
+        return AdmissionResult(AdmissionDecision.ACCEPT, fps if fps < self.target_fps else 0.0)
+
+    def _overflow(self, camera_id: str, reason: str) -> AdmissionResult:
+        # Uma câmera que já está na fila não conta (nem loga) de novo a cada tentativa
+        if camera_id not in self.pending:
+            self._refused += 1
+            logger.warning(f"Admissão negada para {camera_id}: {reason}")
+        decision = AdmissionDecision.QUEUE if self.config.overflow == "queue" else AdmissionDecision.REJECT
+        return AdmissionResult(decision, reason=reason)
+
+    def enqueue(self, data: dict):
+        """Guarda o evento da câmera até liberar capacidade; mantém a posição se já estava na fila"""
+        with self._lock:
+            self.pending[data['camera_id']] = data
+
+    def next_pending(self) -> Optional[dict]:
+        with self._lock:
+            return next(iter(self.pending.values()), None)
+
+    def retain_pending(self, camera_ids: set):
+        """camera.sync: descarta da fila as câmeras fora do snapshot"""
+        with self._lock:
+            for camera_id in [c for c in self.pending if c not in camera_ids]:
+                del self.pending[camera_id]
+
+    def _plan(self, camera_id: str, priority: str, fps: float):
+        self._planned[camera_id] = fps
+        self._priority[camera_id] = priority
+        self._demand += fps
+        if fps < self.target_fps:
+            self._degraded += 1
+
+    def _set_fps(self, camera_id: str, fps: float):
+        previous = self._planned[camera_id]
+        self._planned[camera_id] = fps
+        self._demand += fps - previous
+        self._degraded += (fps < self.target_fps) - (previous < self.target_fps)
+
+    def _release(self, camera_id: str):
+        fps = self._planned.pop(camera_id, None)
+        if fps is None:
+            return
+        self._priority.pop(camera_id)
+        self._demand -= fps
+        if fps < self.target_fps:
+            self._degraded -= 1
+
+    def release(self, camera_id: str) -> List[str]:
+        """Libera a câmera; retorna as câmeras degradadas que voltam ao FPS normal"""
+        with self._lock:
+            self._release(camera_id)
+            self.pending.pop(camera_id, None)
+            restored = []
+            budget = self._budget()
+            for other, fps in self._planned.items():
+                if fps < self.target_fps and self._demand + self.target_fps - fps <= budget:
+                    restored.append(other)
+            for other in restored:
+                self._set_fps(other, self.target_fps)
+            return restored
+
+    def stats(self) -> dict:
+        with self._lock:
+            budget = self._budget()
+            return {
+                "enabled": self.config.enabled,
+                "cameras": len(self._planned),
+                "degraded": self._degraded,
+                "pending": len(self.pending),
+                "refused": self._refused,
+                "frame_ms": round(self.frame_cost_s * 1000, 2),
+                "workers": self.workers,
+                "demand_fps": round(self._demand, 1),
+                "capacity_fps": round(self.capacity_fps, 1),
+                "utilization": round(self._demand / self.capacity_fps, 3),
+                "cpu_load": round(self.cpu_load(), 3),
+                "headroom_cameras": max(0, int((budget - self._demand) // self.target_fps)) if self.target_fps else 0,
+                "accepting": self._demand + self.target_fps <= budget
+                             and (not self.config.max_cameras or len(self._planned) < self.config.max_cameras)
+            }
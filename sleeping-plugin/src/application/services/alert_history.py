@@ -0,0 +1,276 @@
+"""
+Alert History
+Histórico de alertas em rings por câmera (memória) com persistência opcional
+em SQLite, consultável por câmera e intervalo de tempo
+"""
+import heapq
+import queue
+import sqlite3
+import threading
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("camera_id", "timestamp", "alert_type", "priority", "message", "ear")
+
+@dataclass
+class AlertHistoryConfig:
+    per_camera: int = 1000
+    db_path: str = ""
+    max_limit: int = 1000
+    write_batch: int = 200
+
+class AlertRing:
+    """
+    Últimos `capacity` alertas de uma câmera, em ordem de timestamp.
+    Busca binária sobre os índices lógicos do ring: O(log n) sem copiar.
+    complete: o ring tem todos os alertas da câmera (nada descartado nem
+    anterior a ele só no SQLite).
+    """
+
+    def __init__(self, capacity: int, complete: bool = True):
+        self.capacity = capacity
+        self.complete = complete
+        self._items: List[Optional[dict]] = [None] * capacity
+        self._start = 0
+        self.size = 0
+
+    def append(self, alert: dict):
+        end = (self._start + self.size) % self.capacity
+        self._items[end] = alert
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+            self.complete = False
+
+    def __getitem__(self, index: int) -> dict:
+        return self._items[(self._start + index) % self.capacity]
+
+    @property
+    def full(self) -> bool:
+        return self.size == self.capacity
+
+    @property
+    def oldest(self) -> Optional[float]:
+        return self[0]["timestamp"] if self.size else None
+
+    def bisect(self, timestamp: float) -> int:
+        """Primeiro índice com timestamp >= timestamp"""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle]["timestamp"] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def range(self, since: Optional[float], until: Optional[float], limit: int) -> List[dict]:
+        """Com since: os primeiros `limit` a partir dele; sem since: os `limit` mais recentes"""
+        start = self.bisect(since) if since is not None else 0
+        end = self.bisect(until) if until is not None else self.size
+        if since is None:
+            start = max(start, end - limit)
+        return [self[i] for i in range(start, min(end, start + limit))]
+
+class SqliteAlertStore:
+    """
+    Tabela indexada por (camera_id, timestamp) e por timestamp: as consultas
+    por intervalo descem a B-tree em vez de varrer. Escritas vão por uma fila
+    para uma thread própria, em lotes; threads de câmera nunca esperam o disco.
+    """
+
+    def __init__(self, path: str, write_batch: int = 200):
+        self.path = path
+        self.write_batch = write_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._read_lock = threading.Lock()
+
+        self._reader = self._connect()
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY,
+                camera_id TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                alert_type TEXT,
+                priority TEXT,
+                message TEXT,
+                ear REAL
+            );
+            CREATE INDEX IF NOT EXISTS alerts_camera_time ON alerts (camera_id, timestamp);
+            CREATE INDEX IF NOT EXISTS alerts_time ON alerts (timestamp);
+        """)
+
+        self._writer = threading.Thread(target=self._run, name="alert-history", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def append(self, alert: dict):
+        self._queue.put(alert)
+
+    def _run(self):
+        connection = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while item is not None and len(batch) < self.write_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            alerts = [alert for alert in batch if alert is not None]
+            if alerts:
+                try:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO alerts (camera_id, timestamp, alert_type, priority, message, ear) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            [tuple(alert.get(name) for name in FIELDS) for alert in alerts]
+                        )
+                except sqlite3.Error as e:
+                    logger.error(f"Falha ao gravar {len(alerts)} alertas no histórico: {e}")
+            if len(alerts) < len(batch):
+                break
+        connection.close()
+
+    def newest_by_camera(self) -> Dict[str, float]:
+        """Timestamp do alerta mais recente de cada câmera (varre só o índice)"""
+        with self._read_lock:
+            rows = self._reader.execute("SELECT camera_id, MAX(timestamp) FROM alerts GROUP BY camera_id").fetchall()
+        return dict(rows)
+
+    def query(self, camera_id: Optional[str], since: Optional[float],
+              until: Optional[float], limit: int) -> List[dict]:
+        clauses, params = [], []
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(camera_id)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Sem since, os mais recentes: busca de trás para frente e reordena
+        order = "ASC" if since is not None else "DESC"
+        sql = f"SELECT {', '.join(FIELDS)} FROM alerts {where} ORDER BY timestamp {order} LIMIT ?"
+
+        with self._read_lock:
+            rows = self._reader.execute(sql, params + [limit]).fetchall()
+        alerts = [dict(zip(FIELDS, row)) for row in rows]
+        return alerts if since is not None else alerts[::-1]
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        self._reader.close()
+
+class AlertHistory:
+    """
+    Rings só para as câmeras ativas: release_camera descarta o ring de uma
+    câmera removida. Com SQLite, câmeras sem ring (removidas ou de execuções
+    anteriores) ficam em _stored_only com o timestamp do alerta mais recente,
+    para as consultas saberem quando a memória não basta.
+    """
+
+    def __init__(self, config: AlertHistoryConfig, store: Optional[SqliteAlertStore] = None):
+        self.config = config
+        self.store = store
+        self._rings: Dict[str, AlertRing] = {}
+        self._stored_only: Dict[str, float] = store.newest_by_camera() if store else {}
+        self._lock = threading.Lock()
+        self._recorded = 0
+        self._in_memory = 0
+
+    def record(self, alert: dict):
+        """alert: campos de FIELDS; timestamp em segundos epoch"""
+        with self._lock:
+            ring = self._rings.get(alert["camera_id"])
+            if ring is None:
+                # Câmera com alertas antigos no SQLite: o ring novo não tem o histórico todo
+                complete = self._stored_only.pop(alert["camera_id"], None) is None
+                ring = self._rings[alert["camera_id"]] = AlertRing(self.config.per_camera, complete)
+            if not ring.full:
+                self._in_memory += 1
+            ring.append(alert)
+            self._recorded += 1
+        if self.store:
+            self.store.append(alert)
+
+    def query(self, camera_id: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: int = 100) -> List[dict]:
+        limit = max(1, min(limit, self.config.max_limit))
+        with self._lock:
+            if camera_id is not None:
+                ring = self._rings.get(camera_id)
+                # O ring responde sozinho se cobre todo o intervalo pedido
+                if self.store is None or (ring is not None and self._covers(ring, since, until, limit)):
+                    return ring.range(since, until, limit) if ring else []
+            elif self.store is None or all(self._covers(r, since, until, limit) for r in self._rings.values()):
+                alerts = self._merge(list(self._rings.values()), since, until, limit)
+                if self.store is None or self._excludes_stored_only(alerts, since, limit):
+                    return alerts
+        return self.store.query(camera_id, since, until, limit)
+
+    @staticmethod
+    def _covers(ring: AlertRing, since: Optional[float], until: Optional[float], limit: int) -> bool:
+        if ring.complete:
+            return True
+        if since is not None:
+            return since >= ring.oldest
+        # Só os mais recentes: basta o ring ter `limit` alertas antes de until
+        return (ring.bisect(until) if until is not None else ring.size) >= limit
+
+    def _excludes_stored_only(self, alerts: List[dict], since: Optional[float], limit: int) -> bool:
+        """Nenhuma câmera sem ring pode ter alerta no resultado da memória?"""
+        if not self._stored_only:
+            return True
+        newest = max(self._stored_only.values())
+        if since is not None:
+            return newest < since
+        # Só os mais recentes: a memória já tem `limit` alertas mais novos que todos os delas
+        return len(alerts) >= limit and alerts[0]["timestamp"] > newest
+
+    @staticmethod
+    def _merge(rings: List[AlertRing], since: Optional[float], until: Optional[float], limit: int) -> List[dict]:
+        """Junta os resultados (já ordenados) de cada ring; cada um contribui no máximo `limit`"""
+        parts = [ring.range(since, until, limit) for ring in rings]
+        if since is not None:
+            return list(islice(heapq.merge(*parts, key=lambda a: a["timestamp"]), limit))
+        newest = heapq.merge(*(reversed(part) for part in parts), key=lambda a: -a["timestamp"])
+        return list(islice(newest, limit))[::-1]
+
+    def release_camera(self, camera_id: str):
+        """Câmera removida: libera o ring; com SQLite o histórico dela segue consultável"""
+        with self._lock:
+            ring = self._rings.pop(camera_id, None)
+            if ring is None:
+                return
+            self._in_memory -= ring.size
+            if self.store and ring.size:
+                self._stored_only[camera_id] = ring[ring.size - 1]["timestamp"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cameras": len(self._rings),
+                "recorded": self._recorded,
+                "in_memory": self._in_memory,
+                "persistent": self.store is not None
+            }
+
+    def close(self):
+        if self.store:
+            self.store.close()
@@ -0,0 +1,219 @@
+"""
+Cluster Membership
+Instâncias do plugin se anunciam por heartbeats no exchange de tópicos e
+dividem as câmeras por hash consistente
+"""
+import threading
+import time
+import uuid
+import itertools
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set, Tuple
+from ...domain.services.hash_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = "cluster.heartbeat"
+LEAVE = "cluster.leave"
+CATALOG = "cluster.catalog"
+
+@dataclass
+class ClusterConfig:
+    enabled: bool = False
+    node_id: str = ""
+    heartbeat_s: float = 2.0
+    dead_after_s: float = 6.0
+    vnodes: int = 64
+    queue_expires_s: float = 300.0
+
+def cluster_message(event_type: str, data: dict) -> dict:
+    return {"event_type": event_type, "timestamp": datetime.now(timezone.utc).isoformat(), "data": data}
+
+class ClusterMembership:
+    """
+    Membros vivos = este nó + pares com heartbeat nos últimos dead_after_s.
+    O anel é reconstruído a cada mudança e on_change é chamado para o handler
+    reequilibrar. Até completar dead_after_s desde o start o nó não assume
+    nenhuma câmera (ainda não ouviu todos os pares); ao ficar pronto dispara
+    on_change uma vez. O heartbeat leva esse estado (ready) e só pares prontos
+    entram no anel: os nós antigos mantêm as câmeras até o novo poder assumi-las.
+    Mensagens levam boot_id, seq e o relógio monotônico do remetente, e nunca
+    o relógio de parede: seq descarta duplicatas e reordenações, boot_id
+    separa reinícios (mensagens de um boot substituído, ex.: reenviadas do
+    spool, são ignoradas) e o atraso de cada heartbeat é medido contra o
+    mais rápido já entregue pelo mesmo boot, no relógio monotônico local.
+    """
+
+    def __init__(self, config: ClusterConfig, publisher, clock: Callable[[], float] = time.monotonic):
+        self.config = config
+        self.node_id = config.node_id
+        self.publisher = publisher
+        self.clock = clock
+        self.on_change: Optional[Callable[[], None]] = None
+        self.ready = False
+        self.ring = HashRing([self.node_id], config.vnodes)
+        self._peers: Dict[str, float] = {}
+        self._ready_peers: Set[str] = set()
+        self.boot_id = uuid.uuid4().hex
+        self._seq = itertools.count()
+        # node_id -> (boot_id, último seq, menor diferença entre relógios local e do remetente)
+        self._boots: Dict[str, Tuple[str, int, float]] = {}
+        self._retired: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._started_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, on_change: Optional[Callable[[], None]] = None):
+        self.on_change = on_change
+        self._started_at = self.clock()
+        self._thread = threading.Thread(target=self._run, name="cluster", daemon=True)
+        self._thread.start()
+        logger.info(f"Cluster: nó {self.node_id}, heartbeat a cada {self.config.heartbeat_s}s")
+
+    def owns(self, camera_id: str) -> bool:
+        return self.ready and self.ring.owner(camera_id) == self.node_id
+
+    def owner(self, camera_id: str) -> Optional[str]:
+        return self.ring.owner(camera_id)
+
+    def is_leader(self) -> bool:
+        """Menor node_id vivo: responde pelo catálogo quando alguém entra"""
+        return self.ring.nodes[0] == self.node_id
+
+    def handle_heartbeat(self, message: dict):
+        """Handler: cluster.heartbeat"""
+        data = message.get('data', {})
+        node_id = data.get('node_id')
+        if not node_id or node_id == self.node_id:
+            return
+
+        with self._lock:
+            # Heartbeat repetido ou atrasado (ex.: reenviado do spool) não prova que o par está vivo
+            if not self._fresh(node_id, data):
+                return
+            joined = node_id not in self._peers
+            self._peers[node_id] = self.clock()
+            # Pares sem o campo (versão anterior) são tratados como prontos
+            ready = bool(data.get('ready', True))
+            changed = ready != (node_id in self._ready_peers)
+            if changed:
+                if ready:
+                    self._ready_peers.add(node_id)
+                else:
+                    self._ready_peers.discard(node_id)
+                self._rebuild()
+        if joined:
+            logger.info(f"Cluster: nó {node_id} entrou")
+        if changed:
+            logger.info(f"Cluster: nó {node_id} {'pronto' if ready else 'aguardando pares'}")
+        # Na entrada o líder já reenvia o catálogo, antes de o novo nó ficar pronto
+        if joined or changed:
+            self._notify()
+
+    def handle_leave(self, message: dict):
+        """Handler: cluster.leave"""
+        data = message.get('data', {})
+        node_id = data.get('node_id')
+        with self._lock:
+            # Só o boot atual pode sair: um leave antigo não derruba o nó reiniciado
+            known = self._boots.get(node_id)
+            if known is None or known[0] != data.get('boot_id'):
+                return
+            self._retired.add((node_id, known[0]))
+            del self._boots[node_id]
+            left = self._peers.pop(node_id, None) is not None
+            self._ready_peers.discard(node_id)
+            if left:
+                self._rebuild()
+        if left:
+            logger.info(f"Cluster: nó {node_id} saiu")
+            self._notify()
+
+    def tick(self):
+        """Expira pares mudos, marca o nó como pronto e envia o heartbeat"""
+        now = self.clock()
+
+        with self._lock:
+            dead = [node for node, seen in self._peers.items() if now - seen > self.config.dead_after_s]
+            for node in dead:
+                del self._peers[node]
+                self._ready_peers.discard(node)
+            if dead:
+                self._rebuild()
+            became_ready = not self.ready and now - self._started_at >= self.config.dead_after_s
+            if became_ready:
+                self.ready = True
+
+        self._publish(HEARTBEAT, {"ready": self.ready})
+
+        for node in dead:
+            logger.warning(f"Cluster: nó {node} sem heartbeat há mais de {self.config.dead_after_s}s")
+        if became_ready:
+            logger.info(f"Cluster pronto: {len(self.ring.nodes)} nós")
+        if dead or became_ready:
+            self._notify()
+
+    def _fresh(self, node_id: str, data: dict) -> bool:
+        """Atualiza o estado do remetente e diz se a mensagem é nova e em dia"""
+        boot_id, seq, sent = data.get('boot_id'), data.get('seq'), data.get('sent_mono')
+        if boot_id is None or seq is None or sent is None or (node_id, boot_id) in self._retired:
+            return False
+
+        offset = self.clock() - sent
+        known = self._boots.get(node_id)
+        if known is None or known[0] != boot_id:
+            if known is not None:
+                self._retired.add((node_id, known[0]))
+            self._boots[node_id] = (boot_id, seq, offset)
+            return True
+
+        _, last_seq, best = known
+        if seq <= last_seq:
+            return False
+        self._boots[node_id] = (boot_id, seq, min(best, offset))
+        # offset - best = quanto esta mensagem demorou a mais que a entrega mais rápida
+        return offset - best <= self.config.dead_after_s
+
+    def _rebuild(self):
+        self.ring = HashRing([self.node_id, *self._ready_peers], self.config.vnodes)
+
+    def _notify(self):
+        if self.ready and self.on_change:
+            try:
+                self.on_change()
+            except Exception as e:
+                logger.error(f"Erro ao reequilibrar câmeras: {e}")
+
+    def _publish(self, event_type: str, data: Optional[dict] = None):
+        payload = {"node_id": self.node_id, "boot_id": self.boot_id,
+                   "seq": next(self._seq), "sent_mono": self.clock()}
+        payload.update(data or {})
+        try:
+            self.publisher.publish(event_type, cluster_message(event_type, payload))
+        except Exception as e:
+            logger.error(f"Falha ao publicar {event_type}: {e}")
+
+    def publish_catalog(self, cameras: list):
+        self._publish(CATALOG, {"cameras": cameras})
+
+    def _run(self):
+        self.tick()
+        while not self._stop_event.wait(self.config.heartbeat_s):
+            self.tick()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "node_id": self.node_id,
+                "ready": self.ready,
+                "nodes": list(self.ring.nodes)
+            }
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._publish(LEAVE)
@@ -0,0 +1,145 @@
+"""
+Live Feed Hub
+Difusão em processo de EAR e alertas para os clientes SSE da API
+"""
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+@dataclass
+class FeedConfig:
+    ring_size: int = 4096
+    ear_interval_ms: float = 200.0
+    keepalive_s: float = 15.0
+    max_subscribers: int = 100
+
+class FeedSubscriber:
+    def __init__(self, cursor: int, camera_id: Optional[str]):
+        self.cursor = cursor
+        self.camera_id = camera_id
+        self.dropped = 0
+
+class LiveFeedHub:
+    """
+    Um único ring compartilhado, com um cursor por assinante: publish() formata
+    a mensagem SSE uma vez e custa O(1) qualquer que seja o número de clientes.
+    Um cliente que fica mais de ring_size mensagens atrás perde as mais
+    antigas (contadas em dropped) e nunca bloqueia as threads de câmera.
+    O loop da API é acordado no máximo uma vez por rodada, não por mensagem.
+    """
+
+    def __init__(self, config: FeedConfig):
+        self.config = config
+        self._ring: List[Tuple[Optional[str], str]] = [(None, "")] * max(1, config.ring_size)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._subscribers: List[FeedSubscriber] = []
+        self._last_ear: Dict[str, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._wake_pending = False
+        self._dropped = 0
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, event: str, data: dict, camera_id: Optional[str] = None):
+        """Chamado de qualquer thread; sem assinantes não serializa nada"""
+        if not self._subscribers:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+        with self._lock:
+            self._ring[self._seq % len(self._ring)] = (camera_id, message)
+            self._seq += 1
+            wake = not self._wake_pending and self._loop is not None
+            if wake:
+                self._wake_pending = True
+        if wake:
+            try:
+                self._loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                # Loop da API encerrado
+                self._wake_pending = False
+
+    def publish_ear(self, camera_id: str, ear: Optional[float], closed: bool, now: Optional[float] = None):
+        """Amostra de EAR limitada a uma a cada ear_interval_ms por câmera"""
+        if not self._subscribers:
+            return
+        now = time.monotonic() if now is None else now
+        last = self._last_ear.get(camera_id)
+        if last is not None and (now - last) * 1000 < self.config.ear_interval_ms:
+            return
+        self._last_ear[camera_id] = now
+        self.publish("ear", {
+            "camera_id": camera_id,
+            "ear": round(ear, 4) if ear is not None else None,
+            "closed": closed
+        }, camera_id)
+
+    def release_camera(self, camera_id: str):
+        self._last_ear.pop(camera_id, None)
+
+    def _wake(self):
+        with self._lock:
+            self._wake_pending = False
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def subscribe(self, camera_id: Optional[str] = None) -> Optional[FeedSubscriber]:
+        """Chamado no loop da API; None quando o limite de assinantes foi atingido"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+        with self._lock:
+            if len(self._subscribers) >= self.config.max_subscribers:
+                return None
+            subscriber = FeedSubscriber(self._seq, camera_id)
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: FeedSubscriber):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def _read(self, subscriber: FeedSubscriber) -> List[str]:
+        with self._lock:
+            seq = self._seq
+            oldest = max(0, seq - len(self._ring))
+            if subscriber.cursor < oldest:
+                skipped = oldest - subscriber.cursor
+                subscriber.dropped += skipped
+                self._dropped += skipped
+                subscriber.cursor = oldest
+            items = [self._ring[i % len(self._ring)] for i in range(subscriber.cursor, seq)]
+            subscriber.cursor = seq
+        camera_id = subscriber.camera_id
+        return [message for source, message in items if camera_id is None or source in (None, camera_id)]
+
+    async def next(self, subscriber: FeedSubscriber, timeout: float) -> List[str]:
+        """Mensagens novas do assinante; lista vazia se nada chegou em timeout segundos"""
+        deadline = self._loop.time() + timeout
+        while True:
+            changed = self._changed
+            messages = self._read(subscriber)
+            if messages:
+                return messages
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return []
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self._seq,
+                "dropped": self._dropped,
+                "ring_size": len(self._ring)
+            }
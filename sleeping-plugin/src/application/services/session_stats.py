@@ -0,0 +1,28 @@
+"""
+Session Stats
+Agregados das sessões mantidos incrementalmente para /health e /metrics
+"""
+import threading
+from typing import Dict
+
+class SessionStats:
+    """
+    Contagens atualizadas por quem muda o estado (handler, sessões, threads de
+    inferência) sob um único lock; snapshot() é O(1) e nunca percorre as sessões.
+    total/active/fatigued/calibrating são gauges; alerts (episódios de
+    sonolência), fatigue_alerts e dropped_frames só crescem.
+    """
+    FIELDS = ("total", "active", "alerts", "fatigue_alerts", "fatigued", "calibrating", "dropped_frames")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **deltas: int):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counts[name] += delta
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
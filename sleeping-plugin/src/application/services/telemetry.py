@@ -0,0 +1,124 @@
+"""
+Telemetry Aggregator
+Séries de EAR por câmera agregadas em janelas fixas e publicadas em lote
+"""
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+from ...domain.events.domain_events import TelemetryEvent
+from ...domain.services.ear_window import EarWindow
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TelemetryConfig:
+    enabled: bool = False
+    window_ms: float = 1000.0
+    publish_interval_s: float = 10.0
+    ring_size: int = 10000
+    max_batch: int = 500
+    max_gap_ms: float = 1000.0
+
+class TelemetryAggregator:
+    """
+    record() roda na thread de inferência de cada câmera e só atualiza a
+    janela aberta. Janelas fechadas vão para um ring buffer (descarta as mais
+    antigas se o publisher não acompanhar), drenado por uma thread que publica
+    até max_batch janelas por mensagem a cada publish_interval_s.
+    """
+
+    def __init__(self, publisher, config: TelemetryConfig):
+        self.publisher = publisher
+        self.config = config
+        self.window_s = config.window_ms / 1000
+        self._open: Dict[str, EarWindow] = {}
+        self._ring: Deque[dict] = deque(maxlen=max(1, config.ring_size))
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._windows = 0
+        self._dropped = 0
+        self._published = 0
+        self._messages = 0
+
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def record(self, camera_id: str, ear: Optional[float], closed: bool, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            window = self._open.get(camera_id)
+            if window is None or now - window.started_at >= self.window_s:
+                if window is not None:
+                    self._close(window)
+                window = self._open[camera_id] = EarWindow(
+                camera_id, now, time.time(),
+                last_at=window.last_at if window is not None else None,
+                max_gap_s=self.config.max_gap_ms / 1000
+            )
+            window.add(now, ear, closed)
+
+    def _close(self, window: EarWindow):
+        if len(self._ring) == self._ring.maxlen:
+            self._dropped += 1
+        self._ring.append(window.summary(self.config.window_ms))
+        self._windows += 1
+
+    def release_camera(self, camera_id: str):
+        with self._lock:
+            window = self._open.pop(camera_id, None)
+            if window is not None and window.frames:
+                self._close(window)
+
+    def _expire(self, now: float):
+        """Fecha janelas vencidas de câmeras que pararam de mandar frames"""
+        for camera_id, window in list(self._open.items()):
+            if now - window.started_at >= self.window_s:
+                del self._open[camera_id]
+                self._close(window)
+
+    def _drain(self) -> List[dict]:
+        with self._lock:
+            self._expire(time.monotonic())
+            windows = list(self._ring)
+            self._ring.clear()
+        return windows
+
+    def flush(self):
+        windows = self._drain()
+        for start in range(0, len(windows), self.config.max_batch):
+            batch = windows[start:start + self.config.max_batch]
+            try:
+                self.publisher.publish("drowsiness.telemetry", TelemetryEvent(batch).to_dict())
+            except Exception as e:
+                logger.error(f"Falha ao publicar telemetria: {e}")
+                continue
+            self._published += len(batch)
+            self._messages += 1
+
+    def _run(self):
+        while not self._stop_event.wait(self.config.publish_interval_s):
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open_windows": len(self._open),
+                "buffered": len(self._ring),
+                "windows": self._windows,
+                "dropped": self._dropped,
+                "published": self._published,
+                "messages": self._messages
+            }
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+        with self._lock:
+            for window in self._open.values():
+                if window.frames:
+                    self._close(window)
+            self._open.clear()
+        self.flush()
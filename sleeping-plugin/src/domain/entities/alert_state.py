@@ -0,0 +1,79 @@
+"""
+Domain Entity: AlertStateMachine
+Ciclo de alerta por sessão: idle -> closing -> alerting -> cooldown
+"""
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+class AlertState(str, Enum):
+    IDLE = "idle"
+    CLOSING = "closing"
+    ALERTING = "alerting"
+    COOLDOWN = "cooldown"
+
+class AlertAction(str, Enum):
+    ALERT = "alert"
+    UPDATE = "update"
+
+@dataclass
+class AlertPolicy:
+    min_closed_ms: float = 660.0
+    cooldown_ms: float = 5000.0
+    update_interval_ms: float = 0.0
+
+@dataclass
+class AlertStateMachine:
+    """
+    Um episódio começa quando o fechamento atinge min_closed_ms (ALERT, uma vez)
+    e só termina após cooldown_ms de olhos abertos. Novos fechamentos dentro do
+    cooldown voltam ao mesmo episódio. Com update_interval_ms > 0, o episódio
+    em curso emite UPDATE no máximo a cada intervalo.
+    """
+    state: AlertState = AlertState.IDLE
+    last_emit: float = 0.0
+    cooldown_until: float = 0.0
+    episodes: int = 0
+
+    def update(self, closed: bool, closed_ms: float, now: float, policy: AlertPolicy) -> Optional[AlertAction]:
+        """
+        closed: olhos fechados neste frame; closed_ms: fechamento contínuo atual,
+        que é 0 no primeiro frame fechado (por isso o estado vem de closed, não
+        de closed_ms > 0); now em segundos monotônicos
+        """
+        if closed:
+            return self._closed(closed_ms, now, policy)
+        self._open(now, policy)
+        return None
+
+    def _closed(self, closed_ms: float, now: float, policy: AlertPolicy) -> Optional[AlertAction]:
+        if self.state == AlertState.COOLDOWN and now - closed_ms / 1000 >= self.cooldown_until:
+            # O fechamento começou com o cooldown já cumprido: o episódio anterior acabou
+            self.state = AlertState.IDLE
+        if self.state in (AlertState.IDLE, AlertState.CLOSING):
+            if closed_ms < policy.min_closed_ms:
+                self.state = AlertState.CLOSING
+                return None
+            self.state = AlertState.ALERTING
+            self.last_emit = now
+            self.episodes += 1
+            return AlertAction.ALERT
+
+        if self.state == AlertState.COOLDOWN:
+            if closed_ms < policy.min_closed_ms:
+                return None
+            self.state = AlertState.ALERTING
+
+        if policy.update_interval_ms > 0 and (now - self.last_emit) * 1000 >= policy.update_interval_ms:
+            self.last_emit = now
+            return AlertAction.UPDATE
+        return None
+
+    def _open(self, now: float, policy: AlertPolicy):
+        if self.state == AlertState.CLOSING:
+            self.state = AlertState.IDLE
+        elif self.state == AlertState.ALERTING:
+            self.state = AlertState.COOLDOWN
+            self.cooldown_until = now + policy.cooldown_ms / 1000
+        elif self.state == AlertState.COOLDOWN and now >= self.cooldown_until:
+            self.state = AlertState.IDLE
@@ -2,9 +2,12 @@
 Domain Entity: DetectionSession
 Representa uma sessão de detecção de sonolência para uma câmera
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
+from .alert_state import AlertStateMachine
+from ..services.fatigue import FatigueEngine
+from ..services.calibration import EarCalibrator
 
 @dataclass
 class DetectionSession:
@@ -14,8 +17,17 @@ class DetectionSession:
     last_ear: float = 0.0
     frame_counter: int = 0
     total_alerts: int = 0
+    fatigue_alerts: int = 0
     is_active: bool = True
     last_alert_at: Optional[datetime] = None
+    closed_since: Optional[float] = None
+    closed_ms: float = 0.0
+    alert: AlertStateMachine = field(default_factory=AlertStateMachine)
+    fatigue: FatigueEngine = field(default_factory=FatigueEngine)
+    ear_threshold: Optional[float] = None
+    calibrator: Optional[EarCalibrator] = None
+    # Agregados do plugin (SessionStats); None em sessões avulsas
+    stats: Optional[object] = field(default=None, repr=False, compare=False)
     
     def update_ear(self, ear_value: float):
         """Atualiza valor do EAR"""
@@ -29,11 +41,56 @@ class DetectionSession:
         """Reseta contador de frames"""
         self.frame_counter = 0
     
+    def mark_closed(self, timestamp: float) -> float:
+        """Registra frame com olhos fechados (timestamp monotônico em segundos)
+        Returns: tempo contínuo de olhos fechados em ms"""
+        if self.closed_since is None:
+            self.closed_since = timestamp
+        self.frame_counter += 1
+        self.closed_ms = max(0.0, (timestamp - self.closed_since) * 1000)
+        return self.closed_ms
+    
+    def mark_open(self):
+        """Olhos abertos: encerra o fechamento atual"""
+        self.closed_since = None
+        self.closed_ms = 0.0
+        self.frame_counter = 0
+    
+    def is_closed(self, ear_value: float, default_threshold: float) -> bool:
+        """Olhos fechados pelo limiar calibrado da câmera, ou o global enquanto não houver"""
+        threshold = self.ear_threshold if self.ear_threshold is not None else default_threshold
+        return ear_value < threshold
+    
+    def start_calibration(self, calibrator: EarCalibrator):
+        """Descarta o limiar atual e passa a calibrar"""
+        if self.calibrator is None and self.stats:
+            self.stats.add(calibrating=1)
+        self.calibrator = calibrator
+        self.ear_threshold = None
+    
+    def set_threshold(self, threshold: float):
+        """Limiar calibrado (ou carregado) da câmera; encerra a calibração"""
+        if self.calibrator is not None and self.stats:
+            self.stats.add(calibrating=-1)
+        self.calibrator = None
+        self.ear_threshold = threshold
+    
     def trigger_alert(self):
-        """Registra um alerta"""
+        """Registra um episódio de sonolência (um por ciclo do AlertStateMachine)"""
         self.total_alerts += 1
         self.last_alert_at = datetime.now()
+        if self.stats:
+            self.stats.add(alerts=1)
+    
+    def trigger_fatigue_alert(self):
+        """Registra um alerta de fadiga; não conta como episódio de sonolência"""
+        self.fatigue_alerts += 1
+        self.last_alert_at = datetime.now()
+        if self.stats:
+            self.stats.add(fatigue_alerts=1)
     
     def stop(self):
         """Para a sessão"""
+        if self.is_active and self.stats:
+            self.stats.add(active=-1)
         self.is_active = False
@@ -2,20 +2,28 @@
 Domain Events
 Eventos publicados pelo plugin
 """
-from dataclasses import dataclass, asdict
-from datetime import datetime
+from dataclasses import dataclass, fields
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Tuple
+
+@lru_cache(maxsize=None)
+def _field_names(event_class: type) -> Tuple[str, ...]:
+    """Campos de cada classe de evento, resolvidos uma única vez"""
+    return tuple(f.name for f in fields(event_class))
 
 @dataclass
 class DomainEvent:
-    """Base para eventos de domínio"""
+    """Base para eventos de domínio; timestamp ISO 8601 em UTC, com fuso"""
     event_type: str
     timestamp: str
     source: str = "vigileye-plugin"
     
     def to_dict(self):
-        return asdict(self)
+        # Campos são escalares: dispensa a cópia recursiva do asdict
+        return {name: getattr(self, name) for name in _field_names(type(self))}
 
-@dataclass
+@dataclass(init=False)
 class DrowsinessDetectedEvent(DomainEvent):
     """Evento: Sonolência detectada"""
     camera_id: str
@@ -26,14 +34,14 @@ class DrowsinessDetectedEvent(DomainEvent):
     def __init__(self, camera_id: str, ear_value: float, severity: str, duration_ms: int):
         super().__init__(
             event_type="drowsiness.detected",
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now(timezone.utc).isoformat()
         )
         self.camera_id = camera_id
         self.ear_value = ear_value
         self.severity = severity
         self.duration_ms = duration_ms
 
-@dataclass
+@dataclass(init=False)
 class AlertTriggeredEvent(DomainEvent):
     """Evento: Alerta crítico disparado"""
     camera_id: str
@@ -44,9 +52,37 @@ class AlertTriggeredEvent(DomainEvent):
     def __init__(self, camera_id: str, alert_type: str, priority: str, message: str):
         super().__init__(
             event_type="alert.triggered",
-            timestamp=datetime.now().isoformat()
+            timestamp=datetime.now(timezone.utc).isoformat()
         )
         self.camera_id = camera_id
         self.alert_type = alert_type
         self.priority = priority
         self.message = message
+
+@dataclass(init=False)
+class TelemetryEvent(DomainEvent):
+    """Evento: Lote de janelas agregadas de EAR"""
+    windows: list
+    
+    def __init__(self, windows: list):
+        super().__init__(
+            event_type="drowsiness.telemetry",
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        self.windows = windows
+
+@dataclass(init=False)
+class CameraRejectedEvent(DomainEvent):
+    """Evento: Câmera recusada por falta de capacidade (o hub pode alocá-la em outro nó)"""
+    camera_id: str
+    reason: str
+    load: dict
+    
+    def __init__(self, camera_id: str, reason: str, load: dict):
+        super().__init__(
+            event_type="camera.rejected",
+            timestamp=datetime.now(timezone.utc).isoformat()
+        )
+        self.camera_id = camera_id
+        self.reason = reason
+        self.load = load
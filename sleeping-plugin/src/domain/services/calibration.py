@@ -0,0 +1,116 @@
+"""
+Domain Service: EAR Calibration
+Linha de base de EAR por câmera aprendida online com estimadores de quantil
+P² (memória constante: 5 marcadores por quantil)
+"""
+from bisect import insort
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class CalibrationConfig:
+    enabled: bool = False
+    duration_s: float = 30.0
+    min_samples: int = 100
+    ratio: float = 0.75
+    min_threshold: float = 0.12
+    max_threshold: float = 0.30
+    store_path: str = "baselines.json"
+
+class P2Quantile:
+    """
+    Estimador P² de Jain & Chlamtac: mantém 5 marcadores cujas alturas
+    convergem para o quantil p sem guardar as amostras
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self.heights:
+            return None
+        if self.count < 5:
+            return self.heights[round(self.p * (len(self.heights) - 1))]
+        return self.heights[2]
+
+@dataclass
+class EarCalibrator:
+    """
+    Aprende a linha de base da câmera nos primeiros duration_s segundos com rosto.
+    O limiar é ratio * mediana do EAR (olhos abertos dominam a amostra; piscadas
+    afetam só a cauda baixa), limitado a [min_threshold, max_threshold].
+    """
+    started_at: Optional[float] = None
+    p10: P2Quantile = field(default_factory=lambda: P2Quantile(0.10))
+    p50: P2Quantile = field(default_factory=lambda: P2Quantile(0.50))
+    p90: P2Quantile = field(default_factory=lambda: P2Quantile(0.90))
+
+    @property
+    def samples(self) -> int:
+        return self.p50.count
+
+    def add(self, now: float, ear: float, config: CalibrationConfig) -> bool:
+        """Registra um EAR; retorna True quando a calibração terminou"""
+        if self.started_at is None:
+            self.started_at = now
+        self.p10.add(ear)
+        self.p50.add(ear)
+        self.p90.add(ear)
+        return now - self.started_at >= config.duration_s and self.samples >= config.min_samples
+
+    def baseline(self, config: CalibrationConfig) -> dict:
+        threshold = min(max(self.p50.value * config.ratio, config.min_threshold), config.max_threshold)
+        return {
+            "ear_p10": round(self.p10.value, 4),
+            "ear_p50": round(self.p50.value, 4),
+            "ear_p90": round(self.p90.value, 4),
+            "samples": self.samples,
+            "threshold": round(threshold, 4)
+        }
@@ -0,0 +1,56 @@
+"""
+Domain Service: Camera Sync
+Diferença entre as câmeras em execução e o snapshot completo enviado pelo hub
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+@dataclass
+class SyncConfig:
+    burst: int = 8
+    interval_ms: float = 250.0
+
+@dataclass
+class CameraSyncPlan:
+    to_start: List[dict] = field(default_factory=list)
+    to_stop: List[str] = field(default_factory=list)
+    to_restart: List[dict] = field(default_factory=list)
+    unchanged: int = 0
+    invalid: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.to_start or self.to_stop or self.to_restart)
+
+def diff_cameras(running: Dict[str, str], desired: List[dict]) -> CameraSyncPlan:
+    """
+    running: camera_id -> rtsp_url das câmeras ativas
+    desired: entradas {camera_id, rtsp_url, ...} do snapshot
+    Câmeras fora do snapshot param; URL diferente reinicia; igual não mexe.
+    """
+    plan = CameraSyncPlan()
+    seen = set()
+
+    for camera in desired:
+        camera_id = camera.get('camera_id')
+        rtsp_url = camera.get('rtsp_url')
+        if not camera_id or not rtsp_url or camera_id in seen:
+            plan.invalid += 1
+            continue
+        seen.add(camera_id)
+
+        current_url = running.get(camera_id)
+        if current_url is None:
+            plan.to_start.append(camera)
+        elif current_url != rtsp_url:
+            plan.to_restart.append(camera)
+        else:
+            plan.unchanged += 1
+
+    plan.to_stop = [camera_id for camera_id in running if camera_id not in seen]
+    return plan
+
+def stagger_delays(count: int, burst: int, interval_s: float) -> List[float]:
+    """Atraso de conexão de cada câmera: lotes de `burst` a cada `interval_s`"""
+    burst = max(1, burst)
+    return [(i // burst) * interval_s for i in range(count)]
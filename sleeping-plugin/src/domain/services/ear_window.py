@@ -0,0 +1,58 @@
+"""
+Domain Service: EAR Window
+Agregado de EAR de uma câmera em uma janela fixa de tempo
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class EarWindow:
+    """
+    Acumula em O(1) por frame; frames sem rosto contam só para face_ratio.
+    PERCLOS = fração do tempo com rosto em que os olhos estavam fechados: cada
+    frame pesa o intervalo desde o anterior (até max_gap_s), então uma taxa de
+    frames que varia (boost, idle, frames descartados) não distorce a fração.
+    last_at vem da janela anterior da câmera; sem ela, o primeiro frame pesa 0.
+    """
+    camera_id: str
+    started_at: float
+    started_wall: float
+    last_at: Optional[float] = None
+    max_gap_s: float = 1.0
+    frames: int = 0
+    face_frames: int = 0
+    face_s: float = 0.0
+    closed_s: float = 0.0
+    ear_sum: float = 0.0
+    ear_min: float = float("inf")
+    ear_max: float = float("-inf")
+
+    def add(self, now: float, ear: Optional[float], closed: bool):
+        self.frames += 1
+        dt = min(max(0.0, now - self.last_at), self.max_gap_s) if self.last_at is not None else 0.0
+        self.last_at = now
+        if ear is None:
+            return
+        self.face_frames += 1
+        self.face_s += dt
+        self.ear_sum += ear
+        if ear < self.ear_min:
+            self.ear_min = ear
+        if ear > self.ear_max:
+            self.ear_max = ear
+        if closed:
+            self.closed_s += dt
+
+    def summary(self, window_ms: float) -> dict:
+        faces = self.face_frames
+        return {
+            "camera_id": self.camera_id,
+            "start": round(self.started_wall, 3),
+            "window_ms": window_ms,
+            "frames": self.frames,
+            "face_ratio": round(faces / self.frames, 3) if self.frames else 0.0,
+            "ear_min": round(self.ear_min, 4) if faces else None,
+            "ear_mean": round(self.ear_sum / faces, 4) if faces else None,
+            "ear_max": round(self.ear_max, 4) if faces else None,
+            "perclos": round(self.closed_s / self.face_s, 3) if self.face_s > 0 else None
+        }
@@ -0,0 +1,172 @@
+"""
+Domain Service: Fatigue Engine
+PERCLOS, piscadas e bocejos em janelas deslizantes de tempo, com custo O(1)
+por frame (buckets circulares com somas acumuladas, sem varrer a janela)
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+@dataclass
+class FatigueConfig:
+    perclos_window_s: float = 60.0
+    perclos_threshold: float = 0.15
+    blink_window_s: float = 60.0
+    blink_min_ms: float = 50.0
+    blink_max_ms: float = 400.0
+    yawn_mar_threshold: float = 0.6
+    yawn_min_ms: float = 1500.0
+    yawn_window_s: float = 300.0
+    yawn_limit: int = 3
+    buckets: int = 60
+    max_gap_ms: float = 1000.0
+
+class RollingSum:
+    """
+    Soma de valores nos últimos window_s segundos, em `buckets` fatias fixas.
+    add() zera só as fatias que saíram da janela desde a última chamada
+    (no máximo `buckets`), então o custo não cresce com a taxa de frames.
+    """
+
+    def __init__(self, window_s: float, buckets: int):
+        self.bucket_s = window_s / buckets
+        self.values: List[float] = [0.0] * buckets
+        self.total = 0.0
+        self.head: Optional[int] = None
+
+    def advance(self, now: float):
+        index = int(now // self.bucket_s)
+        if self.head is None:
+            self.head = index
+            return
+        if index <= self.head:
+            return
+
+        size = len(self.values)
+        if index - self.head >= size:
+            self.values = [0.0] * size
+            self.total = 0.0
+        else:
+            for slot in range(self.head + 1, index + 1):
+                slot %= size
+                self.total -= self.values[slot]
+                self.values[slot] = 0.0
+        self.head = index
+
+    def add(self, now: float, value: float = 1.0):
+        self.advance(now)
+        self.values[self.head % len(self.values)] += value
+        self.total += value
+
+@dataclass
+class FatigueEngine:
+    """
+    Acompanha a sessão frame a frame:
+    - PERCLOS: fração do tempo com rosto em que os olhos estavam fechados; cada
+      frame pesa o intervalo desde o anterior (até max_gap_ms), então boost,
+      idle e frames descartados não mudam o peso de olhos abertos ou fechados
+    - piscadas: fechamentos entre blink_min_ms e blink_max_ms (mais longos são
+      microssonos e ficam com o AlertStateMachine)
+    - bocejos: MAR acima de yawn_mar_threshold por pelo menos yawn_min_ms
+    update() retorna o motivo ("perclos" ou "yawning") na transição para
+    fadiga; a fadiga só é liberada com PERCLOS abaixo de 80% do limite.
+    """
+    started_at: Optional[float] = None
+    last_at: Optional[float] = None
+    closed_since: Optional[float] = None
+    mouth_open_since: Optional[float] = None
+    yawn_counted: bool = False
+    fatigued: bool = False
+    blinks_total: int = 0
+    yawns_total: int = 0
+    _faces: Optional[RollingSum] = field(default=None, repr=False)
+    _closed: Optional[RollingSum] = field(default=None, repr=False)
+    _blinks: Optional[RollingSum] = field(default=None, repr=False)
+    _blink_ms: Optional[RollingSum] = field(default=None, repr=False)
+    _yawns: Optional[RollingSum] = field(default=None, repr=False)
+
+    def _start(self, now: float, config: FatigueConfig):
+        self.started_at = now
+        self._faces = RollingSum(config.perclos_window_s, config.buckets)
+        self._closed = RollingSum(config.perclos_window_s, config.buckets)
+        self._blinks = RollingSum(config.blink_window_s, config.buckets)
+        self._blink_ms = RollingSum(config.blink_window_s, config.buckets)
+        self._yawns = RollingSum(config.yawn_window_s, config.buckets)
+
+    def update(self, now: float, closed: bool, mar: Optional[float],
+               config: FatigueConfig) -> Optional[str]:
+        """now em segundos monotônicos; mar None quando o backend não mede a boca"""
+        if self.started_at is None:
+            self._start(now, config)
+
+        dt = min(max(0.0, now - self.last_at), config.max_gap_ms / 1000) if self.last_at is not None else 0.0
+        self.last_at = now
+        self._faces.add(now, dt)
+        if closed:
+            self._closed.add(now, dt)
+            if self.closed_since is None:
+                self.closed_since = now
+        elif self.closed_since is not None:
+            duration_ms = (now - self.closed_since) * 1000
+            self.closed_since = None
+            if config.blink_min_ms <= duration_ms <= config.blink_max_ms:
+                self.blinks_total += 1
+                self._blinks.add(now)
+                self._blink_ms.add(now, duration_ms)
+
+        if mar is not None:
+            self._track_mouth(now, mar, config)
+
+        return self._evaluate(now, config)
+
+    def _track_mouth(self, now: float, mar: float, config: FatigueConfig):
+        if mar < config.yawn_mar_threshold:
+            self.mouth_open_since = None
+            self.yawn_counted = False
+            return
+        if self.mouth_open_since is None:
+            self.mouth_open_since = now
+        if not self.yawn_counted and (now - self.mouth_open_since) * 1000 >= config.yawn_min_ms:
+            self.yawn_counted = True
+            self.yawns_total += 1
+            self._yawns.add(now)
+
+    def _evaluate(self, now: float, config: FatigueConfig) -> Optional[str]:
+        # PERCLOS só vale com a janela cheia; antes disso poucos frames distorcem a fração
+        warmed = now - self.started_at >= config.perclos_window_s
+        perclos = self.perclos(now) if warmed else 0.0
+        yawning = config.yawn_limit > 0 and self._yawns.total >= config.yawn_limit
+
+        if self.fatigued:
+            if perclos < config.perclos_threshold * 0.8 and not yawning:
+                self.fatigued = False
+            return None
+
+        if config.perclos_threshold > 0 and perclos >= config.perclos_threshold:
+            self.fatigued = True
+            return "perclos"
+        if yawning:
+            self.fatigued = True
+            return "yawning"
+        return None
+
+    def perclos(self, now: float) -> float:
+        self._faces.advance(now)
+        self._closed.advance(now)
+        faces = self._faces.total
+        return self._closed.total / faces if faces > 0 else 0.0
+
+    def snapshot(self, now: float, config: FatigueConfig) -> dict:
+        if self.started_at is None:
+            return {"perclos": 0.0, "blinks_per_min": 0.0, "blink_ms": 0.0, "yawns": 0, "fatigued": False}
+        self._blinks.advance(now)
+        self._blink_ms.advance(now)
+        self._yawns.advance(now)
+        span_s = min(now - self.started_at, config.blink_window_s)
+        blinks = self._blinks.total
+        return {
+            "perclos": round(self.perclos(now), 3),
+            "blinks_per_min": round(blinks * 60 / span_s, 1) if span_s > 0 else 0.0,
+            "blink_ms": round(self._blink_ms.total / blinks, 1) if blinks else 0.0,
+            "yawns": int(self._yawns.total),
+            "fatigued": self.fatigued
+        }
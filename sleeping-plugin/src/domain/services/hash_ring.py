@@ -0,0 +1,34 @@
+"""
+Domain Service: Hash Ring
+Hash consistente de camera_id entre instâncias do plugin
+"""
+import hashlib
+from bisect import bisect
+from typing import Iterable, List, Optional
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """
+    Cada nó ocupa `vnodes` pontos do anel; a câmera pertence ao primeiro ponto
+    no sentido horário. Quando um nó entra ou sai, só as câmeras dos seus
+    pontos mudam de dono (~1/N do total). Todos os nós calculam o mesmo anel a
+    partir da mesma lista de membros, sem coordenação.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        self.vnodes = vnodes
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes for i in range(vnodes)
+        )
+        self._hashes: List[int] = [h for h, _ in points]
+        self._owners: List[str] = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        index = bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
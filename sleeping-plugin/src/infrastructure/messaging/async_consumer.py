@@ -0,0 +1,191 @@
+"""
+Async Event Consumer - RabbitMQ
+Consome eventos do VMS Hub com aio-pika: prefetch configurável e handlers
+concorrentes, serializados apenas por câmera
+"""
+import asyncio
+import logging
+import struct
+import aio_pika
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Set
+from .consumer import RabbitMQConfig
+from .serializers import decode_body
+
+logger = logging.getLogger(__name__)
+
+class AsyncEventConsumer:
+    """
+    Os handlers continuam síncronos e rodam em um pool de threads, então um
+    StreamProcessor.stop() lento não trava o loop nem os eventos de outras
+    câmeras. Eventos da mesma câmera são aplicados na ordem de entrega
+    (added antes de removed) por um lock por camera_id. Eventos sem camera_id
+    (camera.sync) são exclusivos: esperam os eventos de câmera entregues antes
+    deles, e os entregues depois esperam o sync terminar.
+    """
+
+    def __init__(self, config: RabbitMQConfig):
+        self.config = config
+        self.handlers: Dict[str, Callable] = {}
+        self.connection = None
+        self.channel = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, config.max_concurrency), thread_name_prefix="event-handler"
+        )
+        self._camera_locks: Dict[str, asyncio.Lock] = {}
+        self._lock_users: Dict[str, int] = {}
+        self._inflight: Set[asyncio.Future] = set()
+        self._barrier: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    def register_handler(self, event_type: str, handler: Callable):
+        self.handlers[event_type] = handler
+        logger.info(f"Handler: {event_type}")
+
+    def connect(self):
+        """Cria o event loop e conecta (mesma interface do EventConsumer)"""
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        self._loop.run_until_complete(self._connect())
+
+    async def _connect(self):
+        self.connection = await aio_pika.connect_robust(
+            host=self.config.host,
+            port=self.config.port,
+            login=self.config.username,
+            password=self.config.password,
+            heartbeat=600
+        )
+        self.channel = await self.connection.channel()
+        await self.channel.set_qos(prefetch_count=self.config.prefetch_count)
+
+        exchange = await self.channel.declare_exchange(
+            self.config.exchange, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        queue = await self.channel.declare_queue(
+            self.config.queue, durable=True, arguments=self.config.queue_arguments or None
+        )
+        for routing_key in self.config.routing_keys:
+            await queue.bind(exchange, routing_key=routing_key)
+
+        await queue.consume(self._on_message)
+        logger.info(
+            f"Conectado: {self.config.host}:{self.config.port} "
+            f"(prefetch={self.config.prefetch_count}, concorrência={self.config.max_concurrency})"
+        )
+
+    async def _on_message(self, message):
+        try:
+            payload = decode_body(message.body, message.content_type)
+        except (UnicodeDecodeError, ValueError, KeyError, struct.error) as e:
+            logger.error(f"Mensagem inválida descartada: {e}")
+            await message.reject(requeue=False)
+            return
+
+        event_type = payload.get('event_type')
+        handler = self.handlers.get(event_type)
+        if not handler:
+            logger.warning(f"Sem handler: {event_type}")
+            await message.ack()
+            return
+
+        camera_id = (payload.get('data') or {}).get('camera_id')
+        logger.info(f"Evento: {event_type} ({camera_id})")
+
+        try:
+            async with _SyncOrder(self, exclusive=camera_id is None), self._camera_lock(camera_id):
+                await asyncio.get_running_loop().run_in_executor(self._executor, handler, payload)
+        except Exception as e:
+            logger.error(f"Erro: {e}")
+            # Fora do lock da câmera: só este evento espera antes de voltar à fila
+            if self.config.requeue_delay_s > 0:
+                await asyncio.sleep(self.config.requeue_delay_s)
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+
+    def _camera_lock(self, camera_id: Optional[str]) -> "_CameraLock":
+        return _CameraLock(self, camera_id)
+
+    def start_consuming(self):
+        """Bloqueia a thread atual até stop()"""
+        logger.info("Consumindo eventos...")
+        self._loop.run_until_complete(self._stop.wait())
+        self._shutdown()
+
+    def stop(self):
+        """Pode ser chamado de outra thread ou após o loop ser interrompido (Ctrl+C)"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._stop.set)
+        else:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self.connection:
+            self._loop.run_until_complete(self.connection.close())
+        self._executor.shutdown(wait=True)
+        self._loop.close()
+        logger.info("Consumer parado")
+
+class _SyncOrder:
+    """
+    Ordena camera.sync contra os eventos por câmera. A vez é tomada no
+    construtor, antes de qualquer await do _on_message, então segue a ordem
+    de entrega: o sync espera os eventos de câmera em andamento e o sync
+    anterior; eventos de câmera esperam só o último sync
+    """
+
+    def __init__(self, consumer: AsyncEventConsumer, exclusive: bool):
+        self.consumer = consumer
+        self.exclusive = exclusive
+        self.done = asyncio.get_running_loop().create_future()
+        self.waits = [consumer._barrier] if consumer._barrier is not None else []
+        if exclusive:
+            self.waits.extend(consumer._inflight)
+            consumer._barrier = self.done
+        else:
+            consumer._inflight.add(self.done)
+
+    async def __aenter__(self):
+        try:
+            await asyncio.gather(*self.waits)
+        except BaseException:
+            # Cancelado na espera: libera a vez para quem veio depois
+            await self.__aexit__(None, None, None)
+            raise
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if not self.done.done():
+            self.done.set_result(None)
+        self.consumer._inflight.discard(self.done)
+        if self.consumer._barrier is self.done:
+            self.consumer._barrier = None
+
+class _CameraLock:
+    """asyncio.Lock por câmera, removido do dicionário quando ninguém mais o usa"""
+
+    def __init__(self, consumer: AsyncEventConsumer, camera_id: Optional[str]):
+        self.consumer = consumer
+        self.camera_id = camera_id
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        if self.camera_id is None:
+            return
+        locks, users = self.consumer._camera_locks, self.consumer._lock_users
+        self.lock = locks.setdefault(self.camera_id, asyncio.Lock())
+        users[self.camera_id] = users.get(self.camera_id, 0) + 1
+        await self.lock.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.lock is None:
+            return
+        self.lock.release()
+        locks, users = self.consumer._camera_locks, self.consumer._lock_users
+        users[self.camera_id] -= 1
+        if not users[self.camera_id]:
+            del users[self.camera_id]
+            del locks[self.camera_id]
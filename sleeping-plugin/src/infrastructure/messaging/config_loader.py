@@ -18,5 +18,7 @@ def load_rabbitmq_config() -> RabbitMQConfig:
         password=os.getenv("RABBITMQ_PASS"),
         exchange=os.getenv("RABBITMQ_EXCHANGE"),
         queue=os.getenv("RABBITMQ_QUEUE"),
-        routing_keys=routing_keys
+        routing_keys=routing_keys,
+        prefetch_count=int(os.getenv("CONSUMER_PREFETCH", "64")),
+        max_concurrency=int(os.getenv("CONSUMER_CONCURRENCY", "32"))
     )
@@ -3,11 +3,12 @@ Event Consumer - RabbitMQ
 Consome eventos do VMS Hub
 """
 import pika
-import json
+import time
 import logging
 from typing import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
+from .serializers import decode_body
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,13 @@ class RabbitMQConfig:
     exchange: str
     queue: str
     routing_keys: list[str]
+    prefetch_count: int = 1
+    max_concurrency: int = 1
+    # Argumentos extras da fila (ex.: x-expires para a fila de cada nó do cluster)
+    queue_arguments: dict = field(default_factory=dict)
+    # Espera antes de devolver um evento que falhou: o broker reentrega na hora,
+    # em geral ao mesmo consumidor, e sem pausa a falha vira um laço ocupado
+    requeue_delay_s: float = 0.0
 
 class EventConsumer:
     def __init__(self, config: RabbitMQConfig):
@@ -47,7 +55,8 @@ class EventConsumer:
             durable=True
         )
         
-        self.channel.queue_declare(queue=self.config.queue, durable=True)
+        self.channel.queue_declare(queue=self.config.queue, durable=True,
+                                   arguments=self.config.queue_arguments or None)
         
         for routing_key in self.config.routing_keys:
             self.channel.queue_bind(
@@ -64,7 +73,7 @@ class EventConsumer:
     
     def _on_message(self, channel, method, properties, body):
         try:
-            message = json.loads(body.decode('utf-8'))
+            message = decode_body(body, properties.content_type)
             event_type = message.get('event_type')
             
             logger.info(f"Evento: {event_type}")
@@ -79,10 +88,12 @@ class EventConsumer:
         
         except Exception as e:
             logger.error(f"Erro: {e}")
+            if self.config.requeue_delay_s > 0:
+                time.sleep(self.config.requeue_delay_s)
             channel.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
     
     def start_consuming(self):
-        self.channel.basic_qos(prefetch_count=1)
+        self.channel.basic_qos(prefetch_count=self.config.prefetch_count)
         self.channel.basic_consume(
             queue=self.config.queue,
             on_message_callback=self._on_message,
@@ -1,14 +1,31 @@
 """
 Event Publisher - RabbitMQ
-Publica eventos para o VMS Hub
+Publica eventos para o VMS Hub a partir de uma thread de I/O dedicada:
+publish() só enfileira, e nenhuma thread de câmera toca na conexão pika
 """
 import pika
 import json
+import queue
+import struct
+import threading
+import time
 import logging
 from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from .spool import EventSpool
+from .serializers import JSON, create_serializer, to_payload
+from ..monitoring.metrics import STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Falhas de transporte: o evento não foi entregue e a conexão deve ser refeita
+CONNECTION_ERRORS = (pika.exceptions.AMQPConnectionError, pika.exceptions.AMQPChannelError, OSError)
+
+# Nunca descartados com a fila cheia (na falta do que descartar, passam do limite)
+PROTECTED_KEYS = frozenset(("alert.triggered", "camera.rejected"))
+# Primeiros a sair com a fila cheia; depois, o mais antigo entre os demais não protegidos
+EXPENDABLE_KEYS = frozenset(("drowsiness.telemetry", "drowsiness.detected"))
+
 @dataclass
 class PublisherConfig:
     host: str
@@ -16,49 +33,455 @@ class PublisherConfig:
     username: str
     password: str
     exchange: str
+    queue_size: int = 1000
+    batch_size: int = 50
+    confirms: bool = True
+    confirm_timeout: float = 10.0
+    connect_timeout: float = 10.0
+    close_timeout: float = 5.0
+    heartbeat: int = 30
+    reconnect_initial: float = 1.0
+    reconnect_max: float = 30.0
+    spool_dir: str = "spool"
+    spool_segment_bytes: int = 4 * 1024 * 1024
+    spool_fsync: bool = True
+    replay_batch: int = 500
+    serializer: str = "json"
+
+class ConfirmTracker:
+    """
+    Publisher confirms em pipeline sobre a BlockingConnection. O confirm_delivery
+    do BlockingChannel faz cada basic_publish esperar o próprio ack (um round
+    trip por mensagem); aqui o Confirm.Select vai pelo canal subjacente com
+    callback, o lote inteiro é publicado e os acks são coletados depois
+    """
+
+    def __init__(self, connection, channel):
+        self.connection = connection
+        self._next_tag = 1
+        self._outstanding = set()
+        self._results = {}
+        channel._impl.confirm_delivery(ack_nack_callback=self._on_confirm)
+
+    def published(self) -> int:
+        """Registra um basic_publish; devolve o delivery tag dele no canal"""
+        tag = self._next_tag
+        self._next_tag += 1
+        self._outstanding.add(tag)
+        return tag
+
+    def _on_confirm(self, method_frame):
+        method = method_frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = [tag for tag in self._outstanding if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+        for tag in tags:
+            self._outstanding.discard(tag)
+            self._results[tag] = acked
+        if not self._outstanding:
+            # Acorda o process_data_events em andamento: callbacks do canal
+            # subjacente não contam como evento para a BlockingConnection
+            self.connection.call_later(0, lambda: None)
+
+    def wait(self, tags: List[int], timeout: float) -> List[bool]:
+        """Processa frames até todos os tags terem ack/nack; True = ack"""
+        deadline = time.monotonic() + timeout
+        while self._outstanding.intersection(tags):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise pika.exceptions.AMQPChannelError(f"confirms não recebidos em {timeout:.1f}s")
+            self.connection.process_data_events(time_limit=remaining)
+        return [self._results.pop(tag) for tag in tags]
+
+    def settled(self, tags: List[int]) -> List[bool]:
+        """Resultados do prefixo já confirmado de tags (após falha de conexão)"""
+        results = []
+        for tag in tags:
+            if tag not in self._results:
+                break
+            results.append(self._results.pop(tag))
+        return results
 
 class EventPublisher:
-    def __init__(self, config: PublisherConfig):
+    """
+    Fila limitada drenada por uma única thread, dona da BlockingConnection.
+    A thread publica em lotes de até batch_size mensagens por despertar e,
+    com confirms, cada mensagem só conta como entregue após o ack do broker;
+    o lote inteiro é publicado antes de esperar os acks.
+    Fila cheia descarta em vez de bloquear o chamador: primeiro a telemetria
+    e os drowsiness.detected mais antigos, nunca alertas nem o sentinela de
+    parada.
+
+    Sem broker, os eventos vão para o spool em disco e a conexão é refeita
+    com backoff exponencial. Enquanto houver spool pendente, eventos novos
+    também entram nele, de modo que o replay preserva a ordem de publicação.
+    """
+
+    def __init__(self, config: PublisherConfig, connection_factory: Callable = pika.BlockingConnection):
         self.config = config
+        self.connection_factory = connection_factory
         self.connection = None
         self.channel = None
-    
+        self.confirms: Optional[ConfirmTracker] = None
+        self.spool: Optional[EventSpool] = None
+        self.serializer = create_serializer(config.serializer)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, config.queue_size))
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._backoff = config.reconnect_initial
+        self._next_attempt = 0.0
+
+        self._enqueued = 0
+        self._published = 0
+        self._nacked = 0
+        self._failed = 0
+        self._dropped = 0
+        self._batches = 0
+        self._batch_messages = 0
+        self._max_depth = 0
+        self._latency_total = 0.0
+        self._publish_seconds = STAGE_SECONDS.labels("publish", "")
+        self._live_published = 0
+        self._connections = 0
+        self._spooled = 0
+        self._replayed = 0
+
+    @property
+    def connected(self) -> bool:
+        return self.channel is not None
+
     def connect(self):
+        """
+        Inicia a thread de I/O e aguarda a primeira conexão por até connect_timeout.
+        Com o broker fora, segue em modo spool e continua tentando em segundo plano.
+        """
+        self.spool = EventSpool(
+            self.config.spool_dir, self.config.spool_segment_bytes, self.config.spool_fsync
+        )
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="publisher-io", daemon=True)
+        self._thread.start()
+
+        self._ready.wait(self.config.connect_timeout)
+        if self.connected:
+            logger.info(f"Publisher conectado: {self.config.host}")
+        else:
+            logger.warning(f"Broker indisponível ({self.config.host}); eventos vão para o spool")
+
+    def _open(self):
         credentials = pika.PlainCredentials(self.config.username, self.config.password)
         parameters = pika.ConnectionParameters(
             host=self.config.host,
             port=self.config.port,
-            credentials=credentials
+            credentials=credentials,
+            heartbeat=self.config.heartbeat,
+            blocked_connection_timeout=self.config.connect_timeout
         )
-        
-        self.connection = pika.BlockingConnection(parameters)
-        self.channel = self.connection.channel()
-        
-        self.channel.exchange_declare(
+
+        self.connection = self.connection_factory(parameters)
+        channel = self.connection.channel()
+
+        channel.exchange_declare(
             exchange=self.config.exchange,
             exchange_type='topic',
             durable=True
         )
-        
-        logger.info(f"Publisher conectado: {self.config.host}")
-    
+        self.confirms = ConfirmTracker(self.connection, channel) if self.config.confirms else None
+        self.channel = channel
+
+    def _try_connect(self):
+        if time.monotonic() < self._next_attempt:
+            return
+        try:
+            self._open()
+        except Exception as e:
+            self._disconnect(f"Falha ao conectar ao broker: {e}")
+            return
+
+        if self._ready.is_set():
+            logger.info(f"Publisher reconectado: {self.config.host}")
+        self._backoff = self.config.reconnect_initial
+        with self._lock:
+            self._connections += 1
+
+    def _disconnect(self, reason: str):
+        logger.error(f"{reason}; nova tentativa em {self._backoff:.1f}s")
+        connection, self.connection, self.channel = self.connection, None, None
+        self.confirms = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        self._next_attempt = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.config.reconnect_max)
+
     def publish(self, routing_key: str, event: dict):
-        if not self.channel:
+        """Enfileira o evento; nunca bloqueia a thread da câmera"""
+        if not self._running:
             raise RuntimeError("Publisher não conectado")
-        
-        self.channel.basic_publish(
-            exchange=self.config.exchange,
-            routing_key=routing_key,
-            body=json.dumps(event),
-            properties=pika.BasicProperties(
-                delivery_mode=2,
-                content_type='application/json'
+
+        dropped = not self._offer((routing_key, event, time.monotonic()))
+        depth = self._queue.qsize()
+        with self._lock:
+            self._enqueued += 1
+            self._max_depth = max(self._max_depth, depth)
+            if dropped:
+                self._dropped += 1
+
+    def _offer(self, item: Optional[Tuple[str, dict, float]]) -> bool:
+        """
+        Enfileira sem bloquear. Com a fila cheia remove o evento descartável mais
+        antigo; se só houver protegidos, um item protegido entra mesmo assim e um
+        descartável é ele próprio descartado (retorna False)
+        """
+        protected = item is None or item[0] in PROTECTED_KEYS
+        pending = self._queue
+        with pending.mutex:
+            if pending.maxsize > 0 and len(pending.queue) >= pending.maxsize:
+                victim = self._victim(pending.queue)
+                if victim is not None:
+                    del pending.queue[victim]
+                    with self._lock:
+                        self._dropped += 1
+                elif not protected:
+                    return False
+            pending.queue.append(item)
+            pending.unfinished_tasks += 1
+            pending.not_empty.notify()
+        return True
+
+    @staticmethod
+    def _victim(items) -> Optional[int]:
+        fallback = None
+        for index, item in enumerate(items):
+            if item is None or item[0] in PROTECTED_KEYS:
+                continue
+            if item[0] in EXPENDABLE_KEYS:
+                return index
+            if fallback is None:
+                fallback = index
+        return fallback
+
+    def _collect(self, timeout: float) -> Optional[List[Tuple[str, dict, float]]]:
+        try:
+            item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return []
+        if item is None:
+            return None
+
+        batch = [item]
+        while len(batch) < self.config.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _wait_time(self) -> float:
+        if not self.connected:
+            return min(0.5, max(0.0, self._next_attempt - time.monotonic()))
+        if self.spool.pending:
+            return 0.0
+        return 0.5
+
+    def _run(self):
+        self._try_connect()
+        self._ready.set()
+
+        while True:
+            if not self.connected:
+                self._try_connect()
+
+            batch = self._collect(self._wait_time())
+            if batch is None:
+                break
+            if batch:
+                self._handle_batch(batch)
+
+            if self.connected and self.spool.pending:
+                self._replay()
+            elif self.connected and not batch:
+                # Fila ociosa: mantém heartbeats e frames do broker em dia
+                self._service_connection()
+
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar conexão do publisher: {e}")
+        self.spool.close()
+
+    def _service_connection(self):
+        try:
+            self.connection.process_data_events(time_limit=0)
+        except Exception as e:
+            self._disconnect(f"Conexão do publisher perdida: {e}")
+
+    def _handle_batch(self, batch: List[Tuple[str, dict, float]]):
+        messages = []
+        failed = 0
+        for routing_key, event, enqueued_at in batch:
+            try:
+                payload = to_payload(event)
+                body, content_type = self.serializer.encode(payload)
+                messages.append((routing_key, payload, body, content_type, enqueued_at))
+            except (TypeError, ValueError, KeyError, struct.error) as e:
+                failed += 1
+                logger.error(f"Evento não serializável {routing_key}: {e}")
+
+        published = nacked = 0
+        latency = 0.0
+        index = 0
+        if self.connected and not self.spool.pending:
+            outcomes = self._send_batch(
+                [(routing_key, body, content_type) for routing_key, _, body, content_type, _ in messages],
+                "Conexão do publisher perdida"
             )
-        )
-        
-        logger.info(f"Evento publicado: {routing_key}")
-    
+            for (_, _, _, _, enqueued_at), delivered in zip(messages, outcomes):
+                if delivered:
+                    published += 1
+                    elapsed = time.monotonic() - enqueued_at
+                    latency += elapsed
+                    self._publish_seconds.observe(elapsed)
+                else:
+                    nacked += 1
+            index = len(outcomes)
+
+        # O spool guarda JSON: o formato de envio é aplicado de novo no replay
+        for routing_key, payload, body, content_type, _ in messages[index:]:
+            self.spool.append(routing_key, body.decode("utf-8") if content_type == JSON else json.dumps(payload))
+
+        with self._lock:
+            self._batches += 1
+            self._batch_messages += len(batch)
+            self._published += published
+            self._live_published += published
+            self._nacked += nacked
+            self._failed += failed
+            self._latency_total += latency
+            self._spooled += len(messages) - index
+
+    def _send_batch(self, messages: List[Tuple[str, bytes, str]], context: str) -> List[bool]:
+        """
+        Publica o lote e só então espera os confirms: um round trip por lote.
+        Devolve ack (True) ou nack (False) do prefixo resolvido; se a conexão
+        cair, o restante fica sem resultado e a conexão é desfeita
+        """
+        confirms = self.confirms
+        tags = []
+        try:
+            for routing_key, body, content_type in messages:
+                self.channel.basic_publish(
+                    exchange=self.config.exchange,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,
+                        content_type=content_type
+                    )
+                )
+                logger.debug(f"Evento publicado: {routing_key}")
+                if confirms is not None:
+                    tags.append(confirms.published())
+            outcomes = confirms.wait(tags, self.config.confirm_timeout) if confirms else [True] * len(messages)
+        except CONNECTION_ERRORS as e:
+            outcomes = confirms.settled(tags) if confirms else [True] * len(tags)
+            self._disconnect(f"{context}: {e}")
+
+        for (routing_key, _, _), delivered in zip(messages, outcomes):
+            if not delivered:
+                logger.warning(f"Evento recusado pelo broker: {routing_key}")
+        return outcomes
+
+    def _replay(self):
+        """Reenvia um lote do spool em pipeline, em ordem, confirmando o cursor só até o último entregue"""
+        records = self.spool.read(self.config.replay_batch)
+        messages = []
+        encoded = []
+        for routing_key, text, _ in records:
+            try:
+                if self.serializer.content_type == JSON:
+                    body, content_type = text.encode("utf-8"), JSON
+                else:
+                    body, content_type = self.serializer.encode(json.loads(text))
+            except (TypeError, ValueError, KeyError, struct.error) as e:
+                logger.error(f"Registro inválido no spool descartado ({routing_key}): {e}")
+                encoded.append(False)
+                continue
+            messages.append((routing_key, body, content_type))
+            encoded.append(True)
+
+        outcomes = self._send_batch(messages, "Conexão perdida no replay do spool")
+        delivered = sum(outcomes)
+        nacked = len(outcomes) - delivered
+
+        # O cursor avança até o último registro resolvido: ack, nack ou inválido
+        # entre eles; o primeiro sem confirm e o que vem depois ficam no spool
+        position = None
+        resolved = failed = 0
+        sent = 0
+        for (_, _, record_end), valid in zip(records, encoded):
+            if valid:
+                if sent == len(outcomes):
+                    break
+                sent += 1
+            else:
+                failed += 1
+            resolved += 1
+            position = record_end
+
+        if position is not None:
+            self.spool.ack(position, resolved)
+        with self._lock:
+            self._replayed += delivered
+            self._published += delivered
+            self._nacked += nacked
+            self._failed += failed
+
+        if self.spool.pending == 0 and delivered:
+            logger.info(f"Spool drenado ({self._replayed} eventos reenviados)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "connected": self.connected,
+                "reconnects": max(0, self._connections - 1),
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self.config.queue_size,
+                "max_depth": self._max_depth,
+                "enqueued": self._enqueued,
+                "published": self._published,
+                "nacked": self._nacked,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "spooled": self._spooled,
+                "replayed": self._replayed,
+                "spool_pending": self.spool.pending if self.spool else 0,
+                "batches": self._batches,
+                "avg_batch": round(self._batch_messages / self._batches, 2) if self._batches else 0.0,
+                "avg_latency_ms": round(
+                    self._latency_total / self._live_published * 1000, 2
+                ) if self._live_published else 0.0
+            }
+
     def close(self):
-        if self.connection:
-            self.connection.close()
+        """Drena o que já foi enfileirado (até close_timeout) e fecha a conexão"""
+        if self._thread and self._thread.is_alive():
+            self._running = False
+            self._offer(None)
+            self._thread.join(timeout=self.config.close_timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Publisher fechado com {self._queue.qsize()} eventos pendentes")
+        self._running = False
         logger.info("Publisher fechado")
@@ -0,0 +1,150 @@
+"""
+Event Serializers
+Formatos de corpo das mensagens: JSON, msgpack (dependência opcional) e um
+formato binário compacto de esquema fixo. O content_type vai nas
+propriedades AMQP para o consumidor escolher o decodificador.
+"""
+import json
+import struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+COMPACT = "application/x-vigileye-compact"
+
+def to_payload(event) -> dict:
+    """Aceita dict ou DomainEvent"""
+    return event if isinstance(event, dict) else event.to_dict()
+
+class JsonSerializer:
+    content_type = JSON
+
+    def encode(self, event) -> Tuple[bytes, str]:
+        return json.dumps(to_payload(event), separators=(",", ":")).encode("utf-8"), JSON
+
+    def decode(self, body: bytes) -> dict:
+        return json.loads(body)
+
+class MsgpackSerializer:
+    content_type = MSGPACK
+
+    def __init__(self):
+        import msgpack
+
+        self._packer = msgpack.Packer()
+        self._unpackb = msgpack.unpackb
+
+    def encode(self, event) -> Tuple[bytes, str]:
+        return self._packer.pack(to_payload(event)), MSGPACK
+
+    def decode(self, body: bytes) -> dict:
+        return self._unpackb(body)
+
+# Esquemas do formato compacto: event_type -> (id, campos numéricos, campos texto).
+# Alterar um esquema existente exige um novo id.
+COMPACT_SCHEMAS: Dict[str, Tuple[int, List[Tuple[str, str]], List[str]]] = {
+    "drowsiness.detected": (1, [("ear_value", "f"), ("duration_ms", "I")], ["camera_id", "severity"]),
+    "alert.triggered": (2, [], ["camera_id", "alert_type", "priority", "message"]),
+}
+
+COMPACT_VERSION = 1
+_HEADER = struct.Struct("!BBd")
+_TEXT_LENGTH = struct.Struct("!H")
+
+class _CompactSchema:
+    """Structs pré-compilados de um event_type"""
+
+    def __init__(self, event_type: str, schema_id: int, numeric: List[Tuple[str, str]], text: List[str]):
+        self.event_type = event_type
+        self.schema_id = schema_id
+        self.numeric_names = [name for name, _ in numeric]
+        self.numeric = struct.Struct("!" + "".join(fmt for _, fmt in numeric))
+        self.text_names = ["source"] + text
+
+def _epoch(timestamp: str) -> float:
+    """ISO 8601 -> epoch; sem fuso é UTC, nunca o fuso local da máquina"""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+class CompactSerializer:
+    """
+    Layout: versão (u8), esquema (u8), timestamp epoch (f64), campos numéricos
+    do esquema e, por fim, cada texto como u16 de tamanho + UTF-8.
+    O timestamp decodificado volta em UTC com fuso (+00:00).
+    Eventos sem esquema caem para JSON (o content_type indica qual foi usado).
+    """
+    content_type = COMPACT
+
+    def __init__(self, schemas: Dict[str, Tuple[int, List[Tuple[str, str]], List[str]]] = COMPACT_SCHEMAS):
+        self._by_type = {
+            event_type: _CompactSchema(event_type, schema_id, numeric, text)
+            for event_type, (schema_id, numeric, text) in schemas.items()
+        }
+        self._by_id = {schema.schema_id: schema for schema in self._by_type.values()}
+        self._fallback = JsonSerializer()
+
+    def encode(self, event) -> Tuple[bytes, str]:
+        payload = to_payload(event)
+        schema = self._by_type.get(payload.get("event_type"))
+        if schema is None:
+            return self._fallback.encode(payload)
+
+        timestamp = _epoch(payload["timestamp"])
+        parts = [
+            _HEADER.pack(COMPACT_VERSION, schema.schema_id, timestamp),
+            schema.numeric.pack(*(payload[name] for name in schema.numeric_names))
+        ]
+        for name in schema.text_names:
+            text = str(payload.get(name, "")).encode("utf-8")
+            parts.append(_TEXT_LENGTH.pack(len(text)))
+            parts.append(text)
+        return b"".join(parts), COMPACT
+
+    def decode(self, body: bytes) -> dict:
+        version, schema_id, timestamp = _HEADER.unpack_from(body)
+        if version != COMPACT_VERSION:
+            raise ValueError(f"Versão do formato compacto não suportada: {version}")
+        schema = self._by_id[schema_id]
+
+        offset = _HEADER.size
+        payload = {
+            "event_type": schema.event_type,
+            "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+        }
+        payload.update(zip(schema.numeric_names, schema.numeric.unpack_from(body, offset)))
+        offset += schema.numeric.size
+
+        for name in schema.text_names:
+            (length,) = _TEXT_LENGTH.unpack_from(body, offset)
+            offset += _TEXT_LENGTH.size
+            payload[name] = body[offset:offset + length].decode("utf-8")
+            offset += length
+        return payload
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "msgpack": MsgpackSerializer,
+    "compact": CompactSerializer,
+}
+
+def create_serializer(name: str):
+    if name not in SERIALIZERS:
+        raise ValueError(f"EVENT_FORMAT inválido: {name}")
+    return SERIALIZERS[name]()
+
+_DECODERS = {}
+
+def decode_body(body: bytes, content_type: Optional[str] = None) -> dict:
+    """Decodifica pelo content_type da mensagem (JSON quando ausente)"""
+    if content_type in (None, "", JSON):
+        return json.loads(body)
+    decoder = _DECODERS.get(content_type)
+    if decoder is None:
+        name = {MSGPACK: "msgpack", COMPACT: "compact"}.get(content_type)
+        if name is None:
+            raise ValueError(f"content_type não suportado: {content_type}")
+        decoder = _DECODERS[content_type] = create_serializer(name)
+    return decoder.decode(body)
@@ -0,0 +1,138 @@
+"""
+Event Spool
+Arquivo local append-only, em segmentos, para eventos não entregues ao broker
+"""
+import os
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int]
+
+class EventSpool:
+    """
+    Cada registro é uma linha "routing_key<TAB>corpo". Os segmentos são lidos
+    em ordem a partir de um cursor (segmento, offset) persistido em arquivo;
+    segmentos já confirmados são apagados. Uma linha sem '\\n' no final
+    (escrita interrompida) é descartada na abertura.
+    Não é thread-safe: usado apenas pela thread de I/O do publisher.
+    """
+    SUFFIX = ".spool"
+    CURSOR = "cursor"
+
+    def __init__(self, directory: str, segment_bytes: int = 4 * 1024 * 1024, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = sorted(
+            int(name[:-len(self.SUFFIX)]) for name in os.listdir(directory)
+            if name.endswith(self.SUFFIX)
+        )
+        if not self.segments:
+            self.segments = [1]
+
+        self.cursor = self._load_cursor()
+        self._repair_tail()
+        self._writer = open(self._path(self.segments[-1]), "ab")
+        self.pending = self._count_pending()
+
+        if self.pending:
+            logger.info(f"Spool com {self.pending} eventos pendentes em {directory}")
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:08d}{self.SUFFIX}")
+
+    def _load_cursor(self) -> Position:
+        try:
+            with open(os.path.join(self.directory, self.CURSOR)) as f:
+                segment, offset = (int(v) for v in f.read().split())
+        except (OSError, ValueError):
+            return self.segments[0], 0
+        if segment < self.segments[0]:
+            return self.segments[0], 0
+        return segment, offset
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, self.CURSOR)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(f"{self.cursor[0]} {self.cursor[1]}")
+        os.replace(tmp, path)
+
+    def _repair_tail(self):
+        path = self._path(self.segments[-1])
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end != len(data):
+                logger.warning(f"Spool: descartando registro incompleto em {path}")
+                f.truncate(end)
+
+    def _count_pending(self) -> int:
+        count = 0
+        for segment in self.segments:
+            if segment < self.cursor[0]:
+                continue
+            with open(self._path(segment), "rb") as f:
+                if segment == self.cursor[0]:
+                    f.seek(self.cursor[1])
+                count += f.read().count(b"\n")
+        return count
+
+    def append(self, routing_key: str, body: str):
+        record = f"{routing_key}\t{body}\n".encode("utf-8")
+        if self._writer.tell() and self._writer.tell() + len(record) > self.segment_bytes:
+            self._roll()
+
+        self._writer.write(record)
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+        self.pending += 1
+
+    def _roll(self):
+        self._writer.close()
+        self.segments.append(self.segments[-1] + 1)
+        self._writer = open(self._path(self.segments[-1]), "ab")
+
+    def read(self, max_records: int) -> List[Tuple[str, str, Position]]:
+        """Próximos registros a partir do cursor, cada um com a posição logo após ele"""
+        records = []
+        segment, offset = self.cursor
+        for current in self.segments:
+            if current < segment:
+                continue
+            with open(self._path(current), "rb") as f:
+                f.seek(offset if current == segment else 0)
+                while True:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    routing_key, _, body = line[:-1].decode("utf-8").partition("\t")
+                    records.append((routing_key, body, (current, f.tell())))
+                    if len(records) >= max_records:
+                        return records
+        return records
+
+    def ack(self, position: Position, count: int):
+        """Avança o cursor após a entrega de count registros e apaga segmentos consumidos"""
+        self.cursor = position
+        self.pending = max(0, self.pending - count)
+
+        while len(self.segments) > 1 and self.segments[0] < position[0]:
+            os.remove(self._path(self.segments.pop(0)))
+
+        if not self.pending and position == (self.segments[-1], self._writer.tell()):
+            # Tudo entregue: recomeça o segmento ativo do zero
+            self._writer.truncate(0)
+            self._writer.seek(0)
+            self.cursor = (self.segments[-1], 0)
+        self._save_cursor()
+
+    def close(self):
+        self._writer.close()
@@ -0,0 +1,151 @@
+"""
+Batch Inference Stage
+Estágio central que agrupa frames de todas as câmeras em uma janela curta
+e os executa em sequência no mesmo landmarker aquecido
+"""
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class BatchStageConfig:
+    max_batch: int = 8
+    window_ms: float = 5.0
+    workers: int = 0
+
+class BatchInferenceStage:
+    """
+    Envolve um backend de inferência (detector, pool ou engine de processos).
+    Cada worker do estágio coleta até max_batch frames ou até window_ms após o
+    primeiro frame e chama backend.detect_batch uma única vez.
+    cost_observer passa ao backend quando ele mede o próprio custo (pool,
+    processos); sobre o detector simples, o estágio mede o detect_batch.
+    """
+
+    def __init__(self, backend, config: BatchStageConfig):
+        self.backend = backend
+        self.config = config
+        self.size = config.workers if config.workers > 0 else getattr(backend, "size", 1)
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._frames = 0
+        self._max_seen = 0
+        self._cost_observer: Optional[Callable[[float], None]] = None
+
+        self._running = True
+        self._workers = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(self.size)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        logger.info(
+            f"Estágio de batch: {self.size} workers, "
+            f"batch={config.max_batch}, janela={config.window_ms}ms"
+        )
+
+    @property
+    def ear_threshold(self) -> float:
+        return self.backend.ear_threshold
+
+    def is_drowsy(self, ear_value: float) -> bool:
+        return self.backend.is_drowsy(ear_value)
+
+    @property
+    def cost_observer(self) -> Optional[Callable[[float], None]]:
+        return self._cost_observer
+
+    @cost_observer.setter
+    def cost_observer(self, observer: Optional[Callable[[float], None]]):
+        self._cost_observer = observer
+        if hasattr(self.backend, "cost_observer"):
+            self.backend.cost_observer = observer
+
+    def detect(self, frame, camera_id: Optional[str] = None) -> Optional[float]:
+        future: Future = Future()
+        self._queue.put((frame, camera_id, future))
+        return future.result()
+
+    def _collect(self) -> Optional[List]:
+        item = self._queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.config.window_ms / 1000
+        while len(batch) < self.config.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if batch is None:
+                break
+
+            frames = [item[0] for item in batch]
+            camera_ids = [item[1] for item in batch]
+            started = time.perf_counter()
+            try:
+                results = self.backend.detect_batch(frames, camera_ids)
+                if self._cost_observer and not hasattr(self.backend, "cost_observer"):
+                    self._cost_observer((time.perf_counter() - started) / len(batch))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), ear in zip(batch, results):
+                future.set_result(ear)
+
+            with self._lock:
+                self._batches += 1
+                self._frames += len(batch)
+                self._max_seen = max(self._max_seen, len(batch))
+
+    def release_camera(self, camera_id: str):
+        self.backend.release_camera(camera_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            batch_stats = {
+                "workers": self.size,
+                "max_batch": self.config.max_batch,
+                "window_ms": self.config.window_ms,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "avg_batch": round(self._frames / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._max_seen
+            }
+        stats = getattr(self.backend, "stats", None)
+        result = stats() if stats else {}
+        result["batch"] = batch_stats
+        return result
+
+    def close(self):
+        self._running = False
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout=2)
+        self.backend.close()
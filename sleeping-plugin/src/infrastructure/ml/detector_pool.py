@@ -0,0 +1,174 @@
+"""
+Detector Pool
+Pool de instâncias do DrowsinessDetector compartilhado entre câmeras
+"""
+import os
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DetectorPoolConfig:
+    size: int = 0
+    mode: str = "checkout"
+
+class DetectorPool:
+    """
+    Mantém N landmarkers independentes (um grafo MediaPipe por instância).
+    Modo "checkout": cada frame pega qualquer instância livre.
+    Modo "pinned": cada câmera fica fixa em uma instância (menor carga).
+    cost_observer recebe o custo de cada frame: o tempo com a instância em
+    mãos, sem a espera pelo checkout.
+    """
+    MODES = ("checkout", "pinned")
+
+    def __init__(self, factory: Callable, config: DetectorPoolConfig):
+        if config.mode not in self.MODES:
+            raise ValueError(f"Modo de pool inválido: {config.mode}")
+
+        self.config = config
+        self.size = config.size if config.size > 0 else (os.cpu_count() or 1)
+        self.mode = config.mode
+
+        self._detectors: List = [factory() for _ in range(self.size)]
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        for detector in self._detectors:
+            self._idle.put(detector)
+
+        self._locks = [threading.Lock() for _ in self._detectors]
+        self._pins: Dict[str, int] = {}
+        self._pin_counts = [0] * self.size
+
+        self._stats_lock = threading.Lock()
+        self._waiting = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self.cost_observer: Optional[Callable[[float], None]] = None
+
+        logger.info(f"Pool de detectores: {self.size} instâncias ({self.mode})")
+
+    @property
+    def ear_threshold(self) -> float:
+        return self._detectors[0].ear_threshold
+
+    def is_drowsy(self, ear_value: float) -> bool:
+        return self._detectors[0].is_drowsy(ear_value)
+
+    @contextmanager
+    def acquire(self, camera_id: Optional[str] = None, frames: int = 1):
+        """Empresta uma instância do pool (fixa por câmera no modo pinned) para `frames` frames"""
+        with self._stats_lock:
+            self._waiting += 1
+
+        start = time.monotonic()
+        if self.mode == "pinned":
+            # Sem câmera: instância menos carregada, sempre sob o lock dela (nunca pelo _idle)
+            index = self._pin(camera_id) if camera_id is not None else self._least_loaded()
+            lock = self._locks[index]
+            lock.acquire()
+            detector = self._detectors[index]
+        else:
+            lock = None
+            detector = self._idle.get()
+        waited = time.monotonic() - start
+
+        with self._stats_lock:
+            self._waiting -= 1
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            if waited > self._max_wait:
+                self._max_wait = waited
+
+        acquired = time.perf_counter()
+        try:
+            yield detector
+        finally:
+            if self.cost_observer:
+                self.cost_observer((time.perf_counter() - acquired) / frames)
+            with self._stats_lock:
+                self._in_use -= 1
+            if lock is not None:
+                lock.release()
+            else:
+                self._idle.put(detector)
+
+    def detect(self, frame, camera_id: Optional[str] = None) -> Optional[float]:
+        with self.acquire(camera_id) as detector:
+            return detector.detect(frame, camera_id)
+
+    def measure(self, frame, camera_id: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        with self.acquire(camera_id) as detector:
+            return detector.measure(frame, camera_id)
+
+    def detect_batch(self, frames: List, camera_ids: List[Optional[str]]) -> List[Optional[float]]:
+        """
+        Um checkout por instância: no modo pinned o lote é dividido pela
+        instância fixa de cada câmera e cada parte roda sob o lock dela.
+        Um frame que falha vira None sem derrubar o resto do lote.
+        """
+        groups: Dict[Optional[int], List[int]] = {}
+        for position, camera_id in enumerate(camera_ids):
+            index = self._pin(camera_id) if self.mode == "pinned" and camera_id is not None else None
+            groups.setdefault(index, []).append(position)
+
+        results: List[Optional[float]] = [None] * len(frames)
+        for positions in groups.values():
+            with self.acquire(camera_ids[positions[0]], len(positions)) as detector:
+                for position in positions:
+                    try:
+                        results[position] = detector.detect(frames[position], camera_ids[position])
+                    except Exception as e:
+                        logger.error(f"Erro na inferência de {camera_ids[position]}: {e}")
+        return results
+
+    def release_camera(self, camera_id: str):
+        """Remove a fixação da câmera e o estado por câmera dos detectores"""
+        with self._stats_lock:
+            index = self._pins.pop(camera_id, None)
+            if index is not None:
+                self._pin_counts[index] -= 1
+        for detector in self._detectors:
+            detector.release_camera(camera_id)
+
+    def _least_loaded(self) -> int:
+        with self._stats_lock:
+            return min(range(self.size), key=self._pin_counts.__getitem__)
+
+    def _pin(self, camera_id: str) -> int:
+        with self._stats_lock:
+            index = self._pins.get(camera_id)
+            if index is None:
+                index = min(range(self.size), key=self._pin_counts.__getitem__)
+                self._pins[camera_id] = index
+                self._pin_counts[index] += 1
+            return index
+
+    def stats(self) -> dict:
+        roi = self._detectors[0].roi_stats()
+        with self._stats_lock:
+            checkouts = self._checkouts
+            return {
+                "size": self.size,
+                "mode": self.mode,
+                "in_use": self._in_use,
+                "queue_depth": self._waiting,
+                "checkouts": checkouts,
+                "avg_wait_ms": round(self._total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+                "pinned_cameras": len(self._pins),
+                "roi": roi
+            }
+
+    def close(self):
+        for detector in self._detectors:
+            detector.close()
+        logger.info("Pool de detectores fechado")
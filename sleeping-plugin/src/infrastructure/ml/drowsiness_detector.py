@@ -3,26 +3,62 @@ MediaPipe Drowsiness Detector
 Serviço de detecção de sonolência usando MediaPipe
 """
 import cv2
+import math
+import time
 import mediapipe as mp
+import numpy as np
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
-import numpy as np
-from typing import Optional
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+from .roi_tracker import FaceROITracker, ROIConfig, landmarks_box
+from .ear import EYE_INDICES, FACE_OVAL_INDICES, MOUTH_CORNERS, MOUTH_VERTICAL
+from ..monitoring.metrics import STAGE_SECONDS
+
+_Point = namedtuple("_Point", "x y")
+
+class _CropLandmarks:
+    """Landmarks do recorte vistos em coordenadas normalizadas do frame inteiro"""
+    
+    def __init__(self, landmarks, region, width: int, height: int):
+        self.landmarks = landmarks
+        left, top, right, bottom = region
+        self.scale_x = (right - left) / width
+        self.scale_y = (bottom - top) / height
+        self.offset_x = left / width
+        self.offset_y = top / height
+    
+    def __getitem__(self, index):
+        p = self.landmarks[index]
+        return _Point(p.x * self.scale_x + self.offset_x, p.y * self.scale_y + self.offset_y)
+    
+    def box(self):
+        x0, y0, x1, y1 = landmarks_box(self.landmarks, FACE_OVAL_INDICES)
+        return (x0 * self.scale_x + self.offset_x, y0 * self.scale_y + self.offset_y,
+                x1 * self.scale_x + self.offset_x, y1 * self.scale_y + self.offset_y)
 
 class DrowsinessDetector:
-    def __init__(self, model_path: str, ear_threshold: float, consec_frames: int):
+    def __init__(self, model_path: str, ear_threshold: float, consec_frames: int,
+                 roi_config: Optional[ROIConfig] = None,
+                 roi_trackers: Optional[Dict[str, FaceROITracker]] = None,
+                 input_rgb: bool = False):
         self.ear_threshold = ear_threshold
         self.consec_frames = consec_frames
+        self.input_rgb = input_rgb
+        self.roi_config = roi_config or ROIConfig(enabled=False)
+        # Compartilhado entre instâncias do pool: a câmera mantém o rastreio em qualquer detector
+        self.roi_trackers = roi_trackers if roi_trackers is not None else {}
         
         base_options = python.BaseOptions(model_asset_path=model_path)
         options = vision.FaceLandmarkerOptions(base_options=base_options, num_faces=1)
         self.detector = vision.FaceLandmarker.create_from_options(options)
         
-        self.left_eye = [362, 385, 387, 263, 373, 380]
-        self.right_eye = [33, 160, 158, 133, 153, 144]
+        self.left_eye = EYE_INDICES[0].tolist()
+        self.right_eye = EYE_INDICES[1].tolist()
     
     def euclidean_distance(self, p1, p2) -> float:
-        return np.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+        # math.hypot em floats Python custa menos da metade de np.sqrt escalar
+        return math.hypot(p1.x - p2.x, p1.y - p2.y)
     
     def calculate_ear(self, eye_landmarks, landmarks) -> float:
         p1, p2, p3, p4, p5, p6 = [landmarks[i] for i in eye_landmarks]
@@ -31,23 +67,119 @@ class DrowsinessDetector:
         horizontal = self.euclidean_distance(p1, p4)
         return (vertical1 + vertical2) / (2.0 * horizontal)
     
-    def detect(self, frame) -> Optional[float]:
-        """
-        Detecta EAR em um frame
-        Returns: EAR value ou None se não detectar rosto
-        """
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def calculate_mar(self, landmarks) -> float:
+        """Mouth Aspect Ratio: abertura média dos lábios internos sobre a largura da boca"""
+        vertical = sum(self.euclidean_distance(landmarks[a], landmarks[b]) for a, b in MOUTH_VERTICAL)
+        horizontal = self.euclidean_distance(landmarks[MOUTH_CORNERS[0]], landmarks[MOUTH_CORNERS[1]])
+        return vertical / (len(MOUTH_VERTICAL) * horizontal)
+    
+    def _landmarks(self, frame, region=None, camera_id: str = ""):
+        """Executa o landmarker no frame inteiro ou no recorte (reduzido até max_side)"""
+        if region is not None:
+            left, top, right, bottom = region
+            frame = frame[top:bottom, left:right]
+            longest = max(right - left, bottom - top)
+            if longest > self.roi_config.max_side:
+                scale = self.roi_config.max_side / longest
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        started = time.perf_counter()
+        if self.input_rgb:
+            # Captura já entrega RGB; o MediaPipe só exige memória contígua
+            rgb_frame = np.ascontiguousarray(frame)
+        else:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        converted = time.perf_counter()
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_frame)
         results = self.detector.detect(mp_image)
+        STAGE_SECONDS.labels("color", camera_id).observe(converted - started)
+        STAGE_SECONDS.labels("inference", camera_id).observe(time.perf_counter() - converted)
+        return results.face_landmarks[0] if results.face_landmarks else None
+    
+    def _tracked_landmarks(self, frame, camera_id: str):
+        tracker = self.roi_trackers.get(camera_id)
+        if tracker is None:
+            tracker = self.roi_trackers.setdefault(camera_id, FaceROITracker(self.roi_config))
         
-        if results.face_landmarks:
-            face_landmarks = results.face_landmarks[0]
-            right_ear = self.calculate_ear(self.right_eye, face_landmarks)
-            left_ear = self.calculate_ear(self.left_eye, face_landmarks)
-            return (right_ear + left_ear) / 2.0
+        height, width = frame.shape[:2]
+        region = tracker.region(width, height)
+        if region is not None:
+            face_landmarks = self._landmarks(frame, region, camera_id)
+            if face_landmarks is not None:
+                tracker.hit()
+                landmarks = _CropLandmarks(face_landmarks, region, width, height)
+                tracker.update(landmarks.box())
+                return landmarks
+            tracker.miss()
         
+        tracker.full_search()
+        face_landmarks = self._landmarks(frame, camera_id=camera_id)
+        if face_landmarks is None:
+            tracker.lost()
+            return None
+        tracker.update(landmarks_box(face_landmarks, FACE_OVAL_INDICES))
+        return face_landmarks
+    
+    def _face(self, frame, camera_id: Optional[str]):
+        if self.roi_config.enabled and camera_id is not None:
+            return self._tracked_landmarks(frame, camera_id)
+        return self._landmarks(frame, camera_id=camera_id or "")
+    
+    def _ear(self, face_landmarks) -> float:
+        right_ear = self.calculate_ear(self.right_eye, face_landmarks)
+        left_ear = self.calculate_ear(self.left_eye, face_landmarks)
+        return (right_ear + left_ear) / 2.0
+    
+    def detect(self, frame, camera_id: Optional[str] = None) -> Optional[float]:
+        """
+        Detecta EAR em um frame
+        Returns: EAR value ou None se não detectar rosto
+        """
+        face_landmarks = self._face(frame, camera_id)
+        if face_landmarks is not None:
+            started = time.perf_counter()
+            ear = self._ear(face_landmarks)
+            STAGE_SECONDS.labels("ear", camera_id or "").observe(time.perf_counter() - started)
+            return ear
         return None
     
+    def measure(self, frame, camera_id: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """
+        EAR e MAR do mesmo rosto (uma única inferência)
+        Returns: (ear, mar) ou None se não detectar rosto
+        """
+        face_landmarks = self._face(frame, camera_id)
+        if face_landmarks is not None:
+            started = time.perf_counter()
+            measured = self._ear(face_landmarks), self.calculate_mar(face_landmarks)
+            STAGE_SECONDS.labels("ear", camera_id or "").observe(time.perf_counter() - started)
+            return measured
+        return None
+    
+    def detect_batch(self, frames: List, camera_ids: List[Optional[str]]) -> List[Optional[float]]:
+        """
+        Executa vários frames em sequência no mesmo landmarker
+        (o FaceLandmarker não aceita tensores em lote)
+        """
+        return [self.detect(frame, camera_id) for frame, camera_id in zip(frames, camera_ids)]
+    
     def is_drowsy(self, ear_value: float) -> bool:
         """Verifica se EAR indica sonolência"""
         return ear_value < self.ear_threshold
+    
+    def release_camera(self, camera_id: str):
+        """Libera o rastreio de ROI da câmera"""
+        self.roi_trackers.pop(camera_id, None)
+    
+    def roi_stats(self) -> dict:
+        trackers = list(self.roi_trackers.values())
+        hits = sum(t.hits for t in trackers)
+        total = hits + sum(t.misses + t.full_searches for t in trackers)
+        return {
+            "enabled": self.roi_config.enabled,
+            "tracked": sum(1 for t in trackers if t.box is not None),
+            "hit_rate": round(hits / total, 3) if total else 0.0
+        }
+    
+    def close(self):
+        self.detector.close()
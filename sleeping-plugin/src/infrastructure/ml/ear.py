@@ -0,0 +1,59 @@
+"""
+Vectorized EAR
+Cálculo do Eye Aspect Ratio sobre arrays (N, 3) de landmarks com NumPy
+Compensa para lotes de landmarks já em array; para um único rosto vindo do
+MediaPipe o caminho escalar do DrowsinessDetector é mais barato
+(ver benchmarks/ear_microbench.py)
+"""
+import numpy as np
+from typing import Optional, Sequence
+
+# Ordem p1..p6 de cada olho (esquerdo, direito) na malha do FaceLandmarker
+EYE_INDICES = np.array([
+    [362, 385, 387, 263, 373, 380],
+    [33, 160, 158, 133, 153, 144]
+])
+
+# Boca na malha do FaceLandmarker: cantos (78, 308) e pares verticais dos lábios internos
+MOUTH_CORNERS = (78, 308)
+MOUTH_VERTICAL = ((82, 87), (13, 14), (312, 317))
+
+# Índices dos olhos depois de coletar apenas os 12 pontos de EYE_INDICES
+GATHERED_EYE_INDICES = np.arange(12).reshape(2, 6)
+
+# Contorno do rosto: basta para a caixa do ROI sem percorrer os 478 pontos
+FACE_OVAL_INDICES = [
+    10, 338, 297, 332, 284, 251, 389, 356, 454, 323, 361, 288,
+    397, 365, 379, 378, 400, 377, 152, 148, 176, 149, 150, 136,
+    172, 58, 132, 93, 234, 127, 162, 21, 54, 103, 67, 109
+]
+
+# Pares (p2, p6), (p3, p5), (p1, p4) de cada olho
+_PAIR_A = [1, 2, 0]
+_PAIR_B = [5, 4, 3]
+
+def landmarks_to_array(landmarks, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Converte landmarks do MediaPipe em array float32 (N, 3); opcionalmente só os índices pedidos"""
+    if indices is not None:
+        landmarks = [landmarks[i] for i in indices]
+    return np.array([(p.x, p.y, p.z) for p in landmarks], dtype=np.float32)
+
+def eye_aspect_ratios(points: np.ndarray, eye_indices: np.ndarray = EYE_INDICES) -> np.ndarray:
+    """
+    EAR de cada olho
+    points: (N, 3) ou (B, N, 3) -> retorna (2,) ou (B, 2)
+    """
+    delta = points[..., eye_indices[:, _PAIR_A], :2] - points[..., eye_indices[:, _PAIR_B], :2]
+    dist = np.sqrt(np.einsum("...k,...k->...", delta, delta))
+    return (dist[..., 0] + dist[..., 1]) / (2.0 * dist[..., 2])
+
+def mean_ear(points: np.ndarray, eye_indices: np.ndarray = EYE_INDICES):
+    """Média dos dois olhos: float para (N, 3), array (B,) para (B, N, 3)"""
+    ears = eye_aspect_ratios(points, eye_indices)
+    if ears.ndim == 1:
+        return float(ears[0] + ears[1]) / 2.0
+    return ears.mean(axis=-1)
+
+def ear_batch(point_sets: Sequence[np.ndarray], eye_indices: np.ndarray = EYE_INDICES) -> np.ndarray:
+    """EAR médio de vários frames/câmeras em uma única operação"""
+    return mean_ear(np.stack(point_sets), eye_indices)
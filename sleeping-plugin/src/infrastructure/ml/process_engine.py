@@ -0,0 +1,333 @@
+"""
+Process Inference Engine
+Executa o DrowsinessDetector em processos separados (fora do GIL)
+Frames trafegam por ring buffers em memória compartilhada, não por pickle
+"""
+import os
+import time
+import itertools
+import threading
+import logging
+import multiprocessing as mp
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ProcessEngineConfig:
+    workers: int = 0
+    ring_slots: int = 2
+    result_timeout: float = 5.0
+    health_check_s: float = 0.5
+
+class SharedFrameRing:
+    """
+    Ring buffer de frames em memória compartilhada (um por câmera).
+    Um slot só volta ao ring quando o worker terminou de ler; retire() adia o
+    fechamento até o último slot em uso voltar.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.name = self.shm.name
+        self._free = threading.Semaphore(slots)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._busy = [False] * slots
+        self._retired = False
+        self._closed = False
+
+    def write(self, frame: np.ndarray, timeout: Optional[float] = None) -> int:
+        """Copia o frame para um slot livre e retorna o offset em bytes"""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError("Frame maior que o slot do ring buffer")
+
+        if not self._free.acquire(timeout=timeout):
+            raise TimeoutError("Nenhum slot livre no ring buffer")
+        with self._lock:
+            while self._busy[self._next]:
+                self._next = (self._next + 1) % self.slots
+            slot = self._next
+            self._busy[slot] = True
+            self._next = (slot + 1) % self.slots
+
+        offset = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        view[...] = frame
+        del view
+        return offset
+
+    def release(self, offset: int):
+        with self._lock:
+            self._busy[offset // self.slot_bytes] = False
+            idle = self._retired and not any(self._busy)
+        self._free.release()
+        if idle:
+            self.close()
+
+    def retire(self):
+        """Fecha agora se nenhum slot está com um worker, senão no último release"""
+        with self._lock:
+            self._retired = True
+            idle = not any(self._busy)
+        if idle:
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.shm.close()
+        self.shm.unlink()
+
+def _worker_main(factory: Callable, tasks, results):
+    """results: ponta de escrita de um Pipe exclusivo do worker. Uma fila de
+    resultados compartilhada tem um lock entre processos que um worker morto
+    no meio de um put levaria consigo, travando todos os outros."""
+    detector = factory()
+    attached: Dict[str, shared_memory.SharedMemory] = {}
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        if task[0] == "release":
+            _, camera_id, name = task
+            shm = attached.pop(name, None)
+            if shm is not None:
+                shm.close()
+            detector.release_camera(camera_id)
+            continue
+
+        _, request_id, camera_id, name, offset, shape = task
+        try:
+            shm = attached.get(name)
+            if shm is None:
+                shm = attached[name] = shared_memory.SharedMemory(name=name)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            started = time.perf_counter()
+            ear = detector.detect(frame, camera_id)
+            elapsed = time.perf_counter() - started
+            del frame
+            results.send((request_id, ear, None, elapsed))
+        except Exception as e:
+            results.send((request_id, None, str(e), 0.0))
+
+    for shm in attached.values():
+        shm.close()
+    detector.close()
+
+class ProcessInferenceEngine:
+    """
+    Pool de processos de inferência.
+    Cada câmera é fixada no worker com menos câmeras, preservando o estado
+    por câmera do detector e a localidade do segmento de memória compartilhada.
+    O coletor verifica os workers a cada health_check_s: um worker morto é
+    recriado no mesmo índice (as câmeras fixadas nele seguem para o novo
+    processo) e os frames que estavam nele falham na hora, sem esperar o
+    result_timeout.
+    cost_observer recebe o tempo de detect medido dentro do worker, sem a
+    fila de tarefas nem o transporte do resultado.
+    O slot de um frame só é liberado quando o resultado (ou erro) chega ou o
+    worker morre: depois de um result_timeout o worker ainda pode estar lendo.
+    """
+
+    def __init__(self, factory: Callable, config: ProcessEngineConfig, ear_threshold: float):
+        self.config = config
+        self.ear_threshold = ear_threshold
+        self.size = config.workers if config.workers > 0 else (os.cpu_count() or 1)
+
+        self._factory = factory
+        self._ctx = mp.get_context("spawn")
+        self._tasks: List = []
+        self._workers: List = []
+        self._results: List = []
+        for _ in range(self.size):
+            tasks, worker, results = self._spawn()
+            self._tasks.append(tasks)
+            self._workers.append(worker)
+            self._results.append(results)
+
+        self._lock = threading.Lock()
+        self._rings: Dict[str, SharedFrameRing] = {}
+        self._pins: Dict[str, int] = {}
+        self._pin_counts = [0] * self.size
+        # request_id -> (future, índice do worker, ring, offset do slot)
+        self._pending: Dict[int, Tuple[Future, int, SharedFrameRing, int]] = {}
+        self._ids = itertools.count()
+        self._requests = 0
+        self._errors = 0
+        self._respawns = 0
+        self.cost_observer: Optional[Callable[[float], None]] = None
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+        logger.info(f"Engine de processos: {self.size} workers")
+
+    def _spawn(self):
+        tasks = self._ctx.Queue()
+        reader, writer = self._ctx.Pipe(duplex=False)
+        worker = self._ctx.Process(target=_worker_main, args=(self._factory, tasks, writer), daemon=True)
+        worker.start()
+        writer.close()
+        return tasks, worker, reader
+
+    def is_drowsy(self, ear_value: float) -> bool:
+        return ear_value < self.ear_threshold
+
+    def detect(self, frame, camera_id: Optional[str] = None) -> Optional[float]:
+        return self.detect_batch([frame], [camera_id])[0]
+
+    def detect_batch(self, frames: List, camera_ids: List[Optional[str]]) -> List[Optional[float]]:
+        """
+        Envia todos os frames antes de aguardar, distribuindo o lote entre os
+        workers. Um frame que estoura o result_timeout continua pendente (com
+        o slot ocupado) até o worker responder ou morrer.
+        """
+        futures = [self._submit(frame, camera_id or "default") for frame, camera_id in zip(frames, camera_ids)]
+        return [future.result(timeout=self.config.result_timeout) for future in futures]
+
+    def _submit(self, frame, camera_id: str) -> Future:
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        ring, worker = self._route(camera_id, frame.nbytes)
+
+        offset = ring.write(frame, timeout=self.config.result_timeout)
+        future: Future = Future()
+        request_id = next(self._ids)
+        # Registro e envio juntos: um respawn concorrente vê o pedido e o falha
+        with self._lock:
+            self._pending[request_id] = (future, worker, ring, offset)
+            self._requests += 1
+            self._tasks[worker].put(("detect", request_id, camera_id, ring.name, offset, frame.shape))
+        return future
+
+    def _route(self, camera_id: str, nbytes: int):
+        with self._lock:
+            worker = self._pins.get(camera_id)
+            if worker is None:
+                worker = min(range(self.size), key=self._pin_counts.__getitem__)
+                self._pins[camera_id] = worker
+                self._pin_counts[worker] += 1
+
+            ring = self._rings.get(camera_id)
+            if ring is None or ring.slot_bytes < nbytes:
+                if ring is not None:
+                    self._tasks[worker].put(("release", camera_id, ring.name))
+                    ring.retire()
+                ring = SharedFrameRing(self.config.ring_slots, nbytes)
+                self._rings[camera_id] = ring
+            return ring, worker
+
+    def _collect_results(self):
+        checked_at = time.monotonic()
+        while self._running:
+            dead = False
+            for reader in wait(list(self._results), timeout=self.config.health_check_s):
+                try:
+                    self._resolve(*reader.recv())
+                except (EOFError, OSError):
+                    # Pipe fechado: o worker morreu
+                    dead = True
+            if dead or time.monotonic() - checked_at >= self.config.health_check_s:
+                self._check_workers()
+                checked_at = time.monotonic()
+
+    def _resolve(self, request_id: int, ear: Optional[float], error: Optional[str], seconds: float):
+        if not error and self.cost_observer:
+            self.cost_observer(seconds)
+        with self._lock:
+            entry = self._pending.pop(request_id, None)
+            if error:
+                self._errors += 1
+        if entry is None:
+            return
+        future, _, ring, offset = entry
+        ring.release(offset)
+        if future.done():
+            return
+        if error:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(ear)
+
+    def _check_workers(self):
+        """Recria workers mortos e falha os frames que estavam neles"""
+        for index, worker in enumerate(list(self._workers)):
+            if not self._running:
+                return
+            if worker.is_alive():
+                continue
+            # Pode ter morrido depois de responder: drena o que ficou no pipe
+            results = self._results[index]
+            try:
+                while results.poll():
+                    self._resolve(*results.recv())
+            except (EOFError, OSError):
+                pass
+            results.close()
+
+            logger.error(f"Worker de inferência {index} morreu (exitcode {worker.exitcode}); recriando")
+            tasks, replacement, results = self._spawn()
+            with self._lock:
+                self._tasks[index] = tasks
+                self._workers[index] = replacement
+                self._results[index] = results
+                self._respawns += 1
+                lost = [request_id for request_id, entry in self._pending.items() if entry[1] == index]
+                lost = [self._pending.pop(request_id) for request_id in lost]
+            # O worker morto não lê mais nada: os slots dele podem voltar
+            for future, _, ring, offset in lost:
+                ring.release(offset)
+                if not future.done():
+                    future.set_exception(RuntimeError(f"worker {index} morreu"))
+
+    def release_camera(self, camera_id: str):
+        with self._lock:
+            worker = self._pins.pop(camera_id, None)
+            ring = self._rings.pop(camera_id, None)
+            if worker is not None:
+                self._pin_counts[worker] -= 1
+                if ring is not None:
+                    self._tasks[worker].put(("release", camera_id, ring.name))
+        if ring is not None:
+            ring.retire()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": "process",
+                "workers": self.size,
+                "alive": sum(1 for w in self._workers if w.is_alive()),
+                "in_flight": len(self._pending),
+                "requests": self._requests,
+                "errors": self._errors,
+                "respawns": self._respawns,
+                "cameras_per_worker": list(self._pin_counts)
+            }
+
+    def close(self):
+        self._running = False
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=2)
+        self._collector.join(timeout=self.config.health_check_s * 2)
+        for results in self._results:
+            results.close()
+        # Workers parados: fecha também os rings aposentados que tinham frames pendentes
+        rings = set(self._rings.values()) | {entry[2] for entry in self._pending.values()}
+        for ring in rings:
+            ring.close()
+        self._rings.clear()
+        logger.info("Engine de processos encerrada")
@@ -0,0 +1,73 @@
+"""
+Face ROI Tracker
+Mantém a última caixa do rosto por câmera para recortar os próximos frames
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+@dataclass
+class ROIConfig:
+    enabled: bool = True
+    margin: float = 0.35
+    max_side: int = 320
+    min_side: int = 64
+
+class FaceROITracker:
+    """
+    A caixa é guardada normalizada no frame inteiro (x0, y0, x1, y1).
+    Sem caixa (ou após uma falha no recorte) a busca volta ao frame inteiro.
+    """
+
+    def __init__(self, config: ROIConfig):
+        self.config = config
+        self.box: Optional[Tuple[float, float, float, float]] = None
+        self.hits = 0
+        self.misses = 0
+        self.full_searches = 0
+
+    def region(self, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """Região de recorte em pixels (x0, y0, x1, y1) ou None para o frame inteiro"""
+        if self.box is None:
+            return None
+
+        x0, y0, x1, y1 = self.box
+        margin_x = (x1 - x0) * self.config.margin
+        margin_y = (y1 - y0) * self.config.margin
+
+        left = max(0, int((x0 - margin_x) * width))
+        top = max(0, int((y0 - margin_y) * height))
+        right = min(width, int((x1 + margin_x) * width) + 1)
+        bottom = min(height, int((y1 + margin_y) * height) + 1)
+
+        if right - left < self.config.min_side or bottom - top < self.config.min_side:
+            return None
+        return left, top, right, bottom
+
+    def update(self, box: Tuple[float, float, float, float]):
+        self.box = box
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        """Rosto não encontrado no recorte: descarta a caixa"""
+        self.misses += 1
+        self.box = None
+
+    def full_search(self):
+        self.full_searches += 1
+
+    def lost(self):
+        self.box = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.full_searches
+        return self.hits / total if total else 0.0
+
+def landmarks_box(landmarks, indices: Optional[Sequence[int]] = None) -> Tuple[float, float, float, float]:
+    """Caixa normalizada (x0, y0, x1, y1) que envolve os landmarks (ou só os índices dados)"""
+    points = landmarks if indices is None else [landmarks[i] for i in indices]
+    xs = [p.x for p in points]
+    ys = [p.y for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
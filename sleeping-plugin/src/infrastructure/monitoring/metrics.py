@@ -0,0 +1,209 @@
+"""
+Metrics Registry
+Contadores e histogramas em formato de texto do Prometheus.
+Cada thread escreve no próprio shard (sem lock no caminho quente); a coleta
+soma os shards no momento do scrape.
+"""
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latências de estágio em segundos: de ~1 ms (conversão de cor) a 1 s (inferência travada)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class _Sharded:
+    """Valores por thread; só a thread dona escreve no seu shard"""
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> List[float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0.0] * self._size
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _totals(self) -> List[float]:
+        with self._lock:
+            shards = list(self._shards)
+        totals = [0.0] * self._size
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+class Counter(_Sharded):
+    def __init__(self):
+        super().__init__(1)
+
+    def inc(self, amount: float = 1.0):
+        self._shard()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._totals()[0]
+
+class Histogram(_Sharded):
+    """Shard: contagem por bucket (+Inf no fim) seguida da soma observada"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(len(self.buckets) + 2)
+
+    def observe(self, value: float):
+        shard = self._shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[float], float, float]:
+        """(contagens cumulativas por bucket incluindo +Inf, soma, total)"""
+        totals = self._totals()
+        cumulative = []
+        running = 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+class MetricFamily:
+    """Métrica com rótulos; labels() devolve o filho (crie uma vez e guarde a referência)"""
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 labelnames: Sequence[str], factory: Callable):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = values
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def remove(self, label: str, value: str):
+        """Descarta os filhos com o rótulo informado (ex.: câmera removida)"""
+        if label not in self.labelnames:
+            return
+        index = self.labelnames.index(label)
+        with self._lock:
+            for key in [k for k in self._children if k[index] == value]:
+                del self._children[key]
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+class _Collector:
+    """Valores lidos só no scrape (filas, contadores já mantidos por outros componentes)"""
+
+    def __init__(self, name: str, help_text: str, kind: str,
+                 labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: Dict[str, _Collector] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            return self._families.setdefault(family.name, family)
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, "counter", labelnames, Counter))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, "histogram", labelnames, lambda: Histogram(buckets)))
+
+    def collector(self, name: str, help_text: str, kind: str, labelnames: Sequence[str],
+                  collect: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        """Registra (ou substitui) uma métrica calculada no scrape"""
+        with self._lock:
+            self._collectors[name] = _Collector(name, help_text, kind, labelnames, collect)
+
+    def remove(self, label: str, value: str):
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            family.remove(label, value)
+
+    def render(self) -> str:
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+            collectors = sorted(self._collectors.values(), key=lambda c: c.name)
+
+        lines: List[str] = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in sorted(family.children(), key=lambda item: item[0]):
+                if family.kind == "histogram":
+                    self._render_histogram(lines, family, values, child)
+                else:
+                    lines.append(f"{family.name}{_labels(family.labelnames, values)} {_number(child.value)}")
+
+        for collector in collectors:
+            try:
+                samples = list(collector.collect())
+            except Exception:
+                continue
+            lines.append(f"# HELP {collector.name} {collector.help}")
+            lines.append(f"# TYPE {collector.name} {collector.kind}")
+            for values, value in samples:
+                lines.append(f"{collector.name}{_labels(collector.labelnames, values)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, lines: List[str], family: MetricFamily, values, histogram: Histogram):
+        cumulative, total_sum, count = histogram.snapshot()
+        bounds = [_number(b) for b in histogram.buckets] + ["+Inf"]
+        for bound, bucket_count in zip(bounds, cumulative):
+            labels = _labels(family.labelnames, values, f'le="{bound}"')
+            lines.append(f"{family.name}_bucket{labels} {_number(bucket_count)}")
+        labels = _labels(family.labelnames, values)
+        lines.append(f"{family.name}_sum{labels} {_number(total_sum)}")
+        lines.append(f"{family.name}_count{labels} {_number(count)}")
+
+# Registro do processo. No modo de processos (INFERENCE_MODE=process) os
+# estágios internos do detector ficam no registro de cada worker e não aparecem
+# no scrape; "detect" (medido no handler) cobre o tempo total da inferência.
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "vigileye_stage_seconds",
+    "Latência por estágio do pipeline: capture, decode, color, inference, ear, detect, enqueue, publish",
+    ("stage", "camera")
+)
+FRAMES = REGISTRY.counter("vigileye_frames_total", "Frames processados pela inferência", ("camera",))
+FACES = REGISTRY.counter("vigileye_faces_total", "Frames com rosto detectado", ("camera",))
+ALERTS = REGISTRY.counter("vigileye_alerts_total", "Alertas publicados", ("camera", "type"))
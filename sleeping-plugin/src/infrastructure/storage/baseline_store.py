@@ -0,0 +1,59 @@
+"""
+Baseline Store
+Linhas de base de EAR por câmera em um arquivo JSON, para que um restart
+não precise recalibrar
+"""
+import json
+import os
+import threading
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class BaselineStore:
+    """
+    Carrega o arquivo uma vez e reescreve tudo a cada save() via arquivo
+    temporário + os.replace (nunca fica meio escrito). Saves só acontecem ao
+    fim de cada calibração, então o custo de reescrever é irrelevante.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._baselines: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Baselines ilegíveis em {self.path}, recalibrando: {e}")
+            return {}
+        logger.info(f"{len(data)} baselines de EAR carregadas de {self.path}")
+        return data
+
+    def get(self, camera_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._baselines.get(camera_id)
+
+    def save(self, camera_id: str, baseline: dict):
+        with self._lock:
+            self._baselines[camera_id] = baseline
+            self._write()
+
+    def delete(self, camera_id: str):
+        with self._lock:
+            if self._baselines.pop(camera_id, None) is not None:
+                self._write()
+
+    def _write(self):
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self._baselines, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Falha ao salvar baselines em {self.path}: {e}")
@@ -0,0 +1,184 @@
+"""
+Capture Backends
+Abertura configurável de streams RTSP: transporte, baixa latência, buffer,
+aceleração por hardware, resolução de decodificação e saída RGB
+"""
+import os
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import cv2
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CaptureConfig:
+    backend: str = "opencv"
+    rtsp_transport: str = "tcp"
+    low_latency: bool = True
+    buffer_size: int = 1
+    hw_accel: str = ""
+    width: int = 0
+    height: int = 0
+    rgb_output: bool = False
+    substream_from: str = ""
+    substream_to: str = ""
+
+    @property
+    def delivers_rgb(self) -> bool:
+        """Só o PyAV converte direto para RGB; o FFmpeg do OpenCV sempre entrega BGR"""
+        return self.rgb_output and self.backend == "pyav"
+
+def resolve_stream_url(rtsp_url: str, config: CaptureConfig, substream_url: Optional[str] = None) -> str:
+    """Prefere o substream (resolução menor) quando informado ou derivável da URL"""
+    if substream_url:
+        return substream_url
+    if config.substream_from and config.substream_from in rtsp_url:
+        return rtsp_url.replace(config.substream_from, config.substream_to, 1)
+    return rtsp_url
+
+def _ffmpeg_options(config: CaptureConfig) -> dict:
+    options = {}
+    if config.rtsp_transport:
+        options["rtsp_transport"] = config.rtsp_transport
+    if config.low_latency:
+        options.update({"fflags": "nobuffer", "flags": "low_delay", "max_delay": "0"})
+    return options
+
+# CAPTURE_HW_ACCEL (nomes do FFmpeg/PyAV) -> aceleração do OpenCV
+_OPENCV_HW_ACCEL = {
+    "none": cv2.VIDEO_ACCELERATION_NONE,
+    "any": cv2.VIDEO_ACCELERATION_ANY,
+    "vaapi": cv2.VIDEO_ACCELERATION_VAAPI,
+    "d3d11": cv2.VIDEO_ACCELERATION_D3D11,
+    "d3d11va": cv2.VIDEO_ACCELERATION_D3D11,
+    "qsv": cv2.VIDEO_ACCELERATION_MFX,
+    "mfx": cv2.VIDEO_ACCELERATION_MFX,
+    "drm": cv2.VIDEO_ACCELERATION_DRM
+}
+
+def _opencv_hw_accel(name: str) -> Optional[int]:
+    """None sem aceleração pedida; nomes sem equivalente no OpenCV (ex.: cuda) usam ANY"""
+    if not name:
+        return None
+    return _OPENCV_HW_ACCEL.get(name.lower(), cv2.VIDEO_ACCELERATION_ANY)
+
+def configure_capture(config: CaptureConfig):
+    """
+    Chamado uma vez na inicialização. O OpenCV lê as opções do FFmpeg de uma
+    variável de ambiente do processo; escrevê-la a cada abertura corre com as
+    câmeras abrindo em paralelo (a configuração é a mesma para todas).
+    """
+    if config.backend != "opencv":
+        return
+    options = _ffmpeg_options(config)
+    if options:
+        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "|".join(f"{k};{v}" for k, v in options.items())
+    if config.hw_accel and config.hw_accel.lower() not in _OPENCV_HW_ACCEL:
+        logger.warning(
+            f"CAPTURE_HW_ACCEL={config.hw_accel} não existe no OpenCV; usando qualquer aceleração disponível"
+        )
+
+class OpenCVCapture:
+    """
+    cv2.VideoCapture com backend FFmpeg; reduz a resolução após decodificar.
+    As opções do FFmpeg vêm de configure_capture().
+    """
+    is_rgb = False
+
+    def __init__(self, url: str, config: CaptureConfig):
+        self.config = config
+
+        params = []
+        accel = _opencv_hw_accel(config.hw_accel)
+        if accel is not None:
+            params = [cv2.CAP_PROP_HW_ACCELERATION, accel]
+        self.cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+        if config.buffer_size > 0:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+
+    def is_opened(self) -> bool:
+        return self.cap.isOpened()
+
+    @property
+    def fps(self) -> float:
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+    def grab(self) -> bool:
+        return self.cap.grab()
+
+    def retrieve(self):
+        success, frame = self.cap.retrieve()
+        if success and self.config.width and self.config.height:
+            frame = cv2.resize(frame, (self.config.width, self.config.height), interpolation=cv2.INTER_AREA)
+        return success, frame
+
+    def release(self):
+        self.cap.release()
+
+class PyAVCapture:
+    """
+    Decodificação via PyAV (dependência opcional "av").
+    A conversão de cor e a redução de resolução saem de uma única passada do
+    swscale, e só para os frames efetivamente entregues à inferência.
+    """
+
+    def __init__(self, url: str, config: CaptureConfig):
+        import av
+
+        self.config = config
+        self.is_rgb = config.rgb_output
+        self._frame = None
+        self.container = None
+
+        kwargs = {"options": _ffmpeg_options(config), "timeout": (10.0, 5.0)}
+        if config.hw_accel:
+            from av.codec.hwaccel import HWAccel
+            kwargs["hwaccel"] = HWAccel(device_type=config.hw_accel)
+
+        try:
+            self.container = av.open(url, **kwargs)
+            self.stream = self.container.streams.video[0]
+            self.stream.thread_type = "AUTO"
+            self._frames = self.container.decode(self.stream)
+        except Exception as e:
+            logger.error(f"PyAV não abriu o stream: {e}")
+            self.container = None
+
+    def is_opened(self) -> bool:
+        return self.container is not None
+
+    @property
+    def fps(self) -> float:
+        rate = self.stream.average_rate if self.container else None
+        return float(rate) if rate else 0.0
+
+    def grab(self) -> bool:
+        try:
+            self._frame = next(self._frames)
+            return True
+        except Exception:
+            self._frame = None
+            return False
+
+    def retrieve(self):
+        if self._frame is None:
+            return False, None
+        image = self._frame.to_ndarray(
+            format="rgb24" if self.is_rgb else "bgr24",
+            width=self.config.width or None,
+            height=self.config.height or None
+        )
+        return True, image
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+def open_capture(url: str, config: CaptureConfig):
+    if config.backend == "pyav":
+        return PyAVCapture(url, config)
+    if config.backend == "opencv":
+        return OpenCVCapture(url, config)
+    raise ValueError(f"CAPTURE_BACKEND inválido: {config.backend}")
@@ -0,0 +1,58 @@
+"""
+Frame Mailbox
+Caixa de um slot entre captura e inferência: o frame mais novo sempre vence
+"""
+import threading
+import time
+from typing import Optional, Tuple
+
+class LatestFrameMailbox:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._has_frame = False
+        self._waiting = False
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+
+    def wants_frame(self) -> bool:
+        """True quando a inferência está ociosa esperando um frame"""
+        return self._waiting and not self._has_frame
+
+    def put(self, frame, captured_at: Optional[float] = None):
+        """Publica o frame, descartando o anterior ainda não consumido"""
+        with self._cond:
+            if self._has_frame:
+                self.dropped += 1
+            self._frame = frame
+            self._captured_at = captured_at if captured_at is not None else time.monotonic()
+            self._has_frame = True
+            self._cond.notify()
+
+    def skip(self):
+        """Contabiliza um frame capturado que não foi entregue"""
+        self.dropped += 1
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[object, float]]:
+        """Aguarda o próximo frame; retorna (frame, captured_at) ou None"""
+        with self._cond:
+            self._waiting = True
+            try:
+                if not self._cond.wait_for(lambda: self._has_frame or self._closed, timeout):
+                    return None
+                if not self._has_frame:
+                    return None
+                frame, captured_at = self._frame, self._captured_at
+                self._frame = None
+                self._has_frame = False
+                self.delivered += 1
+                return frame, captured_at
+            finally:
+                self._waiting = False
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
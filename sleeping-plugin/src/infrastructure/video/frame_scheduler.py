@@ -0,0 +1,79 @@
+"""
+Adaptive Frame Scheduler
+Define a taxa de análise de cada câmera a partir do tempo de processamento,
+da presença de rosto e da proximidade do EAR ao limiar
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class SchedulerConfig:
+    target_fps: float = 15.0
+    idle_fps: float = 2.0
+    boost_fps: float = 30.0
+    idle_after_s: float = 5.0
+    boost_margin: float = 0.25
+
+class AdaptiveFrameScheduler:
+    """
+    Modos:
+    - normal: target_fps
+    - idle: nenhum rosto há idle_after_s segundos -> idle_fps
+    - boost: EAR abaixo de ear_threshold * (1 + boost_margin) -> boost_fps
+    fps_cap (0 = sem limite) vale para todos os modos: é como o controle de
+    admissão reduz câmeras de baixa prioridade sob carga.
+    """
+
+    def __init__(self, config: SchedulerConfig, ear_threshold: float = 0.0):
+        self.config = config
+        self.ear_threshold = ear_threshold
+        self.source_fps = 0.0
+        self.fps_cap = 0.0
+        self.mode = "normal"
+        self._last_face_at = time.monotonic()
+
+    def set_source_fps(self, fps: float):
+        """FPS real do stream; a análise nunca passa dele"""
+        self.source_fps = fps if fps and fps > 0 else 0.0
+
+    def observe(self, ear_value: Optional[float], now: Optional[float] = None):
+        """Atualiza o modo com o resultado do último frame"""
+        now = time.monotonic() if now is None else now
+
+        if ear_value is None:
+            if now - self._last_face_at >= self.config.idle_after_s:
+                self.mode = "idle"
+            elif self.mode == "boost":
+                self.mode = "normal"
+            return
+
+        self._last_face_at = now
+        if ear_value < self.ear_threshold * (1 + self.config.boost_margin):
+            self.mode = "boost"
+        else:
+            self.mode = "normal"
+
+    def current_fps(self) -> float:
+        if self.mode == "idle":
+            fps = self.config.idle_fps
+        elif self.mode == "boost":
+            fps = self.config.boost_fps
+        else:
+            fps = self.config.target_fps
+
+        if self.source_fps:
+            fps = min(fps, self.source_fps)
+        if self.fps_cap:
+            fps = min(fps, self.fps_cap)
+        return fps
+
+    def next_deadline(self, previous: float, now: float) -> float:
+        """
+        Prazo do próximo frame: um período depois do prazo anterior. O período
+        conta a espera pelo frame da captura e o processamento, não só este.
+        Atrasado mais de um período (stream parado, troca de modo), recomeça
+        de now em vez de compensar com uma rajada.
+        """
+        deadline = previous + 1.0 / max(self.current_fps(), 0.1)
+        return deadline if deadline >= now - 1.0 / max(self.current_fps(), 0.1) else now
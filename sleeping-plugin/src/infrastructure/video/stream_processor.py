@@ -1,62 +1,145 @@
 """
 Stream Processor
 Processa stream RTSP de uma câmera
+Captura e inferência rodam em threads separadas ligadas por um mailbox de um slot
 """
-import cv2
 import threading
 import time
 import logging
 from typing import Callable, Optional
+from .frame_mailbox import LatestFrameMailbox
+from .frame_scheduler import AdaptiveFrameScheduler, SchedulerConfig
+from .capture import CaptureConfig, open_capture
+from ..monitoring.metrics import STAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
 class StreamProcessor:
-    def __init__(self, camera_id: str, rtsp_url: str, frame_callback: Callable):
+    def __init__(self, camera_id: str, rtsp_url: str, frame_callback: Callable,
+                 scheduler: Optional[AdaptiveFrameScheduler] = None,
+                 capture_config: Optional[CaptureConfig] = None,
+                 capture_factory: Callable = open_capture,
+                 drop_callback: Optional[Callable[[int], None]] = None):
         self.camera_id = camera_id
         self.rtsp_url = rtsp_url
         self.frame_callback = frame_callback
+        self.scheduler = scheduler or AdaptiveFrameScheduler(SchedulerConfig())
+        self.capture_config = capture_config or CaptureConfig()
+        self.capture_factory = capture_factory
+        self.drop_callback = drop_callback
+        self._reported_dropped = 0
         self.running = False
+        self._stop_event = threading.Event()
         self.thread: Optional[threading.Thread] = None
-        self.cap: Optional[cv2.VideoCapture] = None
-    
-    def start(self):
+        self.capture_thread: Optional[threading.Thread] = None
+        self.cap = None
+        self.mailbox = LatestFrameMailbox()
+        self.frames_grabbed = 0
+        self.last_frame_age = 0.0
+        self._capture_seconds = STAGE_SECONDS.labels("capture", camera_id)
+        self._decode_seconds = STAGE_SECONDS.labels("decode", camera_id)
+
+    def start(self, delay: float = 0.0):
+        """delay: espera antes de abrir o stream (escalonamento de conexões)"""
         if self.running:
             return
-        
+
         self.running = True
+        self._stop_event.clear()
+        self.capture_thread = threading.Thread(target=self._capture_stream, args=(delay,), daemon=True)
         self.thread = threading.Thread(target=self._process_stream, daemon=True)
+        self.capture_thread.start()
         self.thread.start()
         logger.info(f"Stream iniciado: {self.camera_id}")
-    
-    def stop(self):
+
+    def request_stop(self):
+        """Sinaliza a parada sem aguardar as threads"""
         self.running = False
+        self._stop_event.set()
+        self.mailbox.close()
+
+    def stop(self):
+        self.request_stop()
+        if self.capture_thread:
+            self.capture_thread.join(timeout=2)
         if self.thread:
             self.thread.join(timeout=2)
         if self.cap:
             self.cap.release()
         logger.info(f"Stream parado: {self.camera_id}")
-    
-    def _process_stream(self):
-        self.cap = cv2.VideoCapture(self.rtsp_url)
-        
-        if not self.cap.isOpened():
+
+    def stats(self) -> dict:
+        return {
+            "grabbed": self.frames_grabbed,
+            "processed": self.mailbox.delivered,
+            "dropped": self.mailbox.dropped,
+            "fps": self.scheduler.current_fps(),
+            "mode": self.scheduler.mode,
+            "frame_age_ms": round(self.last_frame_age * 1000, 1)
+        }
+
+    def _report_dropped(self):
+        """Repassa os descartes do mailbox uma vez por frame processado, não a cada descarte"""
+        dropped = self.mailbox.dropped
+        if dropped != self._reported_dropped:
+            self.drop_callback(dropped - self._reported_dropped)
+            self._reported_dropped = dropped
+
+    def _capture_stream(self, delay: float = 0.0):
+        """Drena o stream continuamente; só decodifica quando a inferência está livre"""
+        if delay > 0 and self._stop_event.wait(delay):
+            return
+
+        self.cap = self.capture_factory(self.rtsp_url, self.capture_config)
+
+        if not self.cap.is_opened():
             logger.error(f"Erro ao conectar: {self.camera_id}")
             self.running = False
+            self.mailbox.close()
             return
-        
+
+        self.scheduler.set_source_fps(self.cap.fps)
         logger.info(f"Conectado: {self.camera_id}")
-        
+
         while self.running:
-            success, frame = self.cap.read()
-            if not success:
+            started = time.perf_counter()
+            if not self.cap.grab():
                 time.sleep(0.1)
                 continue
-            
+            self._capture_seconds.observe(time.perf_counter() - started)
+
+            self.frames_grabbed += 1
+            if not self.mailbox.wants_frame():
+                self.mailbox.skip()
+                continue
+
+            started = time.perf_counter()
+            success, frame = self.cap.retrieve()
+            self._decode_seconds.observe(time.perf_counter() - started)
+            if success:
+                self.mailbox.put(frame, time.monotonic())
+
+        self.cap.release()
+
+    def _process_stream(self):
+        deadline = time.monotonic()
+        while self.running:
+            item = self.mailbox.get(timeout=1.0)
+            if item is None:
+                continue
+
+            frame, captured_at = item
+            ear_value = None
             try:
-                self.frame_callback(self.camera_id, frame)
+                ear_value = self.frame_callback(self.camera_id, frame, captured_at)
             except Exception as e:
                 logger.error(f"Erro no callback: {e}")
-            
-            time.sleep(0.033)
-        
-        self.cap.release()
+
+            if self.drop_callback:
+                self._report_dropped()
+
+            finished = time.monotonic()
+            self.last_frame_age = finished - captured_at
+            self.scheduler.observe(ear_value, finished)
+            deadline = self.scheduler.next_deadline(deadline, finished)
+            self._stop_event.wait(max(0.0, deadline - finished))
@@ -2,9 +2,12 @@
 FastAPI - Minimal Performance-Focused
 Health check e métricas com overhead mínimo
 """
+from datetime import datetime
 from fastapi import FastAPI
-from typing import Dict
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Dict, Optional
 import threading
+from ..infrastructure.monitoring.metrics import REGISTRY
 
 app = FastAPI(title="VigilEye", docs_url=None, redoc_url=None)
 
@@ -12,21 +15,143 @@ _handler = None
 
 @app.get("/health")
 def health():
-    active = sum(1 for s in _handler.sessions.values() if s.is_active)
-    return {"status": "ok", "active": active}
+    return {"status": "ok", "active": _handler.stats.snapshot()["active"]}
 
 @app.get("/metrics")
 def metrics():
-    sessions = _handler.sessions
-    return {
-        "total": len(sessions),
-        "active": sum(1 for s in sessions.values() if s.is_active),
-        "alerts": sum(s.total_alerts for s in sessions.values())
-    }
+    result = _handler.stats.snapshot()
+    stats = getattr(_handler.detector, "stats", None)
+    if stats:
+        result["inference"] = stats()
+    publisher_stats = getattr(_handler.publisher, "stats", None)
+    if publisher_stats:
+        result["publisher"] = publisher_stats()
+    if _handler.telemetry:
+        result["telemetry"] = _handler.telemetry.stats()
+    if _handler.feed:
+        result["feed"] = _handler.feed.stats()
+    if _handler.history:
+        result["history"] = _handler.history.stats()
+    if _handler.cluster:
+        result["cluster"] = _handler.cluster.stats()
+    if _handler.admission:
+        result["admission"] = _handler.admission.stats()
+    return result
+
+@app.get("/load")
+def load():
+    """Carga e capacidade restante deste nó, para o hub decidir onde alocar câmeras"""
+    if _handler.admission is None:
+        return PlainTextResponse("controle de admissão desabilitado", status_code=404)
+    result = _handler.admission.stats()
+    if _handler.cluster:
+        result["node_id"] = _handler.cluster.node_id
+    return result
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch em segundos ou ISO 8601"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.get("/alerts")
+def alerts(camera_id: Optional[str] = None, since: Optional[str] = None,
+           until: Optional[str] = None, limit: int = 100):
+    """Com since: os primeiros `limit` a partir dele (paginação); sem since: os mais recentes"""
+    if _handler.history is None:
+        return PlainTextResponse("histórico desabilitado", status_code=404)
+    try:
+        since_ts, until_ts = _parse_time(since), _parse_time(until)
+    except ValueError:
+        return PlainTextResponse("since/until inválidos", status_code=400)
+    
+    items = _handler.history.query(camera_id, since_ts, until_ts, limit)
+    return {"alerts": items, "count": len(items)}
+
+@app.get("/feed")
+async def feed(camera_id: Optional[str] = None):
+    """SSE com amostras de EAR (event: ear) e eventos publicados (drowsiness.detected, alert.triggered)"""
+    hub = _handler.feed
+    if hub is None:
+        return PlainTextResponse("feed desabilitado", status_code=404)
+    subscriber = hub.subscribe(camera_id)
+    if subscriber is None:
+        return PlainTextResponse("limite de assinantes atingido", status_code=503)
+    
+    async def stream():
+        try:
+            yield ": conectado\n\n"
+            while True:
+                messages = await hub.next(subscriber, hub.config.keepalive_s)
+                yield "".join(messages) if messages else ": keepalive\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def prometheus():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _stream_samples(field: str):
+    def collect():
+        for camera_id, processor in list(_handler.processors.items()):
+            yield (camera_id,), processor.stats()[field]
+    return collect
+
+def _stats_sample(component, *path: str):
+    """Um valor de stats() do componente; se a chave não existir o scrape omite a métrica"""
+    def collect():
+        value = component.stats()
+        for key in path:
+            value = value[key]
+        yield (), value
+    return collect
+
+def register_metrics(handler):
+    """Métricas lidas no scrape a partir dos contadores que os componentes já mantêm"""
+    REGISTRY.collector("vigileye_frames_grabbed_total", "Frames lidos do stream", "counter",
+                       ("camera",), _stream_samples("grabbed"))
+    REGISTRY.collector("vigileye_frames_dropped_total", "Frames descartados pelo mailbox (inferência ocupada)",
+                       "counter", ("camera",), _stream_samples("dropped"))
+    REGISTRY.collector("vigileye_frame_age_ms", "Idade do último frame ao fim do processamento", "gauge",
+                       ("camera",), _stream_samples("frame_age_ms"))
+    
+    publisher = handler.publisher
+    if hasattr(publisher, "stats"):
+        for name, key, kind, help_text in (
+            ("vigileye_publisher_queue_depth", "queue_depth", "gauge", "Eventos aguardando a thread de I/O"),
+            ("vigileye_publisher_spool_pending", "spool_pending", "gauge", "Eventos no spool em disco"),
+            ("vigileye_publisher_reconnects_total", "reconnects", "counter", "Reconexões ao broker"),
+            ("vigileye_publisher_dropped_total", "dropped", "counter", "Eventos descartados com a fila cheia"),
+            ("vigileye_publisher_published_total", "published", "counter", "Eventos confirmados pelo broker"),
+        ):
+            REGISTRY.collector(name, help_text, kind, (), _stats_sample(publisher, key))
+    
+    if hasattr(handler.detector, "stats"):
+        REGISTRY.collector("vigileye_inference_queue_depth", "Frames aguardando o estágio de batch",
+                           "gauge", (), _stats_sample(handler.detector, "batch", "queue_depth"))
+    if handler.admission:
+        for name, key, help_text in (
+            ("vigileye_load_utilization", "utilization", "Demanda de FPS planejada / capacidade de inferência"),
+            ("vigileye_load_frame_ms", "frame_ms", "Custo médio de inferência por frame (EWMA)"),
+            ("vigileye_load_headroom_cameras", "headroom_cameras", "Câmeras que ainda cabem no orçamento"),
+            ("vigileye_load_degraded_cameras", "degraded", "Câmeras com FPS reduzido pelo controle de admissão"),
+            ("vigileye_load_pending_cameras", "pending", "Câmeras aguardando capacidade"),
+        ):
+            REGISTRY.collector(name, help_text, "gauge", (), _stats_sample(handler.admission, key))
+    if handler.telemetry:
+        REGISTRY.collector("vigileye_telemetry_buffered", "Janelas de telemetria aguardando publicação",
+                           "gauge", (), _stats_sample(handler.telemetry, "buffered"))
 
 def start_api(handler, port: int = 8000):
     global _handler
     _handler = handler
+    register_metrics(handler)
     
     import uvicorn
     thread = threading.Thread(
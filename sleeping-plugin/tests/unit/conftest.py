@@ -0,0 +1,52 @@
+"""
+Fakes compartilhados pelos testes do CameraEventHandler
+"""
+from datetime import datetime
+from src.domain.entities.detection_session import DetectionSession
+from src.application.handlers.camera_handler import CameraEventHandler
+
+class FakeDetector:
+    """Devolve os EARs de `values` em ordem; sem valores, nenhum rosto (None)"""
+    ear_threshold = 0.2
+
+    def __init__(self, values=()):
+        self.values = list(values)
+
+    def detect(self, frame, camera_id=None):
+        return self.values.pop(0) if self.values else None
+
+    def is_drowsy(self, ear_value):
+        return ear_value < self.ear_threshold
+
+    def release_camera(self, camera_id):
+        pass
+
+class FakePublisher:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, routing_key, event):
+        self.events.append((routing_key, event))
+
+class ClosedCapture:
+    """Captura que nunca abre: a thread da câmera encerra sem ler frames"""
+    fps = 0.0
+
+    def __init__(self, url, config):
+        self.url = url
+
+    def is_opened(self):
+        return False
+
+    def release(self):
+        pass
+
+def make_handler(values=(), session=None, detector=None, min_closed_ms=500, **kwargs):
+    """Handler com fakes; session: camera_id de uma sessão já ativa, sem processor"""
+    handler = CameraEventHandler(detector or FakeDetector(values), FakePublisher(), min_closed_ms,
+                                 capture_factory=ClosedCapture, **kwargs)
+    if session:
+        handler.sessions[session] = DetectionSession(
+            camera_id=session, rtsp_url=f"rtsp://{session}", started_at=datetime.now()
+        )
+    return handler
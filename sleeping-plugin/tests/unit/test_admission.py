@@ -0,0 +1,164 @@
+"""
+Testes Unitários - Controle de admissão
+"""
+import pytest
+from src.application.services.admission import (
+    AdmissionConfig, AdmissionController, AdmissionDecision, AdmissionRejected
+)
+from conftest import FakeDetector, make_handler
+
+def make_controller(**overrides):
+    # 1 worker a 20 ms/frame = 50 FPS de capacidade; 3 câmeras de 15 FPS cabem
+    config = AdmissionConfig(enabled=True, target_utilization=1.0, degraded_fps=5.0,
+                             initial_frame_ms=20.0, **overrides)
+    return AdmissionController(config, workers=1, target_fps=15.0, cpu_load=lambda: 0.0)
+
+def test_accepts_until_budget_then_rejects():
+    admission = make_controller()
+    for i in range(3):
+        assert admission.admit(f"cam-{i}").decision == AdmissionDecision.ACCEPT
+
+    result = admission.admit("cam-3")
+    assert result.decision == AdmissionDecision.REJECT
+    assert not result.admitted
+
+    stats = admission.stats()
+    assert stats["cameras"] == 3 and stats["demand_fps"] == 45.0
+    assert stats["headroom_cameras"] == 0 and not stats["accepting"]
+    assert stats["refused"] == 1
+
+def test_low_priority_cameras_are_degraded_before_refusing():
+    admission = make_controller()
+    admission.admit("low-1", "low")
+    admission.admit("low-2", "low")
+    admission.admit("cam-1")
+
+    result = admission.admit("cam-2")
+    assert result.decision == AdmissionDecision.DEGRADE
+    assert result.degrade == ["low-1"]
+    assert result.fps_cap == 0.0
+    assert admission.stats()["demand_fps"] == 50.0
+
+    # A nova câmera de baixa prioridade entra já degradada
+    result = admission.admit("low-3", "low")
+    assert result.decision == AdmissionDecision.DEGRADE
+    assert result.degrade == ["low-2"] and result.fps_cap == 5.0
+
+    assert admission.admit("cam-3").decision == AdmissionDecision.REJECT
+
+def test_release_restores_degraded_cameras():
+    admission = make_controller()
+    admission.admit("low-1", "low")
+    admission.admit("cam-1")
+    admission.admit("cam-2")
+    assert admission.admit("cam-3").degrade == ["low-1"]
+
+    assert admission.release("cam-3") == ["low-1"]
+    stats = admission.stats()
+    assert stats["degraded"] == 0 and stats["demand_fps"] == 45.0
+
+def test_measured_frame_cost_changes_capacity():
+    admission = make_controller()
+    for _ in range(200):
+        admission.observe(0.1)
+    assert admission.stats()["capacity_fps"] == pytest.approx(10.0, rel=0.05)
+    assert admission.admit("cam-1").decision == AdmissionDecision.REJECT
+
+def test_cpu_and_camera_limits():
+    admission = make_controller(max_cameras=1)
+    admission.admit("cam-1")
+    assert admission.admit("cam-2").reason == "limite de câmeras atingido"
+
+    busy = AdmissionController(AdmissionConfig(enabled=True), 4, 15.0, cpu_load=lambda: 1.5)
+    assert busy.admit("cam-1").reason == "CPU saturada"
+
+def test_disabled_controller_only_tracks_load():
+    admission = AdmissionController(AdmissionConfig(max_cameras=1), 1, 15.0, cpu_load=lambda: 0.0)
+    for i in range(10):
+        assert admission.admit(f"cam-{i}").decision == AdmissionDecision.ACCEPT
+    assert admission.stats()["cameras"] == 10
+
+def test_invalid_overflow_mode():
+    with pytest.raises(ValueError):
+        AdmissionController(AdmissionConfig(overflow="drop"), 1, 15.0)
+
+def admission_handler(**overrides):
+    return make_handler(admission=make_controller(**overrides))
+
+def added(camera_id, priority="normal"):
+    return {"data": {"camera_id": camera_id, "rtsp_url": f"rtsp://{camera_id}", "priority": priority}}
+
+def test_handler_rejects_and_publishes_load():
+    handler = admission_handler()
+    for i in range(4):
+        handler.handle_camera_added(added(f"cam-{i}"))
+
+    assert set(handler.processors) == {"cam-0", "cam-1", "cam-2"}
+    routing_key, event = handler.publisher.events[-1]
+    assert routing_key == "camera.rejected"
+    assert event["camera_id"] == "cam-3"
+    assert event["load"]["cameras"] == 3
+
+def test_handler_caps_fps_of_degraded_cameras():
+    handler = admission_handler()
+    handler.handle_camera_added(added("low-1", "low"))
+    handler.handle_camera_added(added("cam-1"))
+    handler.handle_camera_added(added("cam-2"))
+    handler.handle_camera_added(added("cam-3"))
+
+    assert handler.processors["low-1"].scheduler.current_fps() == 5.0
+    assert handler.processors["cam-3"].scheduler.current_fps() == 15.0
+
+    handler.handle_camera_removed({"data": {"camera_id": "cam-3"}})
+    assert handler.processors["low-1"].scheduler.current_fps() == 15.0
+
+def test_handler_queue_starts_camera_when_capacity_frees():
+    handler = admission_handler(overflow="queue")
+    for i in range(5):
+        handler.handle_camera_added(added(f"cam-{i}"))
+    assert list(handler.admission.pending) == ["cam-3", "cam-4"]
+    assert handler.admission.stats()["refused"] == 2
+
+    handler.handle_camera_removed({"data": {"camera_id": "cam-0"}})
+    assert set(handler.processors) == {"cam-1", "cam-2", "cam-3"}
+    assert list(handler.admission.pending) == ["cam-4"]
+
+    handler.handle_camera_removed({"data": {"camera_id": "cam-4"}})
+    assert not handler.admission.pending
+
+def test_handler_nack_raises_for_requeue():
+    handler = admission_handler(overflow="nack", max_cameras=1)
+    handler.handle_camera_added(added("cam-0"))
+    with pytest.raises(AdmissionRejected):
+        handler.handle_camera_added(added("cam-1"))
+    assert set(handler.processors) == {"cam-0"}
+    assert not [key for key, _ in handler.publisher.events if key == "camera.rejected"]
+
+def test_sync_drops_pending_cameras_outside_snapshot():
+    handler = admission_handler(overflow="queue", max_cameras=1)
+    handler.handle_camera_added(added("cam-0"))
+    handler.handle_camera_added(added("cam-1"))
+    handler.handle_camera_added(added("cam-2"))
+
+    handler.handle_camera_sync({"data": {"cameras": [
+        {"camera_id": "cam-1", "rtsp_url": "rtsp://cam-1"}
+    ]}})
+    assert set(handler.processors) == {"cam-1"}
+    assert not handler.admission.pending
+
+class TimedDetector(FakeDetector):
+    cost_observer = None
+
+def test_backend_that_times_itself_feeds_frame_cost():
+    detector = TimedDetector()
+    handler = make_handler(detector=detector, admission=make_controller())
+    handler.handle_camera_added(added("cam-0"))
+
+    # O handler não mede de novo: o tempo dele inclui checkout, fila e janela do backend
+    assert detector.cost_observer == handler.admission.observe
+    handler._process_frame("cam-0", None)
+    assert handler.admission.frame_cost_s == 0.02
+
+def test_nack_overflow_is_refused_in_cluster_mode():
+    with pytest.raises(ValueError):
+        make_handler(admission=make_controller(overflow="nack"), cluster=object())
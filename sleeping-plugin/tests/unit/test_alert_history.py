@@ -0,0 +1,96 @@
+"""
+Testes Unitários - Histórico de alertas
+"""
+from src.application.services.alert_history import (
+    AlertHistory, AlertHistoryConfig, AlertRing, SqliteAlertStore
+)
+
+def alert(camera_id, timestamp):
+    return {"camera_id": camera_id, "timestamp": float(timestamp), "alert_type": "drowsiness",
+            "priority": "critical", "message": "", "ear": 0.1}
+
+def test_ring_keeps_latest_and_bisects():
+    ring = AlertRing(5)
+    for t in range(12):
+        ring.append(alert("cam-1", t))
+
+    assert ring.oldest == 7
+    assert ring.bisect(9) == 2
+    assert [a["timestamp"] for a in ring.range(8, None, 2)] == [8, 9]
+    assert [a["timestamp"] for a in ring.range(None, None, 2)] == [10, 11]
+    assert [a["timestamp"] for a in ring.range(None, 10, 2)] == [8, 9]
+
+def test_memory_query_by_camera_and_merged():
+    history = AlertHistory(AlertHistoryConfig(per_camera=100))
+    for t in range(10):
+        history.record(alert("cam-1" if t % 2 else "cam-2", t))
+
+    assert [a["timestamp"] for a in history.query("cam-1", since=4)] == [5, 7, 9]
+    assert [a["timestamp"] for a in history.query(limit=3)] == [7, 8, 9]
+    assert [a["timestamp"] for a in history.query(since=2, until=6)] == [2, 3, 4, 5]
+    assert history.query("cam-9") == []
+    assert history.stats()["in_memory"] == 10
+
+def test_older_ranges_fall_back_to_sqlite(tmp_path):
+    store = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    history = AlertHistory(AlertHistoryConfig(per_camera=3), store)
+    for t in range(10):
+        history.record(alert("cam-1", t))
+    store.close()
+
+    reopened = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    history.store = reopened
+    try:
+        assert [a["timestamp"] for a in history.query("cam-1", since=1, limit=3)] == [1, 2, 3]
+        assert [a["timestamp"] for a in history.query("cam-1", since=8)] == [8, 9]
+        assert [a["timestamp"] for a in history.query(limit=5)] == [5, 6, 7, 8, 9]
+    finally:
+        reopened.close()
+
+def test_restart_does_not_trust_partial_rings(tmp_path):
+    store = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    history = AlertHistory(AlertHistoryConfig(per_camera=100), store)
+    for t in range(4):
+        history.record(alert("cam-1" if t % 2 else "cam-2", t))
+    store.close()
+
+    reopened = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    history = AlertHistory(AlertHistoryConfig(per_camera=100), reopened)
+    history.record(alert("cam-1", 10))
+    reopened.close()
+
+    history.store = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    try:
+        # O ring novo de cam-1 não tem os alertas de antes do restart, e cam-2 nem tem ring
+        assert [a["timestamp"] for a in history.query("cam-1")] == [1, 3, 10]
+        assert [a["timestamp"] for a in history.query(since=0)] == [0, 1, 2, 3, 10]
+        assert [a["timestamp"] for a in history.query(limit=2)] == [3, 10]
+    finally:
+        history.close()
+
+def test_released_camera_leaves_memory_but_stays_queryable(tmp_path):
+    store = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    history = AlertHistory(AlertHistoryConfig(per_camera=100), store)
+    for t in range(4):
+        history.record(alert("cam-1" if t % 2 else "cam-2", t))
+    history.release_camera("cam-1")
+    store.close()
+
+    history.store = SqliteAlertStore(str(tmp_path / "alerts.db"))
+    try:
+        assert history.stats()["cameras"] == 1 and history.stats()["in_memory"] == 2
+        assert [a["timestamp"] for a in history.query(since=0)] == [0, 1, 2, 3]
+        assert [a["timestamp"] for a in history.query("cam-1")] == [1, 3]
+        # Com since depois do último alerta de cam-1, a memória responde sozinha
+        history.store.close()
+        assert [a["timestamp"] for a in history.query(since=3.5)] == []
+    finally:
+        history.store = None
+
+def test_release_without_store_drops_the_ring():
+    history = AlertHistory(AlertHistoryConfig(per_camera=100))
+    history.record(alert("cam-1", 1))
+    history.release_camera("cam-1")
+
+    assert history.query("cam-1") == []
+    assert history.stats() == {"cameras": 0, "recorded": 1, "in_memory": 0, "persistent": False}
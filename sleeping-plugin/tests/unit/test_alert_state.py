@@ -0,0 +1,78 @@
+"""
+Testes Unitários - AlertStateMachine
+"""
+from src.domain.entities.alert_state import AlertAction, AlertPolicy, AlertState, AlertStateMachine
+
+POLICY = AlertPolicy(min_closed_ms=500, cooldown_ms=2000, update_interval_ms=0)
+
+def test_alert_fires_once_per_episode():
+    machine = AlertStateMachine()
+
+    assert machine.update(True, 200, 10.2, POLICY) is None
+    assert machine.state == AlertState.CLOSING
+    assert machine.update(True, 600, 10.6, POLICY) == AlertAction.ALERT
+    assert [machine.update(True, ms, 10 + ms / 1000, POLICY) for ms in (700, 900, 3000)] == [None, None, None]
+    assert machine.state == AlertState.ALERTING
+    assert machine.episodes == 1
+
+def test_short_closure_returns_to_idle():
+    machine = AlertStateMachine()
+
+    machine.update(True, 300, 10.3, POLICY)
+    machine.update(False, 0, 10.4, POLICY)
+
+    assert machine.state == AlertState.IDLE
+
+def test_reclosure_during_cooldown_stays_in_same_episode():
+    machine = AlertStateMachine()
+    machine.update(True, 600, 10.6, POLICY)
+    machine.update(False, 0, 11.0, POLICY)
+    assert machine.state == AlertState.COOLDOWN
+
+    assert machine.update(True, 800, 12.0, POLICY) is None
+    assert machine.state == AlertState.ALERTING
+    assert machine.episodes == 1
+
+def test_new_episode_after_cooldown():
+    machine = AlertStateMachine()
+    machine.update(True, 600, 10.6, POLICY)
+    machine.update(False, 0, 11.0, POLICY)
+    machine.update(False, 0, 13.1, POLICY)
+    assert machine.state == AlertState.IDLE
+
+    assert machine.update(True, 600, 20.0, POLICY) == AlertAction.ALERT
+    assert machine.episodes == 2
+
+def test_periodic_updates_respect_interval():
+    policy = AlertPolicy(min_closed_ms=500, cooldown_ms=2000, update_interval_ms=1000)
+    machine = AlertStateMachine()
+
+    actions = [machine.update(True, (t - 10.0) * 1000, t, policy) for t in (10.6, 11.0, 11.6, 12.0, 12.7)]
+
+    assert actions == [AlertAction.ALERT, None, AlertAction.UPDATE, None, AlertAction.UPDATE]
+
+def test_first_closed_frame_counts_as_closed():
+    # O primeiro frame fechado tem 0 ms de fechamento, mas não é um frame aberto
+    machine = AlertStateMachine()
+    assert machine.update(True, 0, 10.0, POLICY) is None
+    assert machine.state == AlertState.CLOSING
+
+    machine.update(True, 600, 10.6, POLICY)
+    machine.update(False, 0, 11.0, POLICY)
+    machine.update(True, 0, 12.5, POLICY)
+    assert machine.state == AlertState.COOLDOWN
+
+    # Começou dentro do cooldown: segue no mesmo episódio mesmo passando de cooldown_until
+    assert machine.update(True, 600, 13.1, POLICY) is None
+    assert machine.episodes == 1
+
+def test_closure_starting_after_cooldown_is_a_new_episode():
+    machine = AlertStateMachine()
+    machine.update(True, 600, 10.6, POLICY)
+    machine.update(False, 0, 11.0, POLICY)
+
+    # Sem frame aberto depois de cooldown_until (13.0): vale o início do fechamento
+    assert machine.update(True, 0, 13.5, POLICY) is None
+    assert machine.state == AlertState.CLOSING
+    assert machine.update(True, 600, 14.1, POLICY) == AlertAction.ALERT
+    assert machine.episodes == 2
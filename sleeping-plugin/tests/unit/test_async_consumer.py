@@ -0,0 +1,173 @@
+"""
+Testes Unitários - AsyncEventConsumer
+"""
+import asyncio
+import json
+import threading
+from src.infrastructure.messaging.async_consumer import AsyncEventConsumer
+from src.infrastructure.messaging.consumer import RabbitMQConfig
+
+class FakeMessage:
+    content_type = "application/json"
+
+    def __init__(self, payload):
+        self.body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.result = None
+
+    async def ack(self):
+        self.result = "ack"
+
+    async def nack(self, requeue=True):
+        self.result = "nack"
+
+    async def reject(self, requeue=False):
+        self.result = "reject"
+
+def make_consumer(concurrency=8, requeue_delay_s=0.0):
+    config = RabbitMQConfig(host="localhost", port=5672, username="guest", password="guest",
+                            exchange="vms.events", queue="q", routing_keys=[],
+                            prefetch_count=64, max_concurrency=concurrency,
+                            requeue_delay_s=requeue_delay_s)
+    return AsyncEventConsumer(config)
+
+def event(event_type, camera_id):
+    return {"event_type": event_type, "data": {"camera_id": camera_id}}
+
+def test_slow_handler_does_not_stall_other_cameras():
+    consumer = make_consumer()
+    finished = []
+    lock = threading.Lock()
+    all_added = threading.Event()
+
+    def slow_remove(message):
+        # Só termina depois que todas as outras câmeras foram tratadas: se elas
+        # esperassem este handler, o wait estouraria e a ordem seria outra
+        all_added.wait(timeout=5)
+        with lock:
+            finished.append(("removed", message["data"]["camera_id"]))
+
+    def add(message):
+        with lock:
+            finished.append(("added", message["data"]["camera_id"]))
+            if len(finished) == 10:
+                all_added.set()
+
+    consumer.register_handler("camera.removed", slow_remove)
+    consumer.register_handler("camera.added", add)
+
+    async def run():
+        messages = [FakeMessage(event("camera.removed", "cam-1"))] + [
+            FakeMessage(event("camera.added", f"cam-{i}")) for i in range(2, 12)
+        ]
+        await asyncio.gather(*(consumer._on_message(m) for m in messages))
+        return messages
+
+    messages = asyncio.run(run())
+
+    assert all(m.result == "ack" for m in messages)
+    assert all_added.is_set()
+    assert finished[-1] == ("removed", "cam-1")
+    assert consumer._camera_locks == {}
+
+def test_events_of_same_camera_keep_delivery_order():
+    consumer = make_consumer()
+    order = []
+    entered = threading.Event()
+    release = threading.Event()
+
+    def handler(message):
+        if message["event_type"] == "camera.added":
+            entered.set()
+            release.wait(timeout=5)
+        order.append(message["event_type"])
+
+    consumer.register_handler("camera.added", handler)
+    consumer.register_handler("camera.removed", handler)
+
+    async def run():
+        added = asyncio.ensure_future(consumer._on_message(FakeMessage(event("camera.added", "cam-1"))))
+        await asyncio.get_running_loop().run_in_executor(None, entered.wait, 5)
+        removed = asyncio.ensure_future(consumer._on_message(FakeMessage(event("camera.removed", "cam-1"))))
+        # Libera o added só quando o removed já está esperando o lock da câmera
+        while consumer._lock_users.get("cam-1") != 2:
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(added, removed)
+
+    asyncio.run(run())
+    assert order == ["camera.added", "camera.removed"]
+
+def test_camera_sync_is_ordered_with_camera_events():
+    consumer = make_consumer()
+    order = []
+    entered = threading.Event()
+    release = threading.Event()
+
+    def handler(message):
+        if message["event_type"] == "camera.added":
+            entered.set()
+            release.wait(timeout=5)
+        order.append(message["event_type"])
+
+    for event_type in ("camera.added", "camera.sync", "camera.removed"):
+        consumer.register_handler(event_type, handler)
+
+    async def run():
+        added = asyncio.ensure_future(consumer._on_message(FakeMessage(event("camera.added", "cam-1"))))
+        await asyncio.get_running_loop().run_in_executor(None, entered.wait, 5)
+        sync = asyncio.ensure_future(consumer._on_message(FakeMessage({"event_type": "camera.sync", "data": {}})))
+        removed = asyncio.ensure_future(consumer._on_message(FakeMessage(event("camera.removed", "cam-2"))))
+        # Sem a ordenação, sync e removed de outra câmera rodariam durante o added
+        await asyncio.sleep(0.1)
+        release.set()
+        await asyncio.gather(added, sync, removed)
+
+    asyncio.run(run())
+    assert order == ["camera.added", "camera.sync", "camera.removed"]
+    assert consumer._inflight == set() and consumer._barrier is None
+
+def test_failed_handler_nacks_and_invalid_message_is_rejected():
+    consumer = make_consumer()
+
+    def failing(message):
+        raise RuntimeError("falhou")
+
+    consumer.register_handler("camera.added", failing)
+    failed = FakeMessage(event("camera.added", "cam-1"))
+    invalid = FakeMessage(b"{nao-json")
+    unknown = FakeMessage(event("camera.unknown", "cam-1"))
+
+    async def run():
+        for message in (failed, invalid, unknown):
+            await consumer._on_message(message)
+
+    asyncio.run(run())
+    assert (failed.result, invalid.result, unknown.result) == ("nack", "reject", "ack")
+
+def test_requeue_waits_without_holding_the_camera_lock():
+    consumer = make_consumer(requeue_delay_s=0.2)
+    handled = []
+    failed_once = threading.Event()
+
+    def failing(message):
+        failed_once.set()
+        raise RuntimeError("falhou")
+
+    consumer.register_handler("camera.added", failing)
+    consumer.register_handler("camera.removed", lambda message: handled.append(message["event_type"]))
+    failed = FakeMessage(event("camera.added", "cam-1"))
+    removed = FakeMessage(event("camera.removed", "cam-1"))
+
+    async def run():
+        pending = asyncio.ensure_future(consumer._on_message(failed))
+        await asyncio.get_running_loop().run_in_executor(None, failed_once.wait, 5)
+        while consumer._camera_locks:
+            await asyncio.sleep(0)
+        # O evento seguinte da mesma câmera é tratado enquanto o que falhou ainda espera
+        await consumer._on_message(removed)
+        assert failed.result is None
+        await pending
+
+    asyncio.run(run())
+    assert handled == ["camera.removed"]
+    assert (failed.result, removed.result) == ("nack", "ack")
@@ -0,0 +1,88 @@
+"""
+Testes Unitários - BatchInferenceStage
+"""
+import threading
+from src.infrastructure.ml.batch_stage import BatchInferenceStage, BatchStageConfig
+
+class FakeBackend:
+    ear_threshold = 0.2
+    size = 1
+
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+
+    def detect_batch(self, frames, camera_ids):
+        self.batches.append(list(camera_ids))
+        return [frame * 2 for frame in frames]
+
+    def is_drowsy(self, ear_value):
+        return ear_value < self.ear_threshold
+
+    def release_camera(self, camera_id):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def test_detect_returns_backend_result():
+    backend = FakeBackend()
+    stage = BatchInferenceStage(backend, BatchStageConfig(max_batch=4, window_ms=1))
+
+    assert stage.detect(0.1, "cam-001") == 0.2
+    assert stage.ear_threshold == 0.2
+
+    stage.close()
+    assert backend.closed
+
+def test_frames_are_grouped_within_window():
+    backend = FakeBackend()
+    stage = BatchInferenceStage(backend, BatchStageConfig(max_batch=8, window_ms=200))
+
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, stage.detect(i, f"cam-{i}")))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0: 0, 1: 2, 2: 4, 3: 6}
+    assert stage.stats()["batch"]["largest_batch"] > 1
+    stage.close()
+
+def test_batch_size_is_capped():
+    backend = FakeBackend()
+    stage = BatchInferenceStage(backend, BatchStageConfig(max_batch=2, window_ms=200))
+
+    threads = [threading.Thread(target=stage.detect, args=(i, f"cam-{i}")) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(len(batch) for batch in backend.batches) <= 2
+    stage.close()
+
+class TimedBackend(FakeBackend):
+    cost_observer = None
+
+def test_frame_cost_is_measured_once_per_batch_or_by_the_backend():
+    backend = FakeBackend()
+    stage = BatchInferenceStage(backend, BatchStageConfig(max_batch=4, window_ms=1))
+    costs = []
+    stage.cost_observer = costs.append
+    stage.detect(0.1, "cam-001")
+    stage.close()
+    assert len(costs) == 1
+
+    timed = TimedBackend()
+    stage = BatchInferenceStage(timed, BatchStageConfig(max_batch=4, window_ms=1))
+    stage.cost_observer = costs.append
+    stage.detect(0.1, "cam-001")
+    stage.close()
+    # Backend que se mede recebe o observer; o estágio não conta a janela de novo
+    assert timed.cost_observer == costs.append
+    assert len(costs) == 1
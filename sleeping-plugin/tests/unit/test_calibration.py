@@ -0,0 +1,110 @@
+"""
+Testes Unitários - Calibração de EAR
+"""
+import random
+from datetime import datetime
+from src.domain.entities.detection_session import DetectionSession
+from src.domain.services.calibration import CalibrationConfig, EarCalibrator, P2Quantile
+from src.infrastructure.storage.baseline_store import BaselineStore
+from conftest import make_handler
+
+CONFIG = CalibrationConfig(enabled=True, duration_s=2, min_samples=20, ratio=0.75)
+
+def test_p2_quantiles_track_exact_quantiles():
+    rng = random.Random(7)
+    samples = [rng.gauss(0.3, 0.03) for _ in range(5000)]
+    estimators = {p: P2Quantile(p) for p in (0.1, 0.5, 0.9)}
+    for x in samples:
+        for estimator in estimators.values():
+            estimator.add(x)
+
+    ordered = sorted(samples)
+    for p, estimator in estimators.items():
+        exact = ordered[int(p * (len(ordered) - 1))]
+        assert abs(estimator.value - exact) < 0.003
+
+def test_p2_with_few_samples():
+    estimator = P2Quantile(0.5)
+    for x in (0.3, 0.1, 0.2):
+        estimator.add(x)
+
+    assert estimator.value == 0.2
+
+def test_calibrator_needs_time_and_samples():
+    calibrator = EarCalibrator()
+    done = [calibrator.add(i * 0.1, 0.32, CONFIG) for i in range(25)]
+
+    assert done.index(True) == 20
+    baseline = calibrator.baseline(CONFIG)
+    assert baseline["ear_p50"] == 0.32
+    assert baseline["threshold"] == 0.24
+
+def test_threshold_is_clamped():
+    calibrator = EarCalibrator()
+    calibrator.add(0.0, 0.1, CONFIG)
+
+    assert calibrator.baseline(CONFIG)["threshold"] == CONFIG.min_threshold
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    BaselineStore(path).save("cam-1", {"threshold": 0.22})
+
+    store = BaselineStore(path)
+    assert store.get("cam-1") == {"threshold": 0.22}
+    store.delete("cam-1")
+    assert BaselineStore(path).get("cam-1") is None
+
+def test_corrupt_store_starts_empty(tmp_path):
+    path = tmp_path / "baselines.json"
+    path.write_text("{")
+
+    assert BaselineStore(str(path)).get("cam-1") is None
+
+def calibrating_handler(values, store):
+    handler = make_handler(values, calibration_config=CONFIG, baseline_store=store)
+    session = DetectionSession(camera_id="cam-1", rtsp_url="rtsp://a", started_at=datetime.now())
+    handler._apply_baseline(session)
+    handler.sessions["cam-1"] = session
+    return handler
+
+def test_handler_calibrates_and_persists(tmp_path):
+    store = BaselineStore(str(tmp_path / "baselines.json"))
+    handler = calibrating_handler([0.4] * 21 + [0.25], store)
+
+    for i in range(22):
+        handler._process_frame("cam-1", None, 10.0 + i * 0.1)
+
+    session = handler.sessions["cam-1"]
+    assert session.calibrator is None
+    assert session.ear_threshold == 0.3
+    # 0.25 está acima do limiar global (0.2), mas abaixo do calibrado
+    assert session.closed_since is not None
+    assert store.get("cam-1")["threshold"] == 0.3
+
+def test_handler_reuses_stored_baseline(tmp_path):
+    store = BaselineStore(str(tmp_path / "baselines.json"))
+    store.save("cam-1", {"threshold": 0.27})
+
+    handler = calibrating_handler([], store)
+
+    session = handler.sessions["cam-1"]
+    assert session.calibrator is None
+    assert session.ear_threshold == 0.27
+
+def test_scheduler_boost_follows_session_threshold(tmp_path):
+    store = BaselineStore(str(tmp_path / "baselines.json"))
+    store.save("cam-1", {"threshold": 0.27})
+    handler = make_handler(calibration_config=CONFIG, baseline_store=store)
+    event = {"data": {"camera_id": "cam-1", "rtsp_url": "rtsp://a"}}
+
+    handler.handle_camera_added(event)
+    scheduler = handler.processors["cam-1"].scheduler
+    assert scheduler.ear_threshold == 0.27
+
+    # Recalibração: volta ao limiar global e depois segue o calibrado
+    handler.detector.values = [0.4] * 21 + [0.25]
+    handler.handle_camera_added({"data": dict(event["data"], recalibrate=True)})
+    assert scheduler.ear_threshold == 0.2
+    for i in range(22):
+        handler._process_frame("cam-1", None, 10.0 + i * 0.1)
+    assert scheduler.ear_threshold == 0.3
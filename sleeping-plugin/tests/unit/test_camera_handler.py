@@ -0,0 +1,178 @@
+"""
+Testes Unitários - CameraEventHandler
+"""
+import threading
+import time
+from src.application.handlers import camera_handler
+from conftest import FakeDetector, make_handler
+
+def test_alert_uses_elapsed_time_not_frames():
+    handler = make_handler([0.1, 0.1, 0.1], "cam-001")
+
+    handler._process_frame("cam-001", None, 10.0)
+    handler._process_frame("cam-001", None, 10.2)
+    assert handler.publisher.events == []
+
+    handler._process_frame("cam-001", None, 10.6)
+    routing_key, event = handler.publisher.events[0]
+    assert routing_key == "drowsiness.detected"
+    assert event["duration_ms"] == 600
+
+def test_open_eyes_reset_closure():
+    handler = make_handler([0.1, 0.3, 0.1], "cam-001")
+
+    handler._process_frame("cam-001", None, 10.0)
+    handler._process_frame("cam-001", None, 10.4)
+    handler._process_frame("cam-001", None, 10.8)
+
+    assert handler.publisher.events == []
+
+def test_process_frame_returns_ear():
+    handler = make_handler([None, 0.3], "cam-001")
+
+    assert handler._process_frame("cam-001", None, 1.0) is None
+    assert handler._process_frame("cam-001", None, 1.1) == 0.3
+
+def test_camera_added_is_idempotent_for_same_url():
+    handler = make_handler()
+    event = {"data": {"camera_id": "cam-002", "rtsp_url": "rtsp://cam/1"}}
+
+    handler.handle_camera_added(event)
+    processor = handler.processors["cam-002"]
+    handler.handle_camera_added(event)
+    assert handler.processors["cam-002"] is processor
+
+    handler.handle_camera_added({"data": {"camera_id": "cam-002", "rtsp_url": "rtsp://cam/2"}})
+    assert handler.processors["cam-002"] is not processor
+    assert handler.sessions["cam-002"].rtsp_url == "rtsp://cam/2"
+
+    handler.handle_camera_removed({"data": {"camera_id": "cam-002"}})
+    assert handler.processors == {}
+
+def test_camera_sync_applies_only_the_difference():
+    handler = make_handler()
+    handler.handle_camera_added({"data": {"camera_id": "cam-1", "rtsp_url": "rtsp://a"}})
+    handler.handle_camera_added({"data": {"camera_id": "cam-2", "rtsp_url": "rtsp://b"}})
+    kept = handler.processors["cam-1"]
+
+    handler.handle_camera_sync({"data": {"cameras": [
+        {"camera_id": "cam-1", "rtsp_url": "rtsp://a"},
+        {"camera_id": "cam-3", "rtsp_url": "rtsp://c"}
+    ]}})
+
+    assert set(handler.processors) == {"cam-1", "cam-3"}
+    assert handler.processors["cam-1"] is kept
+
+    handler.handle_camera_sync({"data": {"cameras": []}})
+    assert handler.processors == {} and handler.sessions == {}
+
+def test_sustained_closure_publishes_one_alert():
+    handler = make_handler([0.1] * 20, "cam-001")
+
+    for i in range(20):
+        handler._process_frame("cam-001", None, 10.0 + i * 0.1)
+
+    keys = [key for key, _ in handler.publisher.events]
+    assert keys == ["drowsiness.detected", "alert.triggered"]
+    assert handler.sessions["cam-001"].total_alerts == 1
+
+def test_periodic_updates_during_episode():
+    from src.domain.entities.alert_state import AlertPolicy
+
+    handler = make_handler([0.1] * 20, "cam-001", alert_policy=AlertPolicy(update_interval_ms=500))
+
+    for i in range(20):
+        handler._process_frame("cam-001", None, 10.0 + i * 0.1)
+
+    keys = [key for key, _ in handler.publisher.events]
+    assert keys.count("alert.triggered") == 1
+    assert keys.count("drowsiness.detected") == 3
+
+class MeasuringDetector(FakeDetector):
+    def measure(self, frame, camera_id=None):
+        return self.values.pop(0)
+
+def test_yawns_from_measure_trigger_fatigue_alert():
+    from src.domain.services.fatigue import FatigueConfig
+
+    measures = ([(0.3, 0.8)] * 12 + [(0.3, 0.2)] * 3) * 2
+    handler = make_handler(session="cam-001", detector=MeasuringDetector(measures),
+                           fatigue_config=FatigueConfig(yawn_min_ms=1000, yawn_limit=2))
+
+    for i in range(len(measures)):
+        handler._process_frame("cam-001", None, 10.0 + i * 0.1)
+
+    alerts = [event for key, event in handler.publisher.events if key == "alert.triggered"]
+    assert [alert["alert_type"] for alert in alerts] == ["fatigue"]
+    session = handler.sessions["cam-001"]
+    assert session.fatigue.yawns_total == 2
+    # Fadiga tem contador próprio: total_alerts conta só episódios de sonolência
+    assert (session.total_alerts, session.fatigue_alerts) == (0, 1)
+
+def test_stats_are_maintained_incrementally():
+    handler = make_handler([0.1] * 10)
+    handler.handle_camera_added({"data": {"camera_id": "cam-1", "rtsp_url": "rtsp://a"}})
+    handler.handle_camera_added({"data": {"camera_id": "cam-2", "rtsp_url": "rtsp://b"}})
+
+    for i in range(10):
+        handler._process_frame("cam-1", None, 10.0 + i * 0.1)
+    assert handler.stats.snapshot()["alerts"] == 1
+
+    handler.handle_camera_removed({"data": {"camera_id": "cam-1"}})
+
+    snapshot = handler.stats.snapshot()
+    assert snapshot["total"] == 1
+    assert snapshot["active"] == 1
+    assert snapshot["alerts"] == 1
+
+class RecordingProcessor:
+    """StreamProcessor falso: registra starts/stops e cede a vez para expor corridas"""
+    created = []
+
+    def __init__(self, camera_id, **kwargs):
+        self.camera_id = camera_id
+        self.scheduler = kwargs["scheduler"]
+        self.started = self.stopped = False
+        RecordingProcessor.created.append(self)
+        # Alarga a janela entre a checagem de processors e a gravação no dicionário
+        time.sleep(0.0005)
+
+    def start(self, delay=0.0):
+        self.started = True
+
+    def request_stop(self):
+        pass
+
+    def stop(self):
+        time.sleep(0.0005)
+        self.stopped = True
+
+def test_concurrent_added_removed_and_sync_do_not_leak_processors(monkeypatch):
+    monkeypatch.setattr(camera_handler, "StreamProcessor", RecordingProcessor)
+    RecordingProcessor.created = []
+    handler = make_handler()
+    snapshot = {"data": {"cameras": [{"camera_id": "cam-1", "rtsp_url": "rtsp://a"}]}}
+    barrier = threading.Barrier(3)
+
+    def run(action):
+        barrier.wait()
+        for _ in range(100):
+            action()
+
+    threads = [
+        threading.Thread(target=run, args=(lambda: handler.handle_camera_added(
+            {"data": {"camera_id": "cam-1", "rtsp_url": "rtsp://a"}}),)),
+        threading.Thread(target=run, args=(lambda: handler.handle_camera_removed(
+            {"data": {"camera_id": "cam-1"}}),)),
+        threading.Thread(target=run, args=(lambda: handler.handle_camera_sync(snapshot),))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Todo processor criado ou está no dicionário ou foi parado, e nenhum foi parado duas vezes
+    running = [p for p in RecordingProcessor.created if not p.stopped]
+    assert running == list(handler.processors.values())
+    assert set(handler.processors) == set(handler.sessions)
+    assert handler.stats.snapshot()["total"] == len(handler.sessions)
@@ -0,0 +1,40 @@
+"""
+Testes Unitários - Camera Sync
+"""
+from src.domain.services.camera_sync import diff_cameras, stagger_delays
+
+def test_diff_starts_stops_and_restarts_only_changes():
+    running = {"cam-1": "rtsp://a", "cam-2": "rtsp://b", "cam-3": "rtsp://c"}
+    desired = [
+        {"camera_id": "cam-1", "rtsp_url": "rtsp://a"},
+        {"camera_id": "cam-2", "rtsp_url": "rtsp://b2"},
+        {"camera_id": "cam-4", "rtsp_url": "rtsp://d"}
+    ]
+
+    plan = diff_cameras(running, desired)
+
+    assert [c["camera_id"] for c in plan.to_start] == ["cam-4"]
+    assert [c["camera_id"] for c in plan.to_restart] == ["cam-2"]
+    assert plan.to_stop == ["cam-3"]
+    assert plan.unchanged == 1
+
+def test_diff_skips_invalid_and_duplicate_entries():
+    desired = [
+        {"camera_id": "cam-1", "rtsp_url": "rtsp://a"},
+        {"camera_id": "cam-1", "rtsp_url": "rtsp://other"},
+        {"camera_id": "cam-2"},
+        {"rtsp_url": "rtsp://x"}
+    ]
+
+    plan = diff_cameras({}, desired)
+
+    assert [c["camera_id"] for c in plan.to_start] == ["cam-1"]
+    assert plan.invalid == 3
+
+def test_same_snapshot_is_a_no_op():
+    plan = diff_cameras({"cam-1": "rtsp://a"}, [{"camera_id": "cam-1", "rtsp_url": "rtsp://a"}])
+    assert plan.is_empty
+
+def test_stagger_delays_in_bursts():
+    assert stagger_delays(5, 2, 0.5) == [0.0, 0.0, 0.5, 0.5, 1.0]
+    assert stagger_delays(0, 8, 0.25) == []
@@ -0,0 +1,47 @@
+"""
+Testes Unitários - Capture
+"""
+import os
+import cv2
+from src.infrastructure.video.capture import (
+    CaptureConfig, configure_capture, resolve_stream_url, _ffmpeg_options, _opencv_hw_accel
+)
+
+def test_substream_url_from_event_wins():
+    config = CaptureConfig(substream_from="/101", substream_to="/102")
+
+    url = resolve_stream_url("rtsp://cam/101", config, "rtsp://cam/sub")
+    assert url == "rtsp://cam/sub"
+
+def test_substream_url_derived_from_pattern():
+    config = CaptureConfig(substream_from="/101", substream_to="/102")
+
+    assert resolve_stream_url("rtsp://cam/Streaming/Channels/101", config) == "rtsp://cam/Streaming/Channels/102"
+    assert resolve_stream_url("rtsp://cam/main", config) == "rtsp://cam/main"
+
+def test_only_pyav_delivers_rgb():
+    assert CaptureConfig(backend="pyav", rgb_output=True).delivers_rgb
+    assert not CaptureConfig(backend="opencv", rgb_output=True).delivers_rgb
+
+def test_ffmpeg_low_latency_options():
+    options = _ffmpeg_options(CaptureConfig(rtsp_transport="tcp", low_latency=True))
+
+    assert options["rtsp_transport"] == "tcp"
+    assert options["fflags"] == "nobuffer"
+    assert _ffmpeg_options(CaptureConfig(rtsp_transport="", low_latency=False)) == {}
+
+def test_configure_capture_sets_ffmpeg_options_once(monkeypatch):
+    monkeypatch.delenv("OPENCV_FFMPEG_CAPTURE_OPTIONS", raising=False)
+
+    configure_capture(CaptureConfig(backend="pyav"))
+    assert "OPENCV_FFMPEG_CAPTURE_OPTIONS" not in os.environ
+
+    configure_capture(CaptureConfig(rtsp_transport="udp", low_latency=False))
+    assert os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] == "rtsp_transport;udp"
+
+def test_opencv_hw_accel_honors_configured_value():
+    assert _opencv_hw_accel("") is None
+    assert _opencv_hw_accel("vaapi") == cv2.VIDEO_ACCELERATION_VAAPI
+    assert _opencv_hw_accel("QSV") == cv2.VIDEO_ACCELERATION_MFX
+    assert _opencv_hw_accel("none") == cv2.VIDEO_ACCELERATION_NONE
+    assert _opencv_hw_accel("cuda") == cv2.VIDEO_ACCELERATION_ANY
@@ -0,0 +1,196 @@
+"""
+Testes Unitários - Sharding de câmeras
+"""
+import threading
+from src.domain.services.hash_ring import HashRing
+from src.application.services.cluster import HEARTBEAT, LEAVE, ClusterConfig, ClusterMembership, cluster_message
+from conftest import FakePublisher, make_handler
+
+CAMERAS = [f"cam-{i}" for i in range(300)]
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def heartbeat(node_id, seq=0, sent=0.0, boot="boot-1"):
+    return cluster_message(HEARTBEAT, {"node_id": node_id, "boot_id": boot, "seq": seq, "sent_mono": sent})
+
+def leave(node_id, boot="boot-1"):
+    return cluster_message(LEAVE, {"node_id": node_id, "boot_id": boot})
+
+def test_ring_spreads_and_moves_only_the_leaving_nodes_cameras():
+    three = HashRing(["a", "b", "c"])
+    two = HashRing(["a", "b"])
+
+    owners = {camera: three.owner(camera) for camera in CAMERAS}
+    counts = {node: list(owners.values()).count(node) for node in "abc"}
+    assert all(60 < count < 140 for count in counts.values())
+
+    moved = [camera for camera in CAMERAS if owners[camera] != two.owner(camera)]
+    assert moved and all(owners[camera] == "c" for camera in moved)
+
+def make_member(node_id, clock):
+    return ClusterMembership(ClusterConfig(enabled=True, node_id=node_id, dead_after_s=6), FakePublisher(), clock)
+
+def test_membership_waits_for_peers_then_expires_dead_ones():
+    clock = FakeClock()
+    member = make_member("a", clock)
+    changes = []
+    member.on_change = lambda: changes.append(list(member.ring.nodes))
+    member._started_at = 0.0
+
+    member.tick()
+    assert not member.ready and not member.owns(CAMERAS[0])
+
+    member.handle_heartbeat(heartbeat("b"))
+    clock.now = 6.0
+    member.tick()
+    assert member.ready
+    assert changes == [["a", "b"]]
+
+    clock.now = 20.0
+    member.tick()
+    assert changes[-1] == ["a"]
+    assert all(member.owns(camera) for camera in CAMERAS)
+    assert member.publisher.events[0][0] == HEARTBEAT
+
+def test_stale_and_repeated_heartbeats_are_ignored():
+    clock = FakeClock()
+    member = make_member("a", clock)
+    # O relógio do remetente está 1000 s à frente: só a diferença entre entregas importa
+    member.handle_heartbeat(heartbeat("b", seq=0, sent=1000.0))
+
+    clock.now = 10.0
+    member.handle_heartbeat(heartbeat("b", seq=0, sent=1010.0))
+    member.handle_heartbeat(heartbeat("b", seq=1, sent=1002.0))
+    assert member._peers["b"] == 0.0
+
+    member.handle_heartbeat(heartbeat("b", seq=2, sent=1009.0))
+    assert member._peers["b"] == 10.0
+
+def test_restart_retires_the_old_boot():
+    clock = FakeClock()
+    member = make_member("a", clock)
+    member.handle_heartbeat(heartbeat("b", boot="boot-1"))
+    member.handle_heartbeat(heartbeat("b", boot="boot-2"))
+
+    # Mensagens do boot anterior (ex.: reenviadas do spool) não mexem no nó reiniciado
+    member.handle_leave(leave("b", boot="boot-1"))
+    clock.now = 10.0
+    member.handle_heartbeat(heartbeat("b", seq=5, sent=10.0, boot="boot-1"))
+    assert member.ring.nodes == ["a", "b"]
+    assert member._peers["b"] == 0.0
+
+    member.handle_leave(leave("b", boot="boot-2"))
+    assert member.ring.nodes == ["a"]
+
+def last_heartbeat(member):
+    return next(event for key, event in reversed(member.publisher.events) if key == HEARTBEAT)
+
+def test_joining_node_enters_the_ring_only_when_ready():
+    clock = FakeClock()
+    a = make_member("a", clock)
+    a._started_at = 0.0
+    clock.now = 6.0
+    a.tick()
+    b = make_member("b", clock)
+    b._started_at = 6.0
+    members = (a, b)
+
+    def unowned():
+        return [camera for camera in CAMERAS if not any(member.owns(camera) for member in members)]
+
+    def exchange():
+        a.handle_heartbeat(last_heartbeat(b))
+        b.handle_heartbeat(last_heartbeat(a))
+
+    b.tick()
+    exchange()
+    assert last_heartbeat(b)["data"]["ready"] is False
+    # b ainda não pode assumir câmeras: a continua com todas
+    assert a.ring.nodes == ["a"] and b.ring.nodes == ["a", "b"]
+    assert unowned() == []
+
+    clock.now = 12.0
+    a.tick()
+    b.tick()
+    assert b.ready and unowned() == []
+
+    exchange()
+    assert a.ring.nodes == b.ring.nodes == ["a", "b"]
+    assert unowned() == []
+    assert not any(a.owns(camera) and b.owns(camera) for camera in CAMERAS)
+
+def make_node(node_id, peers, clock):
+    member = make_member(node_id, clock)
+    for peer in peers:
+        member.handle_heartbeat(heartbeat(peer))
+    member.ready = True
+    handler = make_handler(cluster=member)
+    member.on_change = handler.rebalance
+    return handler
+
+def test_nodes_start_only_owned_cameras_and_take_over_dead_peer():
+    clock = FakeClock()
+    a = make_node("a", ["b"], clock)
+    b = make_node("b", ["a"], clock)
+    snapshot = {"data": {"cameras": [{"camera_id": c, "rtsp_url": f"rtsp://{c}"} for c in CAMERAS[:40]]}}
+
+    a.handle_camera_sync(snapshot)
+    b.handle_camera_sync(snapshot)
+
+    assert set(a.processors).isdisjoint(b.processors)
+    assert len(a.processors) + len(b.processors) == 40
+
+    a.cluster.handle_leave(leave("b"))
+    assert len(a.processors) == 40
+
+def test_camera_added_for_another_node_is_only_cataloged():
+    clock = FakeClock()
+    a = make_node("a", ["b"], clock)
+    foreign = next(camera for camera in CAMERAS if a.cluster.owner(camera) == "b")
+
+    a.handle_camera_added({"data": {"camera_id": foreign, "rtsp_url": "rtsp://x"}})
+
+    assert foreign in a.catalog
+    assert foreign not in a.processors
+
+def test_new_node_adopts_catalog_from_leader():
+    clock = FakeClock()
+    a = make_node("a", [], clock)
+    a.handle_camera_sync({"data": {"cameras": [{"camera_id": c, "rtsp_url": "rtsp://x"} for c in CAMERAS[:5]]}})
+
+    a.cluster.handle_heartbeat(heartbeat("b"))
+
+    key, catalog = a.cluster.publisher.events[-1]
+    assert key == "cluster.catalog"
+    b = make_node("b", ["a"], clock)
+    b.handle_cluster_catalog(catalog)
+    assert len(b.catalog) == 5
+    assert len(a.processors) + len(b.processors) == 5
+
+def test_rebalance_is_atomic_with_camera_removed():
+    a = make_node("a", [], FakeClock())
+    a.handle_camera_added({"data": {"camera_id": "cam-1", "rtsp_url": "rtsp://x"}})
+    owned_cameras = a._owned_cameras
+
+    def owned_then_remove():
+        owned = owned_cameras()
+        # Remoção chega entre o cálculo e a aplicação: com o lock ela espera a
+        # redistribuição terminar em vez de ser desfeita por uma lista velha
+        remover = threading.Thread(target=a.handle_camera_removed, args=({"data": {"camera_id": "cam-1"}},))
+        remover.start()
+        remover.join(timeout=0.2)
+        threads.append(remover)
+        return owned
+
+    threads = []
+    a._owned_cameras = owned_then_remove
+    a.rebalance()
+    threads[0].join()
+
+    assert "cam-1" not in a.catalog
+    assert a.processors == {}
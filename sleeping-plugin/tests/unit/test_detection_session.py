@@ -68,3 +68,30 @@ def test_stop_session():
     
     session.stop()
     assert session.is_active == False
+
+def test_mark_closed_tracks_duration():
+    session = DetectionSession(
+        camera_id="cam-001",
+        rtsp_url="rtsp://localhost:8554/stream1",
+        started_at=datetime.now()
+    )
+    
+    assert session.mark_closed(10.0) == 0.0
+    assert session.mark_closed(10.25) == 250.0
+    assert session.mark_closed(10.7) == pytest.approx(700.0)
+    assert session.frame_counter == 3
+
+def test_mark_open_resets_closure():
+    session = DetectionSession(
+        camera_id="cam-001",
+        rtsp_url="rtsp://localhost:8554/stream1",
+        started_at=datetime.now()
+    )
+    
+    session.mark_closed(10.0)
+    session.mark_closed(10.5)
+    session.mark_open()
+    
+    assert session.closed_since is None
+    assert session.closed_ms == 0.0
+    assert session.mark_closed(20.0) == 0.0
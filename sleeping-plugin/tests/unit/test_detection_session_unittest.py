@@ -70,6 +70,29 @@ class TestDetectionSession(unittest.TestCase):
         
         session.stop()
         self.assertFalse(session.is_active)
+    
+    def test_mark_closed_tracks_duration(self):
+        session = DetectionSession(
+            camera_id="cam-001",
+            rtsp_url="rtsp://localhost:8554/stream1",
+            started_at=datetime.now()
+        )
+        
+        self.assertEqual(session.mark_closed(10.0), 0.0)
+        self.assertEqual(session.mark_closed(10.25), 250.0)
+        self.assertAlmostEqual(session.mark_closed(10.7), 700.0)
+    
+    def test_mark_open_resets_closure(self):
+        session = DetectionSession(
+            camera_id="cam-001",
+            rtsp_url="rtsp://localhost:8554/stream1",
+            started_at=datetime.now()
+        )
+        
+        session.mark_closed(10.0)
+        session.mark_open()
+        self.assertIsNone(session.closed_since)
+        self.assertEqual(session.closed_ms, 0.0)
 
 if __name__ == '__main__':
     unittest.main()
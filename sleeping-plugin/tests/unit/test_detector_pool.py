@@ -0,0 +1,160 @@
+"""
+Testes Unitários - DetectorPool
+"""
+import threading
+import time
+import pytest
+from src.infrastructure.ml.detector_pool import DetectorPool, DetectorPoolConfig
+
+class FakeDetector:
+    def __init__(self):
+        self.ear_threshold = 0.2
+        self.calls = 0
+        self.released = []
+        self.closed = False
+
+    def detect(self, frame, camera_id=None):
+        self.calls += 1
+        time.sleep(0.01)
+        return 0.3
+
+    def is_drowsy(self, ear_value):
+        return ear_value < self.ear_threshold
+
+    def release_camera(self, camera_id):
+        self.released.append(camera_id)
+
+    def close(self):
+        self.closed = True
+
+    def roi_stats(self):
+        return {}
+
+def test_pool_creates_instances():
+    pool = DetectorPool(FakeDetector, DetectorPoolConfig(size=3))
+
+    assert pool.size == 3
+    assert pool.stats()["size"] == 3
+    assert pool.ear_threshold == 0.2
+
+def test_pool_invalid_mode():
+    with pytest.raises(ValueError):
+        DetectorPool(FakeDetector, DetectorPoolConfig(size=1, mode="shared"))
+
+class BarrierDetector(FakeDetector):
+    """Só retorna quando as 4 instâncias estão dentro de detect ao mesmo tempo"""
+    barrier = None
+
+    def detect(self, frame, camera_id=None):
+        self.calls += 1
+        self.barrier.wait(timeout=5)
+        return 0.3
+
+def test_checkout_runs_in_parallel():
+    BarrierDetector.barrier = threading.Barrier(4)
+    pool = DetectorPool(BarrierDetector, DetectorPoolConfig(size=4))
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(pool.detect(None, f"cam-{i}")))
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Execução serial quebraria a barreira (BrokenBarrierError) e nenhum resultado chegaria
+    assert results == [0.3] * 4
+    assert pool.stats()["checkouts"] == 4
+    assert pool.stats()["in_use"] == 0
+
+def test_pinned_balances_cameras():
+    pool = DetectorPool(FakeDetector, DetectorPoolConfig(size=2, mode="pinned"))
+
+    for camera_id in ("cam-001", "cam-002", "cam-001"):
+        pool.detect(None, camera_id)
+
+    calls = sorted(d.calls for d in pool._detectors)
+    assert calls == [1, 2]
+    assert pool.stats()["pinned_cameras"] == 2
+
+def test_release_camera_unpins():
+    pool = DetectorPool(FakeDetector, DetectorPoolConfig(size=2, mode="pinned"))
+
+    pool.detect(None, "cam-001")
+    pool.release_camera("cam-001")
+
+    assert pool.stats()["pinned_cameras"] == 0
+    assert all(d.released == ["cam-001"] for d in pool._detectors)
+
+def test_close_closes_all():
+    pool = DetectorPool(FakeDetector, DetectorPoolConfig(size=2))
+    pool.close()
+
+    assert all(d.closed for d in pool._detectors)
+
+class LockCheckingDetector(FakeDetector):
+    """Falha se duas threads entrarem na mesma instância"""
+
+    def __init__(self):
+        super().__init__()
+        self.busy = threading.Lock()
+
+    def detect(self, frame, camera_id=None):
+        if not self.busy.acquire(blocking=False):
+            raise AssertionError("instância usada por duas threads")
+        try:
+            self.calls += 1
+            time.sleep(0.001)
+            if frame == "bad":
+                raise RuntimeError("frame corrompido")
+            return 0.3
+        finally:
+            self.busy.release()
+
+def test_pinned_batch_runs_under_each_camera_lock():
+    pool = DetectorPool(LockCheckingDetector, DetectorPoolConfig(size=2, mode="pinned"))
+    cameras = ["cam-1", "cam-2"]
+    errors = []
+
+    def single():
+        try:
+            for _ in range(50):
+                for camera_id in cameras:
+                    pool.detect(None, camera_id)
+        except AssertionError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=single)
+    thread.start()
+    for _ in range(50):
+        assert pool.detect_batch([None, None], cameras) == [0.3, 0.3]
+    thread.join()
+
+    assert errors == []
+
+def test_batch_isolates_failing_frame():
+    pool = DetectorPool(LockCheckingDetector, DetectorPoolConfig(size=2))
+
+    assert pool.detect_batch([None, "bad", None], ["cam-1", "cam-2", "cam-3"]) == [0.3, None, 0.3]
+
+def test_frame_cost_excludes_checkout_wait():
+    pool = DetectorPool(FakeDetector, DetectorPoolConfig(size=1))
+    costs = []
+    pool.cost_observer = costs.append
+
+    with pool.acquire():
+        waiting = threading.Thread(target=pool.detect, args=(None, "cam-1"))
+        waiting.start()
+        while pool.stats()["queue_depth"] == 0:
+            time.sleep(0.001)
+        time.sleep(0.05)
+    waiting.join()
+
+    # O custo do frame é só o detect (~10 ms), não os 50 ms esperando a instância
+    assert len(costs) == 2 and costs[1] < 0.04
+
+    costs.clear()
+    pool.detect_batch([None, None, None], ["cam-1", "cam-2", "cam-3"])
+    assert len(costs) == 1 and costs[0] < 0.04
@@ -0,0 +1,45 @@
+"""
+Testes Unitários - EAR vetorizado
+"""
+import math
+import random
+from collections import namedtuple
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.infrastructure.ml.ear import EYE_INDICES, GATHERED_EYE_INDICES, landmarks_to_array, mean_ear, ear_batch
+
+Landmark = namedtuple("Landmark", "x y z")
+
+def random_face(seed):
+    rng = random.Random(seed)
+    return [Landmark(rng.random(), rng.random(), 0.0) for _ in range(478)]
+
+def scalar_ear(eye, landmarks):
+    p1, p2, p3, p4, p5, p6 = [landmarks[i] for i in eye]
+    vertical = math.hypot(p2.x - p6.x, p2.y - p6.y) + math.hypot(p3.x - p5.x, p3.y - p5.y)
+    return vertical / (2.0 * math.hypot(p1.x - p4.x, p1.y - p4.y))
+
+def test_mean_ear_matches_scalar():
+    face = random_face(1)
+    left_eye, right_eye = EYE_INDICES.tolist()
+    expected = (scalar_ear(left_eye, face) + scalar_ear(right_eye, face)) / 2.0
+
+    assert mean_ear(landmarks_to_array(face)) == pytest.approx(expected, rel=1e-5)
+
+def test_gathered_points_match_full_array():
+    face = random_face(2)
+    gathered = landmarks_to_array(face, EYE_INDICES.ravel().tolist())
+
+    assert gathered.shape == (12, 3)
+    assert mean_ear(gathered, GATHERED_EYE_INDICES) == pytest.approx(mean_ear(landmarks_to_array(face)))
+
+def test_ear_batch():
+    faces = [random_face(seed) for seed in range(5)]
+    arrays = [landmarks_to_array(face) for face in faces]
+
+    ears = ear_batch(arrays)
+
+    assert ears.shape == (5,)
+    assert ears.tolist() == pytest.approx([mean_ear(a) for a in arrays])
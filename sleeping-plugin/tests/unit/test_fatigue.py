@@ -0,0 +1,80 @@
+"""
+Testes Unitários - FatigueEngine
+"""
+from src.domain.services.fatigue import FatigueConfig, FatigueEngine, RollingSum
+
+CONFIG = FatigueConfig(perclos_window_s=10, perclos_threshold=0.3, blink_window_s=10,
+                       yawn_min_ms=1000, yawn_window_s=60, yawn_limit=2, buckets=10)
+
+def run(engine, frames, start=0.0, step=0.1, mar=None):
+    """frames: sequência de bools (olhos fechados); retorna os motivos emitidos"""
+    reasons = []
+    for i, closed in enumerate(frames):
+        reason = engine.update(start + i * step, closed, mar, CONFIG)
+        if reason:
+            reasons.append(reason)
+    return reasons
+
+def test_rolling_sum_expires_old_buckets():
+    rolling = RollingSum(window_s=10, buckets=10)
+    rolling.add(0.5)
+    rolling.add(5.5, 2)
+    assert rolling.total == 3
+
+    rolling.advance(10.5)
+    assert rolling.total == 2
+    rolling.advance(100.0)
+    assert rolling.total == 0
+
+def test_perclos_over_rolling_window():
+    engine = FatigueEngine()
+    run(engine, [False] * 80 + [True] * 20)
+
+    # O primeiro frame não tem intervalo anterior e pesa 0: 2 s fechados em 9,9 s
+    assert abs(engine.perclos(9.9) - 2.0 / 9.9) < 1e-9
+
+def test_perclos_is_weighted_by_time_with_uneven_frame_spacing():
+    engine = FatigueEngine()
+    # 4 s abertos a 30 FPS e 4 s fechados a 5 FPS: por frames daria 20/140
+    run(engine, [False] * 120, step=1 / 30)
+    opened = 119 / 30
+    run(engine, [True] * 20, start=opened + 0.2, step=0.2)
+    assert abs(engine.perclos(opened + 4.0) - 4.0 / (opened + 4.0)) < 1e-9
+
+    # Um travamento de 30 s antes do próximo frame pesa só max_gap_ms
+    faces = engine._faces.total
+    engine.update(40.0, True, None, CONFIG)
+    assert engine._faces.total <= faces + CONFIG.max_gap_ms / 1000
+
+def test_perclos_alert_after_warmup_with_hysteresis():
+    engine = FatigueEngine()
+    pattern = ([True] * 4 + [False] * 6) * 20
+
+    reasons = run(engine, pattern)
+
+    assert reasons == ["perclos"]
+    assert engine.fatigued
+
+def test_blinks_counted_only_within_duration_range():
+    engine = FatigueEngine()
+    # 200 ms (piscada), 2 s (microssono, não conta), 100 ms (piscada)
+    run(engine, [False] * 5 + [True] * 2 + [False] * 5 + [True] * 20 + [False] * 5 + [True] + [False] * 5)
+
+    snapshot = engine.snapshot(4.2, CONFIG)
+    assert engine.blinks_total == 2
+    assert snapshot["blink_ms"] == 150.0
+
+def test_yawns_trigger_fatigue():
+    engine = FatigueEngine()
+    reasons = []
+    for start in (0.0, 5.0):
+        reasons += run(engine, [False] * 15, start=start, mar=0.8)
+        reasons += run(engine, [False] * 5, start=start + 1.5, mar=0.2)
+
+    assert engine.yawns_total == 2
+    assert reasons == ["yawning"]
+
+def test_no_fatigue_without_mouth_measure():
+    engine = FatigueEngine()
+    assert run(engine, [False] * 200) == []
+    assert engine.snapshot(19.9, CONFIG)["yawns"] == 0
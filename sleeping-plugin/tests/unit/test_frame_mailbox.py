@@ -0,0 +1,53 @@
+"""
+Testes Unitários - LatestFrameMailbox
+"""
+import threading
+import time
+from src.infrastructure.video.frame_mailbox import LatestFrameMailbox
+
+def test_get_returns_latest_frame():
+    mailbox = LatestFrameMailbox()
+
+    mailbox.put("frame-1", 1.0)
+    mailbox.put("frame-2", 2.0)
+
+    assert mailbox.get(timeout=0) == ("frame-2", 2.0)
+    assert mailbox.dropped == 1
+    assert mailbox.delivered == 1
+
+def test_get_timeout_returns_none():
+    mailbox = LatestFrameMailbox()
+
+    assert mailbox.get(timeout=0.01) is None
+
+def test_wants_frame_while_consumer_waits():
+    mailbox = LatestFrameMailbox()
+    assert not mailbox.wants_frame()
+
+    consumer = threading.Thread(target=mailbox.get, kwargs={"timeout": 1.0})
+    consumer.start()
+    deadline = time.monotonic() + 1.0
+    while not mailbox.wants_frame() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert mailbox.wants_frame()
+    mailbox.put("frame")
+    consumer.join()
+    assert not mailbox.wants_frame()
+
+def test_skip_counts_dropped():
+    mailbox = LatestFrameMailbox()
+
+    mailbox.skip()
+    assert mailbox.dropped == 1
+
+def test_close_wakes_consumer():
+    mailbox = LatestFrameMailbox()
+    result = []
+
+    consumer = threading.Thread(target=lambda: result.append(mailbox.get(timeout=5)))
+    consumer.start()
+    mailbox.close()
+    consumer.join(timeout=1)
+
+    assert result == [None]
@@ -0,0 +1,55 @@
+"""
+Testes Unitários - AdaptiveFrameScheduler
+"""
+import pytest
+from src.infrastructure.video.frame_scheduler import AdaptiveFrameScheduler, SchedulerConfig
+
+def make_scheduler():
+    config = SchedulerConfig(target_fps=10, idle_fps=2, boost_fps=20, idle_after_s=5, boost_margin=0.25)
+    return AdaptiveFrameScheduler(config, ear_threshold=0.2)
+
+def test_deadline_advances_one_period_and_resets_when_late():
+    scheduler = make_scheduler()
+
+    assert scheduler.next_deadline(1.0, 1.04) == pytest.approx(1.1)
+    # Até um período de atraso ainda compensa; além disso recomeça de now
+    assert scheduler.next_deadline(1.0, 1.15) == pytest.approx(1.1)
+    assert scheduler.next_deadline(1.0, 1.5) == 1.5
+
+def test_idle_after_no_face():
+    scheduler = make_scheduler()
+
+    scheduler.observe(None, now=scheduler._last_face_at + 1)
+    assert scheduler.mode == "normal"
+
+    scheduler.observe(None, now=scheduler._last_face_at + 6)
+    assert scheduler.mode == "idle"
+    assert scheduler.current_fps() == 2
+
+def test_boost_near_threshold():
+    scheduler = make_scheduler()
+
+    scheduler.observe(0.24)
+    assert scheduler.mode == "boost"
+    assert scheduler.current_fps() == 20
+
+    scheduler.observe(0.3)
+    assert scheduler.mode == "normal"
+
+def test_source_fps_caps_rate():
+    scheduler = make_scheduler()
+
+    scheduler.set_source_fps(8)
+    assert scheduler.current_fps() == 8
+
+    scheduler.set_source_fps(0)
+    assert scheduler.current_fps() == 10
+
+def test_fps_cap_applies_to_every_mode():
+    scheduler = make_scheduler()
+    scheduler.fps_cap = 5
+
+    assert scheduler.current_fps() == 5
+    scheduler.observe(0.21)
+    assert scheduler.mode == "boost"
+    assert scheduler.current_fps() == 5
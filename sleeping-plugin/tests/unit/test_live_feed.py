@@ -0,0 +1,70 @@
+"""
+Testes Unitários - LiveFeedHub
+"""
+import asyncio
+import threading
+from src.application.services.live_feed import FeedConfig, LiveFeedHub
+
+def test_publish_without_subscribers_is_a_no_op():
+    hub = LiveFeedHub(FeedConfig())
+    hub.publish("alert.triggered", {"camera_id": "cam-1"}, "cam-1")
+
+    assert hub.stats()["published"] == 0
+
+def test_messages_from_camera_threads_reach_every_subscriber():
+    hub = LiveFeedHub(FeedConfig(ear_interval_ms=0))
+
+    async def scenario():
+        first, second = hub.subscribe(), hub.subscribe()
+        thread = threading.Thread(target=lambda: [hub.publish_ear("cam-1", 0.3, False, now=i) for i in range(5)])
+        thread.start()
+        thread.join()
+        return await hub.next(first, 1.0), await hub.next(second, 1.0)
+
+    first, second = asyncio.run(scenario())
+
+    assert len(first) == len(second) == 5
+    assert first[0].startswith("event: ear\ndata: {")
+
+def test_slow_subscriber_drops_oldest():
+    hub = LiveFeedHub(FeedConfig(ring_size=4))
+
+    async def scenario():
+        subscriber = hub.subscribe()
+        for i in range(10):
+            hub.publish("alert.triggered", {"n": i})
+        return subscriber, await hub.next(subscriber, 1.0)
+
+    subscriber, messages = asyncio.run(scenario())
+
+    assert [m.split('"n":')[1][0] for m in messages] == ["6", "7", "8", "9"]
+    assert subscriber.dropped == 6
+    assert hub.stats()["dropped"] == 6
+
+def test_camera_filter_and_ear_downsampling():
+    hub = LiveFeedHub(FeedConfig(ear_interval_ms=200))
+
+    async def scenario():
+        subscriber = hub.subscribe("cam-1")
+        for i in range(10):
+            hub.publish_ear("cam-1", 0.3, False, now=i * 0.05)
+            hub.publish_ear("cam-2", 0.3, False, now=i * 0.05)
+        return await hub.next(subscriber, 1.0)
+
+    messages = asyncio.run(scenario())
+
+    assert len(messages) == 3
+    assert all('"cam-1"' in message for message in messages)
+
+def test_next_times_out_and_unsubscribe_stops_delivery():
+    hub = LiveFeedHub(FeedConfig(max_subscribers=1))
+
+    async def scenario():
+        subscriber = hub.subscribe()
+        assert hub.subscribe() is None
+        empty = await hub.next(subscriber, 0.01)
+        hub.unsubscribe(subscriber)
+        return empty
+
+    assert asyncio.run(scenario()) == []
+    assert not hub.active
@@ -0,0 +1,58 @@
+"""
+Testes Unitários - MetricsRegistry
+"""
+import threading
+from src.infrastructure.monitoring.metrics import MetricsRegistry
+
+def test_counter_shards_are_summed_across_threads():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("camera",))
+    counter = frames.labels("cam-1")
+
+    threads = [threading.Thread(target=lambda: [counter.inc() for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value == 4000
+    assert 'frames_total{camera="cam-1"} 4000' in registry.render()
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "Estágios", ("stage", "camera"), buckets=(0.01, 0.1))
+    histogram = stage.labels("detect", "cam-1")
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert 'stage_seconds_bucket{stage="detect",camera="cam-1",le="0.01"} 2' in lines
+    assert 'stage_seconds_bucket{stage="detect",camera="cam-1",le="0.1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="detect",camera="cam-1",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="detect",camera="cam-1"} 4' in lines
+    assert "# TYPE stage_seconds histogram" in lines
+
+def test_remove_drops_camera_series():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames_total", "Frames", ("camera",))
+    frames.labels("cam-1").inc()
+    frames.labels("cam-2").inc()
+
+    registry.remove("camera", "cam-1")
+
+    output = registry.render()
+    assert "cam-1" not in output
+    assert 'frames_total{camera="cam-2"} 1' in output
+
+def test_collectors_are_read_at_scrape_and_failures_skipped():
+    registry = MetricsRegistry()
+    depth = {"value": 3}
+    registry.collector("queue_depth", "Fila", "gauge", (), lambda: [((), depth["value"])])
+    registry.collector("broken", "Quebrado", "gauge", (), lambda: {}["missing"])
+
+    assert "queue_depth 3" in registry.render()
+    depth["value"] = 7
+    output = registry.render()
+    assert "queue_depth 7" in output
+    assert "broken" not in output
@@ -0,0 +1,139 @@
+"""
+Testes Unitários - SharedFrameRing e ProcessInferenceEngine
+"""
+import os
+import time
+import numpy as np
+import pytest
+from multiprocessing import shared_memory
+from src.infrastructure.ml.process_engine import ProcessEngineConfig, ProcessInferenceEngine, SharedFrameRing
+
+def test_ring_write_and_read():
+    ring = SharedFrameRing(slots=2, slot_bytes=12)
+    frame = np.arange(12, dtype=np.uint8).reshape(2, 2, 3)
+
+    offset = ring.write(frame)
+    shm = shared_memory.SharedMemory(name=ring.name)
+    view = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+    assert np.array_equal(view, frame)
+
+    del view
+    shm.close()
+    ring.release(offset)
+    ring.close()
+
+def test_ring_uses_distinct_slots():
+    ring = SharedFrameRing(slots=2, slot_bytes=12)
+    frame = np.zeros((2, 2, 3), dtype=np.uint8)
+
+    first = ring.write(frame)
+    second = ring.write(frame)
+
+    assert first != second
+
+    ring.release(first)
+    ring.release(second)
+    ring.close()
+
+def test_ring_rejects_large_frame():
+    ring = SharedFrameRing(slots=1, slot_bytes=4)
+
+    with pytest.raises(ValueError):
+        ring.write(np.zeros(8, dtype=np.uint8))
+
+    ring.close()
+
+class FakeDetector:
+    """Roda no worker: EAR = primeiro byte do frame / 100; frame 255 derruba o processo"""
+
+    def detect(self, frame, camera_id=None):
+        if frame.flat[0] == 255:
+            os._exit(1)
+        if frame.flat[0] == 254:
+            raise ValueError("frame inválido")
+        if frame.flat[0] == 253:
+            time.sleep(0.5)
+        return frame.flat[0] / 100
+
+    def release_camera(self, camera_id):
+        pass
+
+    def close(self):
+        pass
+
+def frame(value):
+    return np.full((2, 2, 3), value, dtype=np.uint8)
+
+@pytest.fixture
+def engine():
+    engine = ProcessInferenceEngine(
+        FakeDetector, ProcessEngineConfig(workers=2, result_timeout=30, health_check_s=0.05), 0.2
+    )
+    yield engine
+    engine.close()
+
+def test_engine_routes_batch_and_pins_cameras(engine):
+    costs = []
+    engine.cost_observer = costs.append
+    assert engine.detect_batch([frame(10), frame(20), frame(30)], ["cam-1", "cam-2", "cam-1"]) == [0.1, 0.2, 0.3]
+
+    stats = engine.stats()
+    assert sorted(stats["cameras_per_worker"]) == [1, 1]
+    assert stats["requests"] == 3 and stats["in_flight"] == 0
+    assert len(costs) == 3
+
+def test_engine_reports_worker_errors(engine):
+    with pytest.raises(RuntimeError, match="frame inválido"):
+        engine.detect(frame(254), "cam-1")
+    assert engine.detect(frame(10), "cam-1") == 0.1
+    assert engine.stats()["errors"] == 1
+
+def test_engine_release_camera_unpins(engine):
+    engine.detect(frame(10), "cam-1")
+    engine.release_camera("cam-1")
+
+    assert engine.stats()["cameras_per_worker"] == [0, 0]
+    assert engine._rings == {}
+
+def test_engine_respawns_dead_worker(engine):
+    engine.detect(frame(10), "cam-1")
+
+    # Com result_timeout=30, só passa rápido se o coletor falhar o frame ao ver o worker morto
+    with pytest.raises(RuntimeError, match="morreu"):
+        engine.detect(frame(255), "cam-1")
+
+    assert engine.detect(frame(20), "cam-1") == 0.2
+    stats = engine.stats()
+    assert stats["respawns"] == 1
+    assert stats["alive"] == 2
+
+def test_timed_out_frame_keeps_its_slot_until_the_worker_answers():
+    engine = ProcessInferenceEngine(
+        FakeDetector, ProcessEngineConfig(workers=1, ring_slots=1, result_timeout=30, health_check_s=0.05), 0.2
+    )
+    try:
+        # Timeout curto só depois do worker subir
+        engine.detect(frame(10), "cam-1")
+        engine.config.result_timeout = 0.1
+        ring = engine._rings["cam-1"]
+
+        with pytest.raises(TimeoutError):
+            engine.detect(frame(253), "cam-1")
+        # O worker ainda lê o frame: o slot não pode ser reescrito
+        assert ring._busy == [True]
+        assert engine.stats()["in_flight"] == 1
+
+        # Removida com o frame em voo: o segmento só fecha quando o slot volta
+        engine.release_camera("cam-1")
+        assert not ring._closed
+
+        deadline = time.monotonic() + 5
+        while engine.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert ring._busy == [False]
+        assert ring._closed
+        engine.config.result_timeout = 30
+        assert engine.detect(frame(20), "cam-1") == 0.2
+    finally:
+        engine.close()
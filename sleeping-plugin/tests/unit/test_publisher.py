@@ -0,0 +1,305 @@
+"""
+Testes Unitários - EventPublisher
+"""
+import json
+import threading
+import time
+import pika
+import pytest
+from src.domain.events.domain_events import AlertTriggeredEvent, DrowsinessDetectedEvent
+from src.infrastructure.messaging.publisher import EventPublisher, PublisherConfig
+from src.infrastructure.messaging.serializers import COMPACT, decode_body
+from src.infrastructure.messaging.spool import EventSpool
+
+class FakeChannel:
+    """Canal com confirms assíncronos: os acks só chegam no process_data_events"""
+    def __init__(self, gate=None, nack_keys=(), fail_keys=(), confirm_until=None):
+        self.published = []
+        self.content_types = []
+        self.threads = set()
+        self.confirms = False
+        self.gate = gate
+        self.nack_keys = nack_keys
+        self.fail_keys = fail_keys
+        self.confirm_until = confirm_until
+        self.log = []
+        self._impl = self
+        self._on_confirm = None
+        self._tag = 0
+        self._unconfirmed = []
+
+    def exchange_declare(self, **kwargs):
+        pass
+
+    def confirm_delivery(self, ack_nack_callback):
+        self.confirms = True
+        self._on_confirm = ack_nack_callback
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.content_types.append(properties.content_type)
+        if self.gate:
+            self.gate.wait(timeout=2)
+        self.threads.add(threading.current_thread().name)
+        if routing_key in self.fail_keys:
+            raise pika.exceptions.StreamLostError("conexão perdida")
+        self._tag += 1
+        self.log.append(("publish", self._tag))
+        self._unconfirmed.append((self._tag, routing_key in self.nack_keys))
+        if routing_key not in self.nack_keys:
+            self.published.append((routing_key, body))
+
+    def deliver_confirms(self):
+        # Acks consecutivos vão num único Basic.Ack multiple, como no RabbitMQ
+        limit = self.confirm_until if self.confirm_until is not None else self._tag
+        pending = [item for item in self._unconfirmed if item[0] <= limit]
+        self._unconfirmed = [item for item in self._unconfirmed if item[0] > limit]
+        for position, (tag, nacked) in enumerate(pending):
+            if nacked:
+                method = pika.spec.Basic.Nack(delivery_tag=tag)
+            elif position + 1 < len(pending) and not pending[position + 1][1]:
+                continue
+            else:
+                method = pika.spec.Basic.Ack(delivery_tag=tag, multiple=True)
+            self.log.append(("ack" if not nacked else "nack", tag))
+            self._on_confirm(pika.frame.Method(1, method))
+
+class FakeConnection:
+    def __init__(self, channel):
+        self._channel = channel
+        self.closed = False
+
+    def channel(self):
+        return self._channel
+
+    def process_data_events(self, time_limit=0):
+        if self._channel._on_confirm:
+            self._channel.deliver_confirms()
+
+    def call_later(self, delay, callback):
+        pass
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def make_publisher(tmp_path):
+    def make(channel, **overrides):
+        config = PublisherConfig(host="localhost", port=5672, username="guest", password="guest",
+                                 exchange="vms.events", spool_dir=str(tmp_path / "spool"), **overrides)
+        connection = FakeConnection(channel)
+        publisher = EventPublisher(config, connection_factory=lambda parameters: connection)
+        return publisher, connection
+    return make
+
+def test_publish_goes_through_io_thread_with_confirms(make_publisher):
+    channel = FakeChannel()
+    publisher, connection = make_publisher(channel)
+    publisher.connect()
+
+    publisher.publish("alert.triggered", {"camera_id": "cam-001"})
+    publisher.publish("drowsiness.detected", {"camera_id": "cam-001"})
+    publisher.close()
+
+    assert channel.confirms
+    assert [key for key, _ in channel.published] == ["alert.triggered", "drowsiness.detected"]
+    assert channel.threads == {"publisher-io"}
+    assert connection.closed
+    assert publisher.stats()["published"] == 2
+
+def test_batch_is_published_before_waiting_for_confirms(make_publisher):
+    gate = threading.Event()
+    channel = FakeChannel(gate=gate)
+    publisher, _ = make_publisher(channel)
+    publisher.connect()
+
+    # O primeiro evento segura a thread de I/O enquanto os demais formam um lote
+    publisher.publish("drowsiness.detected", {"seq": 0})
+    wait_for(lambda: publisher.stats()["queue_depth"] == 0)
+    for i in range(1, 6):
+        publisher.publish("drowsiness.detected", {"seq": i})
+    gate.set()
+    publisher.close()
+
+    assert channel.log == [("publish", 1), ("ack", 1)] + [("publish", tag) for tag in range(2, 7)] + [("ack", 6)]
+    assert publisher.stats()["published"] == 6
+
+def test_publish_does_not_block_on_slow_broker(make_publisher):
+    gate = threading.Event()
+    channel = FakeChannel(gate=gate)
+    publisher, _ = make_publisher(channel, queue_size=2, batch_size=1)
+    publisher.connect()
+
+    for i in range(10):
+        publisher.publish("drowsiness.detected", {"seq": i})
+
+    stats = publisher.stats()
+    assert stats["enqueued"] == 10
+    assert stats["dropped"] > 0
+    assert stats["max_depth"] <= 2
+
+    gate.set()
+    publisher.close()
+    sequence = [json.loads(body)["seq"] for _, body in channel.published]
+    assert 9 in sequence
+
+def test_full_queue_never_drops_alerts(make_publisher):
+    gate = threading.Event()
+    channel = FakeChannel(gate=gate)
+    publisher, _ = make_publisher(channel, queue_size=3, batch_size=1)
+    publisher.connect()
+
+    publisher.publish("drowsiness.detected", {"seq": "first"})
+    wait_for(lambda: publisher.stats()["queue_depth"] == 0)
+    for i in range(5):
+        publisher.publish("alert.triggered", {"seq": i})
+        publisher.publish("drowsiness.telemetry", {"seq": f"t{i}"})
+        publisher.publish("drowsiness.detected", {"seq": f"d{i}"})
+
+    gate.set()
+    publisher.close()
+    alerts = [json.loads(body)["seq"] for key, body in channel.published if key == "alert.triggered"]
+    assert alerts == [0, 1, 2, 3, 4]
+
+def test_close_is_not_blocked_by_full_queue(make_publisher):
+    gate = threading.Event()
+    channel = FakeChannel(gate=gate)
+    publisher, _ = make_publisher(channel, queue_size=2, batch_size=1)
+    publisher.connect()
+
+    for i in range(4):
+        publisher.publish("alert.triggered", {"seq": i})
+
+    # O sentinela entra mesmo com a fila cheia de alertas protegidos
+    threading.Timer(0.05, gate.set).start()
+    publisher.close()
+    assert [json.loads(body)["seq"] for _, body in channel.published] == [0, 1, 2, 3]
+    assert not publisher._thread.is_alive()
+
+def test_nacked_messages_are_counted(make_publisher):
+    channel = FakeChannel(nack_keys=("alert.triggered",))
+    publisher, _ = make_publisher(channel)
+    publisher.connect()
+
+    publisher.publish("alert.triggered", {})
+    publisher.publish("drowsiness.detected", {})
+    publisher.close()
+
+    stats = publisher.stats()
+    assert stats["nacked"] == 1
+    assert stats["published"] == 1
+
+def test_publish_before_connect_raises(make_publisher):
+    publisher, _ = make_publisher(FakeChannel())
+
+    with pytest.raises(RuntimeError):
+        publisher.publish("alert.triggered", {})
+
+def test_events_are_spooled_while_broker_is_down_and_replayed_in_order(tmp_path):
+    channel = FakeChannel()
+    broker_up = threading.Event()
+
+    def factory(parameters):
+        if not broker_up.is_set():
+            raise pika.exceptions.AMQPConnectionError("recusado")
+        return FakeConnection(channel)
+
+    config = PublisherConfig(host="localhost", port=5672, username="guest", password="guest",
+                             exchange="vms.events", spool_dir=str(tmp_path / "spool"),
+                             connect_timeout=0.2, reconnect_initial=0.05, reconnect_max=0.05)
+    publisher = EventPublisher(config, connection_factory=factory)
+    publisher.connect()
+    assert not publisher.connected
+
+    for i in range(5):
+        publisher.publish("alert.triggered", {"seq": i})
+    wait_for(lambda: publisher.stats()["spool_pending"] == 5)
+
+    broker_up.set()
+    wait_for(lambda: publisher.stats()["spool_pending"] == 0)
+    publisher.publish("alert.triggered", {"seq": 5})
+    publisher.close()
+
+    assert [json.loads(body)["seq"] for _, body in channel.published] == [0, 1, 2, 3, 4, 5]
+    # Replay em pipeline: os cinco registros saem antes do primeiro ack
+    assert channel.log[:6] == [("publish", tag) for tag in range(1, 6)] + [("ack", 5)]
+    stats = publisher.stats()
+    assert stats["replayed"] == 5
+    assert stats["published"] == 6
+
+def test_replay_keeps_records_without_confirm_in_the_spool(tmp_path):
+    spool_dir = str(tmp_path / "spool")
+    spool = EventSpool(spool_dir)
+    for i in range(5):
+        spool.append("alert.triggered", json.dumps({"seq": i}))
+    spool.close()
+
+    channel = FakeChannel(confirm_until=3)
+    config = PublisherConfig(host="localhost", port=5672, username="guest", password="guest",
+                             exchange="vms.events", spool_dir=spool_dir,
+                             confirm_timeout=0.1, reconnect_initial=10)
+    publisher = EventPublisher(config, connection_factory=lambda parameters: FakeConnection(channel))
+    publisher.connect()
+    wait_for(lambda: not publisher.connected)
+    publisher.close()
+
+    # Os cinco saíram, só três foram confirmados: o cursor para no terceiro
+    assert channel.log == [("publish", tag) for tag in range(1, 6)] + [("ack", 3)]
+    assert publisher.stats()["replayed"] == 3
+    assert [json.loads(text)["seq"] for _, text, _ in EventSpool(spool_dir).read(10)] == [3, 4]
+
+def test_lost_connection_spools_unsent_events(make_publisher):
+    channel = FakeChannel(fail_keys=("alert.triggered",))
+    publisher, _ = make_publisher(channel, reconnect_initial=10, batch_size=1)
+    publisher.connect()
+
+    publisher.publish("drowsiness.detected", {})
+    publisher.publish("alert.triggered", {})
+    publisher.close()
+
+    stats = publisher.stats()
+    assert stats["published"] == 1
+    assert stats["spooled"] == 1
+    assert stats["spool_pending"] == 1
+
+def test_lost_connection_spools_published_but_unconfirmed_events(make_publisher):
+    gate = threading.Event()
+    channel = FakeChannel(gate=gate, fail_keys=("alert.triggered",))
+    publisher, _ = make_publisher(channel, reconnect_initial=10)
+    publisher.connect()
+
+    publisher.publish("drowsiness.detected", {"seq": 0})
+    wait_for(lambda: publisher.stats()["queue_depth"] == 0)
+    publisher.publish("drowsiness.detected", {"seq": 1})
+    publisher.publish("alert.triggered", {"seq": 2})
+    gate.set()
+    publisher.close()
+
+    # seq 1 saiu no mesmo lote, mas sem ack antes da queda: volta pelo spool
+    stats = publisher.stats()
+    assert stats["published"] == 1
+    spooled = EventSpool(publisher.config.spool_dir).read(10)
+    assert [json.loads(text)["seq"] for _, text, _ in spooled] == [1, 2]
+
+def test_compact_format_sets_content_type_and_spools_json(tmp_path):
+    channel = FakeChannel(fail_keys=("alert.triggered",))
+    config = PublisherConfig(host="localhost", port=5672, username="guest", password="guest",
+                             exchange="vms.events", spool_dir=str(tmp_path / "spool"),
+                             serializer="compact", reconnect_initial=10)
+    publisher = EventPublisher(config, connection_factory=lambda parameters: FakeConnection(channel))
+    publisher.connect()
+
+    event = DrowsinessDetectedEvent(camera_id="cam-001", ear_value=0.15, severity="high", duration_ms=660)
+    publisher.publish("drowsiness.detected", event)
+    publisher.publish("alert.triggered", AlertTriggeredEvent("cam-001", "drowsiness", "critical", "teste"))
+    publisher.close()
+
+    assert channel.content_types[0] == COMPACT
+    assert decode_body(channel.published[0][1], COMPACT)["camera_id"] == "cam-001"
+    _, spooled, _ = EventSpool(str(tmp_path / "spool")).read(10)[0]
+    assert json.loads(spooled)["camera_id"] == "cam-001"
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,51 @@
+"""
+Testes Unitários - FaceROITracker
+"""
+from collections import namedtuple
+import pytest
+from src.infrastructure.ml.roi_tracker import FaceROITracker, ROIConfig, landmarks_box
+
+Point = namedtuple("Point", "x y")
+
+def test_no_region_without_track():
+    tracker = FaceROITracker(ROIConfig())
+
+    assert tracker.region(640, 480) is None
+
+def test_region_adds_margin_and_clamps():
+    tracker = FaceROITracker(ROIConfig(margin=0.5, min_side=10))
+    tracker.update((0.25, 0.25, 0.5, 0.5))
+
+    assert tracker.region(400, 400) == (50, 50, 251, 251)
+
+    tracker.update((0.0, 0.0, 0.5, 0.5))
+    left, top, _, _ = tracker.region(400, 400)
+    assert (left, top) == (0, 0)
+
+def test_tiny_region_falls_back_to_full_frame():
+    tracker = FaceROITracker(ROIConfig(margin=0.0, min_side=64))
+    tracker.update((0.5, 0.5, 0.52, 0.52))
+
+    assert tracker.region(640, 480) is None
+
+def test_hit_rate_and_miss_drop_track():
+    tracker = FaceROITracker(ROIConfig())
+    tracker.update((0.2, 0.2, 0.6, 0.6))
+
+    tracker.hit()
+    tracker.hit()
+    tracker.hit()
+    tracker.miss()
+
+    assert tracker.box is None
+    assert tracker.hit_rate == pytest.approx(0.75)
+
+def test_landmarks_box():
+    landmarks = [Point(0.3, 0.4), Point(0.5, 0.2), Point(0.4, 0.6)]
+
+    assert landmarks_box(landmarks) == (0.3, 0.2, 0.5, 0.6)
+
+def test_landmarks_box_with_indices():
+    landmarks = [Point(0.3, 0.4), Point(0.5, 0.2), Point(0.4, 0.6)]
+
+    assert landmarks_box(landmarks, [0, 1]) == (0.3, 0.2, 0.5, 0.4)
@@ -0,0 +1,82 @@
+"""
+Testes Unitários - Event Serializers
+"""
+import time
+import pytest
+from src.domain.events.domain_events import AlertTriggeredEvent, DrowsinessDetectedEvent
+from src.infrastructure.messaging.serializers import (
+    COMPACT, JSON, MSGPACK, CompactSerializer, JsonSerializer, create_serializer, decode_body
+)
+
+def drowsiness_event():
+    return DrowsinessDetectedEvent(camera_id="cam-001", ear_value=0.15, severity="high", duration_ms=660)
+
+def test_to_dict_matches_dataclass_fields():
+    event = drowsiness_event()
+    assert event.to_dict() == {
+        "event_type": "drowsiness.detected",
+        "timestamp": event.timestamp,
+        "source": "vigileye-plugin",
+        "camera_id": "cam-001",
+        "ear_value": 0.15,
+        "severity": "high",
+        "duration_ms": 660
+    }
+
+def test_json_round_trip_accepts_event_objects():
+    body, content_type = JsonSerializer().encode(drowsiness_event())
+    assert content_type == JSON
+    assert decode_body(body, content_type)["camera_id"] == "cam-001"
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    event = AlertTriggeredEvent(camera_id="cam-001", alert_type="drowsiness", priority="critical", message="ok")
+
+    body, content_type = create_serializer("msgpack").encode(event)
+
+    assert content_type == MSGPACK
+    assert decode_body(body, content_type) == event.to_dict()
+
+def test_compact_round_trip_and_size():
+    event = drowsiness_event()
+    serializer = CompactSerializer()
+
+    body, content_type = serializer.encode(event)
+    decoded = decode_body(body, content_type)
+
+    assert content_type == COMPACT
+    assert len(body) < len(JsonSerializer().encode(event)[0]) / 2
+    assert decoded["timestamp"] == event.timestamp
+    assert decoded["ear_value"] == pytest.approx(0.15, abs=1e-6)
+    assert {k: v for k, v in decoded.items() if k != "ear_value"} == {
+        k: v for k, v in event.to_dict().items() if k != "ear_value"
+    }
+
+def test_compact_timestamps_do_not_depend_on_local_timezone(monkeypatch):
+    serializer = CompactSerializer()
+    event = {"event_type": "alert.triggered", "camera_id": "cam-1", "alert_type": "drowsiness",
+             "priority": "critical", "message": ""}
+
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    try:
+        naive = serializer.encode({**event, "timestamp": "2024-01-15T10:00:00"})[0]
+        aware = serializer.encode({**event, "timestamp": "2024-01-15T07:00:00-03:00"})[0]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    # Sem fuso é UTC; o decodificado sai sempre em UTC com fuso
+    assert serializer.decode(naive)["timestamp"] == "2024-01-15T10:00:00+00:00"
+    assert serializer.decode(aware)["timestamp"] == "2024-01-15T10:00:00+00:00"
+
+def test_compact_falls_back_to_json_for_unknown_events():
+    body, content_type = CompactSerializer().encode({"event_type": "other", "value": 1})
+    assert content_type == JSON
+    assert decode_body(body, content_type) == {"event_type": "other", "value": 1}
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        create_serializer("xml")
+    with pytest.raises(ValueError):
+        decode_body(b"", "text/plain")
@@ -0,0 +1,55 @@
+"""
+Testes Unitários - EventSpool
+"""
+import os
+from src.infrastructure.messaging.spool import EventSpool
+
+def test_records_are_read_in_order_and_acked(tmp_path):
+    spool = EventSpool(str(tmp_path))
+    for i in range(3):
+        spool.append("alert.triggered", f'{{"seq": {i}}}')
+
+    records = spool.read(2)
+    assert [(key, body) for key, body, _ in records] == [
+        ("alert.triggered", '{"seq": 0}'), ("alert.triggered", '{"seq": 1}')
+    ]
+
+    spool.ack(records[-1][2], len(records))
+    assert spool.pending == 1
+    assert [body for _, body, _ in spool.read(10)] == ['{"seq": 2}']
+
+def test_pending_records_survive_restart(tmp_path):
+    spool = EventSpool(str(tmp_path))
+    spool.append("a", "1")
+    spool.append("b", "2")
+    spool.ack(spool.read(1)[0][2], 1)
+    spool.close()
+
+    reopened = EventSpool(str(tmp_path))
+    assert reopened.pending == 1
+    assert [(key, body) for key, body, _ in reopened.read(10)] == [("b", "2")]
+
+def test_torn_tail_is_discarded(tmp_path):
+    spool = EventSpool(str(tmp_path))
+    spool.append("a", "1")
+    spool.close()
+    with open(os.path.join(tmp_path, "00000001.spool"), "ab") as f:
+        f.write(b"b\t{incomplet")
+
+    reopened = EventSpool(str(tmp_path))
+    assert reopened.pending == 1
+    assert [body for _, body, _ in reopened.read(10)] == ["1"]
+
+def test_segments_roll_and_are_removed_after_ack(tmp_path):
+    spool = EventSpool(str(tmp_path), segment_bytes=32)
+    for i in range(6):
+        spool.append("alert.triggered", str(i))
+    assert len(spool.segments) > 1
+
+    records = spool.read(100)
+    assert [body for _, body, _ in records] == [str(i) for i in range(6)]
+
+    spool.ack(records[-1][2], len(records))
+    assert spool.pending == 0
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".spool")]) == 1
+    assert spool.read(10) == []
@@ -0,0 +1,55 @@
+"""
+Testes Unitários - StreamProcessor
+"""
+import time
+import pytest
+from src.infrastructure.video.frame_scheduler import AdaptiveFrameScheduler, SchedulerConfig
+from src.infrastructure.video.stream_processor import StreamProcessor
+
+class PacedCapture:
+    """Câmera ao vivo falsa: um frame a cada 1/fps segundos"""
+    fps = 30.0
+
+    def __init__(self, url, config):
+        self._next = time.monotonic()
+
+    def is_opened(self):
+        return True
+
+    def grab(self):
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next = max(self._next + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+        return True
+
+    def retrieve(self):
+        return True, object()
+
+    def release(self):
+        pass
+
+def achieved_fps(ear_value, duration=1.5):
+    frames = []
+
+    def callback(camera_id, frame, captured_at):
+        frames.append(time.monotonic())
+        return ear_value
+
+    config = SchedulerConfig(target_fps=15, boost_fps=30, idle_after_s=60, boost_margin=0.25)
+    processor = StreamProcessor("cam-1", "rtsp://x", callback,
+                                scheduler=AdaptiveFrameScheduler(config, 0.2), capture_factory=PacedCapture)
+    processor.start()
+    time.sleep(duration)
+    processor.stop()
+
+    # Descarta o arranque: conta só o regime
+    steady = [t for t in frames if t >= frames[0] + 0.25]
+    return (len(steady) - 1) / (steady[-1] - steady[0])
+
+def test_scheduler_reaches_target_fps_against_paced_source():
+    # O período inclui a espera pelo próximo grab; sem isso 15 FPS viravam ~10
+    assert achieved_fps(0.35) == pytest.approx(15, abs=1.5)
+
+def test_boost_reaches_source_fps():
+    assert achieved_fps(0.21) == pytest.approx(30, abs=3)
@@ -0,0 +1,103 @@
+"""
+Testes Unitários - Telemetria de EAR
+"""
+from src.application.services.telemetry import TelemetryAggregator, TelemetryConfig
+from src.domain.services.ear_window import EarWindow
+
+class FakePublisher:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, routing_key, event):
+        self.published.append((routing_key, event))
+
+def make_aggregator(**overrides):
+    config = TelemetryConfig(enabled=True, window_ms=1000, publish_interval_s=3600, **overrides)
+    publisher = FakePublisher()
+    return TelemetryAggregator(publisher, config), publisher
+
+def test_window_summary():
+    window = EarWindow("cam-1", 0.0, 1700000000.0, last_at=0.0)
+    for i, (ear, closed) in enumerate(((0.30, False), (0.10, True), (None, False), (0.20, False)), 1):
+        window.add(i * 0.1, ear, closed)
+
+    summary = window.summary(1000)
+
+    assert summary["frames"] == 4
+    assert summary["face_ratio"] == 0.75
+    assert summary["ear_min"] == 0.1
+    assert summary["ear_mean"] == 0.2
+    assert summary["ear_max"] == 0.3
+    assert summary["perclos"] == 0.333
+
+def test_window_without_face():
+    window = EarWindow("cam-1", 0.0, 0.0)
+    window.add(0.0, None, False)
+
+    summary = window.summary(1000)
+
+    assert summary["face_ratio"] == 0.0
+    assert summary["ear_mean"] is None
+    assert summary["perclos"] is None
+
+def test_window_perclos_is_weighted_by_time_between_frames():
+    window = EarWindow("cam-1", 0.0, 0.0, last_at=0.0, max_gap_s=0.5)
+    # 1 s aberto a 30 FPS, depois 1 s fechado a 5 FPS: por frames daria 5/35
+    now = 0.0
+    for _ in range(30):
+        now += 1 / 30
+        window.add(now, 0.3, False)
+    for _ in range(5):
+        now += 0.2
+        window.add(now, 0.1, True)
+    assert window.summary(1000)["perclos"] == 0.5
+
+    # Um travamento de 5 s pesa só max_gap_s
+    window.add(now + 5.0, 0.1, True)
+    assert window.summary(1000)["perclos"] == round(1.5 / 2.5, 3)
+
+def test_windows_are_published_in_one_batch():
+    aggregator, publisher = make_aggregator()
+    try:
+        for i in range(30):
+            aggregator.record("cam-1", 0.3, False, now=i * 0.1)
+            aggregator.record("cam-2", 0.1, True, now=i * 0.1)
+        aggregator.release_camera("cam-1")
+        aggregator.release_camera("cam-2")
+
+        aggregator.flush()
+    finally:
+        aggregator.close()
+
+    assert len(publisher.published) == 1
+    routing_key, event = publisher.published[0]
+    assert routing_key == "drowsiness.telemetry"
+    assert event["event_type"] == "drowsiness.telemetry"
+    assert len(event["windows"]) == 6
+    assert sum(window["frames"] for window in event["windows"]) == 60
+    assert {window["perclos"] for window in event["windows"] if window["camera_id"] == "cam-2"} == {1.0}
+
+def test_batches_are_split_by_max_batch():
+    aggregator, publisher = make_aggregator(max_batch=2)
+    try:
+        for i in range(6):
+            aggregator.record("cam-1", 0.3, False, now=float(i))
+        aggregator.flush()
+    finally:
+        aggregator.close()
+
+    assert [len(event["windows"]) for _, event in publisher.published] == [2, 2, 2]
+
+def test_ring_overflow_drops_oldest():
+    aggregator, publisher = make_aggregator(ring_size=3)
+    try:
+        for i in range(6):
+            aggregator.record("cam-1", 0.3, False, now=float(i))
+
+        assert aggregator.stats()["dropped"] == 2
+        aggregator.flush()
+    finally:
+        aggregator.close()
+
+    windows = publisher.published[0][1]["windows"]
+    assert len(windows) == 3